@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite
+Runs the headless pipeline (Gemini request -> extract -> validate -> save -> headless FreeCAD)
+against a local Gemini stub and the fake freecadcmd at several concurrency levels, then
+measures AST analyzer throughput and cold-start times. Results are written as JSON and compared
+with a baseline; any metric that regresses by more than the tolerance fails the run.
+
+Usage: python3 benchmarks/bench_suite.py [--quick] [--json results.json]
+       python3 benchmarks/bench_suite.py [--quick] --update-baseline   # after an intended change
+
+--quick runs are compared with their own baseline, recorded with the same settings.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_validator import make_script
+from benchmarks.stub_gemini import StubGemini
+from gencad_analyzer import analyze_script
+from gencad_batch import RESULTS_FILE, BatchRunner
+from gencad_client import GeminiClient
+from gencad_engine import GenerationEngine
+from gencad_metrics import percentile
+from gencad_workers import WORKER_SCRIPT, WorkerPool
+
+FAKE_FREECADCMD = os.path.join(ROOT, "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_WORKER_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baseline.json")
+QUICK_BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baseline_quick.json")
+DEFAULT_CONCURRENCY = (1, 4, 16)
+DEFAULT_TOLERANCE = 0.30  # fractional change allowed before a metric counts as a regression
+TAIL_TOLERANCE = 0.60     # p95 includes the jobs that hit an injected error and retried
+NOISY_TOLERANCE = 1.0     # for p99 and process start-up, which vary run to run
+JITTER_SHARE = 0.2        # stub latency varies by this share either way
+BACKOFF_BASE = 0.01       # client retry backoff against the stub, in seconds
+BACKOFF_MAX = 0.05
+
+
+CALIBRATION_LOOPS = 100_000
+
+
+def metric(value, unit, better, tolerance=None, slack=None, calibration_ms=None):
+    """One result entry; better is 'higher' or 'lower'. tolerance overrides the suite-wide one.
+
+    slack is an absolute allowance in the metric's unit on top of the tolerance, for effects that do
+    not scale with the baseline (one flaky job, one retry). calibration_ms is the calibration loop's
+    time measured next to a CPU-bound metric; the baseline is scaled by the ratio of the two.
+    """
+    entry = {'value': round(value, 4), 'unit': unit, 'better': better}
+    if tolerance is not None:
+        entry['tolerance'] = tolerance
+    if slack is not None:
+        entry['slack'] = round(slack, 4)
+    if calibration_ms is not None:
+        entry['calibration_ms'] = round(calibration_ms, 3)
+    return entry
+
+
+def calibrate(repeat=3):
+    """Milliseconds for a fixed pure-Python loop (best of repeat), a measure of the machine's current speed"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        total = 0
+        for n in range(CALIBRATION_LOOPS):
+            total += n * n % 7
+        times.append((time.perf_counter() - started) * 1000)
+    return min(times)
+
+
+def bench_pipeline(stub_url, concurrency, jobs, execute=True, latency=0.05):
+    """Run jobs prompts through the headless pipeline with the given concurrency"""
+    client = GeminiClient(stub_url, pool_size=concurrency, backoff_base=BACKOFF_BASE, backoff_max=BACKOFF_MAX)
+    worker_pool = WorkerPool(FAKE_WORKER_COMMAND, size=min(concurrency, 4)) if execute else None
+    engine = GenerationEngine(api_url=stub_url, client=client, worker_pool=worker_pool)
+    runner = BatchRunner(engine, workers=concurrency)
+    prompts = [f"Benchmark bracket number {n}" for n in range(jobs)]
+
+    try:
+        if worker_pool:
+            worker_pool.warm_up()
+        with tempfile.TemporaryDirectory() as output_dir:
+            summary = runner.run(prompts, output_dir)
+            with open(os.path.join(output_dir, RESULTS_FILE), encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+    finally:
+        client.close()
+        if worker_pool:
+            worker_pool.close()
+
+    latencies = sorted(record['elapsed_seconds'] for record in records)
+    # Where the injected errors land is luck, and one retry costs another stub round trip plus
+    # the backoff; allow one retry's worth on top of the tolerances
+    retry_slack = latency * (1 + JITTER_SHARE) + BACKOFF_MAX
+    # The median moves with the stub's jitter alone; allow its full range
+    jitter_slack = 2 * latency * JITTER_SHARE
+    throughput = summary['total'] / summary['elapsed_seconds']
+    throughput_slack = throughput - summary['total'] / (summary['elapsed_seconds'] + retry_slack)
+    return {
+        f'pipeline_c{concurrency}_throughput': metric(throughput, 'jobs/s', 'higher', slack=throughput_slack),
+        f'pipeline_c{concurrency}_p50': metric(percentile(latencies, 0.50), 's', 'lower', slack=jitter_slack),
+        f'pipeline_c{concurrency}_p95': metric(percentile(latencies, 0.95), 's', 'lower', TAIL_TOLERANCE,
+                                                    retry_slack),
+        f'pipeline_c{concurrency}_p99': metric(percentile(latencies, 0.99), 's', 'lower', NOISY_TOLERANCE,
+                                                    retry_slack),
+        # Failures usually have a zero baseline; one flaky job is not a regression
+        f'pipeline_c{concurrency}_failures': metric(summary['failed'], 'jobs', 'lower', slack=1),
+    }
+
+
+def _best_seconds(function, passes):
+    # Returns (seconds, calibration_ms) of the pass that was fastest relative to the machine's
+    # speed at the time; the speed drifts within seconds, so each pass is calibrated on its own
+    timings = []
+    for scripts in passes:
+        calibration = calibrate()
+        started = time.perf_counter()
+        for script in scripts:
+            function(script)
+        timings.append((time.perf_counter() - started, calibration))
+    return min(timings, key=lambda timing: timing[0] / timing[1])
+
+
+def bench_validator(count, repeat=3):
+    """Scripts per second through the AST analyzer, best of repeat passes.
+
+    The legacy regex screen in gencad_validator is not in the pipeline any more and is not gated
+    here; benchmarks/bench_validator.py still measures it on its own.
+    """
+    # Distinct scripts in every pass, so the analyzer's result cache never answers
+    passes = [[make_script(1 + n % 10) + f"# variant {n}.{r}\n" for n in range(count)] for r in range(repeat)]
+    analyzer_seconds, analyzer_calibration = _best_seconds(analyze_script, passes)
+
+    return {
+        'analyzer_throughput': metric(count / analyzer_seconds, 'scripts/s', 'higher',
+                                      calibration_ms=analyzer_calibration),
+    }
+
+
+def _median_run_ms(command, repeat, calibrations):
+    times = []
+    for _ in range(repeat):
+        calibrations.append(calibrate())
+        started = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def bench_cold_start(repeat):
+    """Process start-up costs, net of the bare interpreter start"""
+    calibrations = []
+    interpreter = _median_run_ms([sys.executable, "-c", "pass"], repeat, calibrations)
+    engine_import = _median_run_ms([sys.executable, "-c", "import gencad_engine"], repeat, calibrations) - interpreter
+    cli_help = _median_run_ms([sys.executable, "gencad_cli.py", "--help"], repeat, calibrations) - interpreter
+    process_calibration = statistics.median(calibrations)
+
+    worker_times, calibrations = [], []
+    for _ in range(repeat):
+        calibrations.append(calibrate())
+        pool = WorkerPool(FAKE_WORKER_COMMAND, size=1)
+        started = time.perf_counter()
+        pool.warm_up()
+        worker_times.append((time.perf_counter() - started) * 1000)
+        pool.close()
+
+    return {
+        'engine_import_ms': metric(max(0.0, engine_import), 'ms', 'lower', NOISY_TOLERANCE,
+                                   calibration_ms=process_calibration),
+        'cli_startup_ms': metric(max(0.0, cli_help), 'ms', 'lower', NOISY_TOLERANCE,
+                                 calibration_ms=process_calibration),
+        'worker_ready_ms': metric(statistics.median(worker_times), 'ms', 'lower', NOISY_TOLERANCE,
+                                  calibration_ms=statistics.median(calibrations)),
+    }
+
+
+def run_suite(concurrency=DEFAULT_CONCURRENCY, jobs=48, latency=0.05, error_rate=0.05, parts=5,
+              validator_scripts=2000, cold_start_repeat=5, execute=True, report=print):
+    """Run every benchmark and return the results document"""
+    results = {}
+    stub = StubGemini(latency=latency, jitter=latency * JITTER_SHARE, error_rate=error_rate, parts=parts).start()
+    try:
+        for level in concurrency:
+            report(f"pipeline: concurrency {level}, {jobs} jobs...")
+            results.update(bench_pipeline(stub.url, level, jobs, execute, latency))
+    finally:
+        stub.stop()
+    report(f"validator: {validator_scripts} scripts...")
+    results.update(bench_validator(validator_scripts))
+    report("cold start...")
+    results.update(bench_cold_start(cold_start_repeat))
+
+    return {
+        'metrics': results,
+        'config': {
+            'concurrency': list(concurrency), 'jobs': jobs, 'latency': latency, 'error_rate': error_rate,
+            'parts': parts, 'validator_scripts': validator_scripts, 'execute': execute
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")
+        }
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return a description of every metric that is worse than baseline by more than its tolerance"""
+    regressions = []
+    for name, base in baseline.get('metrics', {}).items():
+        current = results['metrics'].get(name)
+        if current is None:
+            continue
+        value, reference = current['value'], base['value']
+        if current.get('calibration_ms') and base.get('calibration_ms'):
+            # Above 1 when the machine ran slower than when the baseline was recorded
+            slowdown = current['calibration_ms'] / base['calibration_ms']
+            reference = round(reference / slowdown if base['better'] == 'higher' else reference * slowdown, 4)
+        allowed = max(tolerance, current.get('tolerance', 0))
+        if base['better'] == 'higher':
+            worse = value + current.get('slack', 0) < reference * (1 - min(allowed, 0.9))
+        else:
+            worse = value > reference * (1 + allowed) + current.get('slack', 0)
+        if worse:
+            regressions.append(f"{name}: {value} {current['unit']} vs baseline {reference} ({base['better']} is better)")
+    return regressions
+
+
+def main(argv=None):
+    """Benchmark entry point"""
+    parser = argparse.ArgumentParser(description="GenCAD AI end-to-end benchmark suite")
+    parser.add_argument("--quick", action="store_true", help="Fewer jobs and repeats, for a fast smoke run")
+    parser.add_argument("--concurrency", default=",".join(map(str, DEFAULT_CONCURRENCY)),
+                        help="Comma-separated concurrency levels (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=None, help="Prompts per concurrency level (default: 48, quick: 12)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub Gemini latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.05, help="Fraction of stub requests that fail with 429/503")
+    parser.add_argument("--parts", type=int, default=5, help="Geometry blocks per stub script (response size)")
+    parser.add_argument("--no-execute", action="store_true", help="Skip the headless FreeCAD stage")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", default=None,
+                        help="Baseline results to compare against (default: benchmarks/baseline.json, "
+                             "or baseline_quick.json with --quick)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed fractional regression")
+    parser.add_argument("--update-baseline", action="store_true", help="Save these results as the new baseline")
+    args = parser.parse_args(argv)
+    if args.baseline is None:
+        args.baseline = QUICK_BASELINE_FILE if args.quick else BASELINE_FILE
+
+    results = run_suite(
+        concurrency=[int(level) for level in args.concurrency.split(',') if level.strip()],
+        jobs=args.jobs or (12 if args.quick else 48),
+        latency=args.latency,
+        error_rate=args.error_rate,
+        parts=args.parts,
+        validator_scripts=500 if args.quick else 2000,
+        cold_start_repeat=3 if args.quick else 5,
+        execute=not args.no_execute,
+        report=lambda message: print(message, file=sys.stderr)
+    )
+
+    for name, entry in results['metrics'].items():
+        print(f"{name:<34} {entry['value']:>12.4f} {entry['unit']}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('config') != results['config']:
+        print(f"Note: {args.baseline} was recorded with different settings; expect noisy comparisons")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
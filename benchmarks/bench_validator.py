@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Validator micro-benchmark
+Compares the precompiled legacy regex validator with the original per-call re.search loop
+on typical, large and batched scripts. The pipeline itself uses gencad_analyzer; see bench_suite.py.
+
+Usage: python3 benchmarks/bench_validator.py [--batch 10000] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gencad_validator import (DANGEROUS_PATTERNS, FREECAD_PATTERNS, REQUIRED_IMPORTS,
+                              NEW_DOCUMENT_PATTERN, validate_freecad_script)
+
+SCRIPT_HEADER = '''import FreeCAD
+import Part
+
+doc = FreeCAD.newDocument("Model")
+'''
+
+SCRIPT_BODY = '''
+# Base plate with a mounting hole
+base = Part.makeBox(60, 40, 5)
+hole = Part.makeCylinder(3, 10, FreeCAD.Vector(10, 10, -1))
+base = base.cut(hole)
+obj = doc.addObject("Part::Feature", "Bracket{n}")
+obj.Shape = base
+'''
+
+SCRIPT_FOOTER = '''
+doc.recompute()
+FreeCAD.Gui.ActiveDocument.ActiveView.fitAll()
+'''
+
+
+def legacy_validate(script):
+    """The original validator: one uncompiled re.search per pattern, stopping at the first failure"""
+    if not script or not script.strip():
+        return False, "Script is empty or contains only whitespace"
+    for pattern in REQUIRED_IMPORTS:
+        if not re.search(pattern, script, re.IGNORECASE):
+            return False, f"Missing required import matching pattern: {pattern}"
+    if not re.search(NEW_DOCUMENT_PATTERN, script, re.IGNORECASE):
+        return False, "missing FreeCAD.newDocument()"
+    if not any(re.search(p, script, re.IGNORECASE) for p in FREECAD_PATTERNS):
+        return False, "Script does not contain recognizable FreeCAD operations"
+    for pattern in DANGEROUS_PATTERNS:
+        if re.search(pattern, script, re.IGNORECASE):
+            return False, f"Script contains potentially dangerous operation: {pattern}"
+    return True, "Script validation passed"
+
+
+def make_script(parts):
+    """Build a valid script with the given number of repeated geometry blocks"""
+    return SCRIPT_HEADER + "".join(SCRIPT_BODY.format(n=n) for n in range(parts)) + SCRIPT_FOOTER
+
+
+def time_per_call(function, scripts, repeat):
+    """Best-of-three average seconds per call over the scripts"""
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            for script in scripts:
+                function(script)
+        elapsed = (time.perf_counter() - started) / (repeat * len(scripts))
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run(batch_size):
+    """Run every case and return the results"""
+    typical = make_script(5)
+    large = make_script(1000)
+    batch = [make_script(1 + n % 10).replace("Bracket", f"Part{n}_") for n in range(batch_size)]
+
+    cases = [
+        ("typical script (%d bytes)" % len(typical), [typical], 2000),
+        ("large script (%d bytes)" % len(large), [large], 5),
+        ("batch of %d scripts" % batch_size, batch, 1),
+    ]
+
+    results = []
+    for name, scripts, repeat in cases:
+        legacy = time_per_call(legacy_validate, scripts, repeat)
+        compiled = time_per_call(validate_freecad_script, scripts, repeat)
+        results.append({
+            'case': name,
+            'legacy_us': round(legacy * 1e6, 2),
+            'compiled_us': round(compiled * 1e6, 2),
+            'speedup': round(legacy / compiled, 1)
+        })
+    return results
+
+
+def main(argv=None):
+    """Benchmark entry point"""
+    parser = argparse.ArgumentParser(description="Validator micro-benchmark")
+    parser.add_argument("--batch", type=int, default=10000, help="Number of scripts in the batch case")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = run(args.batch)
+    for result in results:
+        print(f"{result['case']:<34} legacy {result['legacy_us']:>10.1f} us/script   "
+              f"compiled {result['compiled_us']:>9.1f} us/script   {result['speedup']:>5.1f}x")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Minimal stand-in for the FreeCAD module, used by tests and benchmarks when FreeCAD is not installed.
+Only the document API that generated scripts and gencad_worker.py touch is implemented.
+"""
+
+import os
+import time
+
+GuiUp = 0
+ActiveDocument = None
+_documents = {}
+
+# Simulated per-job work, in seconds
+RECOMPUTE_DELAY = float(os.environ.get("FAKE_FREECAD_RECOMPUTE_DELAY", "0"))
+
+
+def Version():
+    return ['0', '21', '2', 'fake']
+
+
+class Vector:
+    def __init__(self, x=0, y=0, z=0):
+        self.x, self.y, self.z = x, y, z
+
+
+class Placement:
+    def __init__(self, base=None, rotation=None):
+        self.Base = base or Vector()
+        self.Rotation = rotation
+
+
+class Rotation:
+    def __init__(self, *args):
+        self.args = args
+
+
+class DocumentObject:
+    def __init__(self, type_name, name):
+        self.TypeId = type_name
+        self.Name = name
+        self.Label = name
+        self.Shape = None
+        self.Placement = Placement()
+        self.InList = []
+
+    def isDerivedFrom(self, type_name):
+        return self.TypeId == type_name or (type_name == 'Part::Feature' and self.TypeId.startswith('Part::'))
+
+
+class Document:
+    def __init__(self, name):
+        self.Name = name
+        self.Objects = []
+
+    def addObject(self, type_name, name=None):
+        obj = DocumentObject(type_name, name or type_name.split('::')[-1])
+        self.Objects.append(obj)
+        return obj
+
+    def recompute(self):
+        if RECOMPUTE_DELAY:
+            time.sleep(RECOMPUTE_DELAY)
+        return len(self.Objects)
+
+    def saveAs(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"fake FCStd document {self.Name} with {len(self.Objects)} objects\n")
+
+    def getObject(self, name):
+        for obj in self.Objects:
+            if obj.Name == name:
+                return obj
+        return None
+
+
+def newDocument(name="Unnamed"):
+    global ActiveDocument
+    unique = name
+    counter = 0
+    while unique in _documents:
+        counter += 1
+        unique = f"{name}{counter:03d}"
+    ActiveDocument = _documents[unique] = Document(unique)
+    return ActiveDocument
+
+
+def listDocuments():
+    return dict(_documents)
+
+
+def getDocument(name):
+    return _documents[name]
+
+
+def setActiveDocument(name):
+    global ActiveDocument
+    ActiveDocument = _documents[name]
+
+
+def closeDocument(name):
+    global ActiveDocument
+    document = _documents.pop(name)
+    if ActiveDocument is document:
+        ActiveDocument = None
@@ -0,0 +1,27 @@
+"""
+Minimal stand-in for FreeCAD's MeshPart module, used by tests and benchmarks when FreeCAD is not installed.
+"""
+
+import os
+import time
+
+# Simulated tessellation time, in seconds
+MESH_DELAY = float(os.environ.get("FAKE_FREECAD_MESH_DELAY", "0"))
+
+
+class Mesh:
+    def __init__(self, shape, deflection):
+        self.shape = shape
+        self.deflection = deflection
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"solid {self.shape.kind}\n")
+            f.write(f"  // fake tessellation, linear deflection {self.deflection:g}\n")
+            f.write(f"endsolid {self.shape.kind}\n")
+
+
+def meshFromShape(Shape=None, LinearDeflection=0.1, AngularDeflection=0.5, Relative=False):
+    if MESH_DELAY:
+        time.sleep(MESH_DELAY)
+    return Mesh(Shape, LinearDeflection)
@@ -0,0 +1,53 @@
+"""
+Minimal stand-in for FreeCAD's Part module, used by tests and benchmarks when FreeCAD is not installed.
+"""
+
+
+class Shape:
+    def __init__(self, kind, *args):
+        self.kind = kind
+        self.args = args
+
+    def cut(self, other):
+        return Shape('cut', self, other)
+
+    def fuse(self, other):
+        return Shape('fuse', self, other)
+
+    def common(self, other):
+        return Shape('common', self, other)
+
+    def extrude(self, vector):
+        return Shape('extrusion', self, vector)
+
+    def copy(self):
+        return Shape(self.kind, *self.args)
+
+    def translate(self, vector):
+        return self
+
+    def rotate(self, *args):
+        return self
+
+    def isNull(self):
+        return False
+
+    def exportStep(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"ISO-10303-21;\n/* fake {self.kind} */\nEND-ISO-10303-21;\n")
+
+
+def _maker(kind):
+    def make(*args, **kwargs):
+        return Shape(kind, *args)
+    return make
+
+
+makeBox = _maker('box')
+makeCylinder = _maker('cylinder')
+makeSphere = _maker('sphere')
+makeCone = _maker('cone')
+makeTorus = _maker('torus')
+makePolygon = _maker('polygon')
+makeCompound = _maker('compound')
+Face = _maker('face')
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Fake freecadcmd executable for tests and benchmarks.
+
+Runs a Python script with the fake FreeCAD and Part modules importable, like
+'freecadcmd script.py' would with the real ones; like freecadcmd, it runs the script under its
+module name rather than as __main__. '--version' prints a FreeCAD-style banner.
+Environment: FAKE_FREECAD_STARTUP_DELAY simulates FreeCAD's cold start (seconds).
+"""
+
+import os
+import runpy
+import sys
+import time
+
+FAKES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main(argv):
+    time.sleep(float(os.environ.get("FAKE_FREECAD_STARTUP_DELAY", "0")))
+    if not argv or argv[0] in ("--version", "-v"):
+        print("FreeCAD 0.21.2 fake")
+        return 0
+
+    sys.path.insert(0, FAKES_DIR)
+    sys.argv = argv
+    runpy.run_path(argv[0], run_name=os.path.splitext(os.path.basename(argv[0]))[0])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Gemini generateContent endpoint, for benchmarks and offline tests.
+
+Every request sleeps for a configurable latency, fails with a configurable probability
+(503, or 429 with Retry-After: 0), and answers with a valid FreeCAD script of a configurable
+size plus usageMetadata. streamGenerateContent is served as chunked server-sent events.
+
+Usage: python3 benchmarks/stub_gemini.py [--port 8765] [--latency 0.2] [--error-rate 0.05] [--parts 5]
+Then point GEMINI_API_URL at the printed URL.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_validator import make_script
+
+STREAM_CHUNKS = 8
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    """Serves generateContent and streamGenerateContent from the server's settings"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+    # Headers and body go out in separate writes; without TCP_NODELAY, Nagle's algorithm and
+    # delayed ACKs add ~40 ms to every response on a reused connection
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        stub = self.server.stub
+        time.sleep(stub.next_latency())
+
+        status = stub.next_status()
+        if status != 200:
+            body = json.dumps({'error': {'code': status, 'message': 'stub error'}}).encode('utf-8')
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', '0')
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if ':streamGenerateContent' in self.path:
+            return self.stream(stub)
+        body = json.dumps(stub.response()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream(self, stub):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        text = stub.script_text()
+        size = max(1, len(text) // STREAM_CHUNKS + 1)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        try:
+            for n, piece in enumerate(pieces):
+                event = {'candidates': [{'content': {'parts': [{'text': piece}]}}]}
+                if n == len(pieces) - 1:
+                    event['usageMetadata'] = stub.usage(text)
+                data = f"data: {json.dumps(event)}\r\n\r\n".encode('utf-8')
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+                time.sleep(stub.chunk_delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGeminiServer(ThreadingHTTPServer):
+    # The default listen backlog of 5 drops connections from 16 concurrent clients, and each
+    # dropped SYN costs a one-second retransmit that ends up in the measured tail latency
+    request_queue_size = 128
+
+
+class StubGemini:
+    """A stub Gemini server on a background thread"""
+
+    def __init__(self, latency=0.05, jitter=0.0, error_rate=0.0, rate_limit_share=0.5, parts=5,
+                 chunk_delay=0.0, port=0, seed=1234):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_share = rate_limit_share  # fraction of errors that are 429 rather than 503
+        self.parts = parts
+        self.chunk_delay = chunk_delay
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = StubGeminiServer(('127.0.0.1', port), StubGeminiHandler)
+        self.server.daemon_threads = True
+        self.server.stub = self
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1beta/models/stub:generateContent?key=stub"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def next_latency(self):
+        with self._lock:
+            return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def next_status(self):
+        with self._lock:
+            self.requests += 1
+            if self._random.random() >= self.error_rate:
+                return 200
+            self.errors += 1
+            return 429 if self._random.random() < self.rate_limit_share else 503
+
+    def script_text(self):
+        return "```python\n" + make_script(self.parts) + "```\n"
+
+    @staticmethod
+    def usage(text):
+        # Roughly four characters per token, like Gemini's tokenizer on code
+        return {'promptTokenCount': 350, 'candidatesTokenCount': len(text) // 4,
+                'totalTokenCount': 350 + len(text) // 4}
+
+    def response(self):
+        text = self.script_text()
+        return {'candidates': [{'content': {'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+                'usageMetadata': self.usage(text)}
+
+
+def main(argv=None):
+    """Run the stub in the foreground"""
+    parser = argparse.ArgumentParser(description="Local Gemini generateContent stub")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before each response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random +/- seconds added to the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/503")
+    parser.add_argument("--parts", type=int, default=5, help="Geometry blocks per generated script (response size)")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks")
+    args = parser.parse_args(argv)
+
+    stub = StubGemini(args.latency, args.jitter, args.error_rate, parts=args.parts,
+                      chunk_delay=args.chunk_delay, port=args.port)
+    print(f"GEMINI_API_URL={stub.url}", flush=True)
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
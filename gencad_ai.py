@@ -4,31 +4,42 @@ GenCAD AI - Linux Desktop 3D Model Generator
 A standalone desktop application that generates FreeCAD 3D models from text prompts using Google Gemini AI.
 """
 
+import time
+STARTED = time.perf_counter()  # before the imports below, for --startup-report
+
 import tkinter as tk
-from tkinter import scrolledtext, messagebox, PhotoImage
-import requests
-import subprocess
+from tkinter import scrolledtext
 import os
-import json
-import tempfile
 import sys
 import threading
-import re
 import atexit
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from gencad_backends import default_backends
+from gencad_cache import ResponseCache
+from gencad_engine import DEFAULT_REPAIR_ATTEMPTS, GenerationEngine
+from gencad_jobs import DONE, JobQueue
+from gencad_log import Journal, StatusLog
+from gencad_startup import WINDOW_TARGET_MS, StartupTimer
+from gencad_status import StatusPump, StatusQueue
+from gencad_templates import TemplateStore
+from gencad_workspace import Workspace
 
-# Constants
-GEMINI_API_KEY =   # Updated API key
-GEMINI_API_URL = 
-FREECAD_COMMAND = "freecad"  # Assumes 'freecad' is in PATH
+WINDOW_WIDTH = 900
+WINDOW_HEIGHT = 700
+JOB_LIST_REFRESH_MS = 500  # redraw of elapsed times while jobs are unfinished
+HISTORY_SEARCH_DELAY_MS = 200  # pause in typing before the history is searched
+HISTORY_LIMIT = 200
 
 class GenCADApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, timer=None, server_url=None):
+        self.timer = timer or StartupTimer(STARTED)
+        self.timer.mark("imports done")
         super().__init__()
+        self.timer.mark("Tk created")
         
         # Window configuration
         self.title("GenCAD AI")
-        self.geometry("900x700")
         self.configure(bg="#FFFFFF")
         self.resizable(True, True)
         
@@ -46,8 +57,43 @@ class GenCADApp(tk.Tk):
             'button_active': '#333333'
         }
         
+        # Worker threads never touch widgets: they push events here and the main loop drains them
+        self.status_queue = StatusQueue()
+        
+        # The panel keeps the last lines only; the full history goes to a rotating journal
+        self.status_log = StatusLog(journal=Journal())
+        atexit.register(self.status_log.journal.close)
+        
+        # Headless generation engine; this window is only a client of it.
+        # Construction is cheap: the HTTP session and requests are created on first use.
+        self.engine = GenerationEngine(
+            status_callback=self.update_status,
+            stream=True,
+            token_callback=self.append_status_text,
+            repair_attempts=DEFAULT_REPAIR_ATTEMPTS,
+            backends=default_backends()
+        )
+        
+        # Prompts queue here and run on a small worker pool; each job has its own deadline.
+        # With a server URL they run on a shared gencad_server.py and only the launch is local.
+        if server_url:
+            from gencad_remote import RemoteJobQueue, ServiceClient
+            self.job_queue = RemoteJobQueue(ServiceClient(server_url), self.engine, on_change=self._on_job_change)
+        else:
+            self.job_queue = JobQueue(self.engine, on_change=self._on_job_change)
+        self._listed_job_ids = []
+        self._job_refresh_id = None
+        # Submit, cancel and bump may be HTTP requests to the service; they run here, in order,
+        # so a slow or unreachable service never blocks the main loop
+        self.queue_requests = ThreadPoolExecutor(max_workers=1)
+        
         # Initialize UI
         self.setup_ui()
+        self.timer.mark("UI built")
+        
+        # Apply queued status messages in one widget update per tick
+        self.status_pump = StatusPump(self, self.status_queue, self._apply_status_batch)
+        self.status_pump.start()
         
         # Center the window
         self.center_window()
@@ -55,14 +101,46 @@ class GenCADApp(tk.Tk):
         # Set minimum window size
         self.minsize(600, 500)
         
+        # Everything not needed for the first frame waits until the window has painted
+        self.bind("<Map>", self._on_first_map)
+        
+    def _on_first_map(self, event):
+        if event.widget is not self:
+            return
+        self.unbind("<Map>")
+        self.timer.mark("window mapped")
+        # after_idle runs once pending redraws are done; after(0) then yields one more loop turn
+        self.after_idle(lambda: self.after(0, self._finish_startup))
+        
+    def _finish_startup(self):
+        """Deferred initialization that must not delay the first paint"""
+        self.timer.mark("first paint")
+        self.engine.cache = ResponseCache()
+        self.engine.templates = TemplateStore()
+        
+        # Every job is recorded in SQLite by a background writer; see the History window.
+        # Imported here so sqlite3 stays off the path to the first paint.
+        from gencad_history import History
+        self.engine.history = History()
+        atexit.register(self.engine.history.close)
+        
+        # Scripts are stored once per content hash; the collector runs now and again at exit
+        self.engine.workspace = Workspace()
+        threading.Thread(target=self.engine.workspace.collect_garbage, daemon=True).start()
+        atexit.register(self.engine.workspace.collect_garbage)
+        
+        # Find FreeCAD and import requests while the user types, so the first job does not wait
+        self.engine.freecad.resolve_in_background()
+        threading.Thread(target=self.engine.client.warm_up, daemon=True).start()
+        self.timer.mark("deferred init started")
+        self.event_generate("<<StartupFinished>>")
+        
     def center_window(self):
         """Center the window on the screen"""
-        self.update_idletasks()
-        width = self.winfo_width()
-        height = self.winfo_height()
-        x = (self.winfo_screenwidth() // 2) - (width // 2)
-        y = (self.winfo_screenheight() // 2) - (height // 2)
-        self.geometry(f"{width}x{height}+{x}+{y}")
+        # Uses the known window size, so no update_idletasks() layout pass is forced before the first paint
+        x = (self.winfo_screenwidth() // 2) - (WINDOW_WIDTH // 2)
+        y = (self.winfo_screenheight() // 2) - (WINDOW_HEIGHT // 2)
+        self.geometry(f"{WINDOW_WIDTH}x{WINDOW_HEIGHT}+{x}+{y}")
         
     def setup_ui(self):
         """Setup the enhanced user interface"""
@@ -165,24 +243,103 @@ class GenCADApp(tk.Tk):
         )
         self.generate_button.pack(side=tk.LEFT)
         
+        # Optional: plan multi-part prompts and generate the parts in parallel
+        self.assembly_var = tk.BooleanVar(value=False)
+        assembly_check = tk.Checkbutton(
+            button_frame,
+            text="Split assemblies into parts",
+            variable=self.assembly_var,
+            font=("Arial", 10),
+            bg=self.colors['bg_primary'],
+            fg=self.colors['fg_primary'],
+            activebackground=self.colors['bg_primary'],
+            selectcolor=self.colors['bg_primary'],
+            highlightthickness=0
+        )
+        assembly_check.pack(side=tk.LEFT, padx=(15, 0))
+        
         # Add hover effects
         self.generate_button.bind("<Enter>", self.on_button_enter)
         self.generate_button.bind("<Leave>", self.on_button_leave)
         
+        # Job list: one line per job with its state and elapsed time
+        jobs_section = tk.Frame(main_container, bg=self.colors['bg_primary'])
+        jobs_section.pack(fill=tk.X, pady=(0, 15))
+        
+        jobs_header = tk.Frame(jobs_section, bg=self.colors['bg_primary'])
+        jobs_header.pack(fill=tk.X, pady=(0, 5))
+        
+        jobs_label = tk.Label(
+            jobs_header,
+            text="Jobs:",
+            font=("Arial", 13, "bold"),
+            bg=self.colors['bg_primary'],
+            fg=self.colors['fg_primary'],
+            anchor='w'
+        )
+        jobs_label.pack(side=tk.LEFT)
+        
+        for text, command in (("Cancel", self.cancel_selected_job), ("Run Next", self.bump_selected_job),
+                              ("History", self.open_history)):
+            tk.Button(
+                jobs_header,
+                text=text,
+                font=("Arial", 10),
+                bg=self.colors['bg_secondary'],
+                fg=self.colors['fg_primary'],
+                relief=tk.FLAT,
+                bd=0,
+                padx=10,
+                pady=2,
+                cursor="hand2",
+                command=command
+            ).pack(side=tk.RIGHT, padx=(5, 0))
+        
+        self.job_list = tk.Listbox(
+            jobs_section,
+            height=4,
+            font=("Courier New", 10),
+            bg=self.colors['bg_secondary'],
+            fg=self.colors['fg_primary'],
+            relief=tk.SOLID,
+            bd=1,
+            highlightthickness=0,
+            selectbackground="#0078D4",
+            activestyle=tk.NONE
+        )
+        self.job_list.pack(fill=tk.X)
+        
         # Status section
         status_section = tk.Frame(main_container, bg=self.colors['bg_primary'])
         status_section.pack(fill=tk.BOTH, expand=True)
         
-        # Status label
+        # Status header: label on the left, level filter on the right
+        status_header = tk.Frame(status_section, bg=self.colors['bg_primary'])
+        status_header.pack(fill=tk.X, pady=(0, 8))
+        
         status_label = tk.Label(
-            status_section,
+            status_header,
             text="Status & Output:",
             font=("Arial", 13, "bold"),
             bg=self.colors['bg_primary'],
             fg=self.colors['fg_primary'],
             anchor='w'
         )
-        status_label.pack(fill=tk.X, pady=(0, 8))
+        status_label.pack(side=tk.LEFT)
+        
+        # Level filter; "All" includes the streamed model output
+        self.level_choices = {"All": "DEBUG", "Info": "INFO", "Warnings": "WARNING", "Errors": "ERROR"}
+        self.level_var = tk.StringVar(value="All")
+        level_menu = tk.OptionMenu(status_header, self.level_var, *self.level_choices,
+                                   command=self.on_level_change)
+        level_menu.configure(
+            font=("Arial", 10),
+            bg=self.colors['bg_primary'],
+            fg=self.colors['fg_primary'],
+            relief=tk.FLAT,
+            highlightthickness=0
+        )
+        level_menu.pack(side=tk.RIGHT)
         
         # Status text frame with border
         status_frame = tk.Frame(
@@ -228,322 +385,242 @@ class GenCADApp(tk.Tk):
             self.example_cleared = True
             
     def update_status(self, message):
-        """Update the status text area with a timestamped message"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}\n"
-        
+        """Queue a timestamped status message; safe to call from any thread"""
+        self.status_queue.status(message)
+        
+    def append_status_text(self, text):
+        """Queue streamed text for the status area; safe to call from any thread"""
+        self.status_queue.tokens(text)
+        
+    def _apply_status_batch(self, events):
+        """Record a drained batch and append what passes the filter (main thread only)"""
+        text = self.status_log.add(events)
+        if not text:
+            return
         self.status_text.config(state=tk.NORMAL)
-        self.status_text.insert(tk.END, formatted_message)
+        self.status_text.insert(tk.END, text)
+        # Trim from the top so the widget never holds more than the log keeps
+        lines = int(self.status_text.index("end-1c").split(".")[0])
+        if lines > self.status_log.max_lines:
+            self.status_text.delete("1.0", f"{lines - self.status_log.max_lines + 1}.0")
         self.status_text.config(state=tk.DISABLED)
         self.status_text.see(tk.END)
-        self.update_idletasks()
         
-    def validate_freecad_script(self, script):
-        """Enhanced validation for FreeCAD Python scripts with stronger checks"""
-        if not script or not script.strip():
-            return False, "Script is empty or contains only whitespace"
-            
-        # Check for essential FreeCAD imports - more specific validation
-        required_imports = [
-            r'import\s+FreeCAD',
-            r'import\s+Part'
-        ]
-        
-        for pattern in required_imports:
-            if not re.search(pattern, script, re.IGNORECASE):
-                return False, f"Missing required import matching pattern: {pattern}"
-        
-        # Check for document creation - this is a stronger validation
-        if not re.search(r'FreeCAD\.newDocument\(\)', script, re.IGNORECASE):
-            return False, "Script does not appear to be a valid FreeCAD Python script (missing FreeCAD.newDocument()). Possible hallucination or invalid response."
-        
-        # Check for basic FreeCAD operations
-        freecad_patterns = [
-            r'FreeCAD\.',
-            r'Part\.',
-            r'\.addObject\(',
-            r'\.recompute\('
-        ]
-        
-        pattern_found = False
-        for pattern in freecad_patterns:
-            if re.search(pattern, script, re.IGNORECASE):
-                pattern_found = True
-                break
-                
-        if not pattern_found:
-            return False, "Script does not contain recognizable FreeCAD operations"
-            
-        # Check for potentially dangerous operations (enhanced security)
-        dangerous_patterns = [
-            r'import\s+os(?!\w)',
-            r'import\s+subprocess',
-            r'import\s+sys(?!\w)',
-            r'import\s+shutil',
-            r'import\s+urllib',
-            r'import\s+socket',
-            r'import\s+requests',
-            r'\bos\.',
-            r'\bsubprocess\.',
-            r'\bsys\.',
-            r'\bshutil\.',
-            r'\burllib\.',
-            r'\bsocket\.',
-            r'\brequests\.',
-            r'exec\s*\(',
-            r'eval\s*\(',
-            r'__import__',
-            r'open\s*\(',
-            r'file\s*\(',
-            r'input\s*\(',
-            r'raw_input\s*\(',
-            r'compile\s*\(',
-            r'globals\s*\(',
-            r'locals\s*\(',
-            r'setattr\s*\(',
-            r'getattr\s*\(',
-            r'delattr\s*\(',
-            r'hasattr\s*\('
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, script, re.IGNORECASE):
-                return False, f"Script contains potentially dangerous operation: {pattern}"
-                
-        return True, "Script validation passed"
+    def on_level_change(self, choice):
+        """Redraw the status area with the chosen level filter"""
+        text = self.status_log.set_level(self.level_choices[choice])
+        self.status_text.config(state=tk.NORMAL)
+        self.status_text.delete("1.0", tk.END)
+        self.status_text.insert(tk.END, text)
+        self.status_text.config(state=tk.DISABLED)
+        self.status_text.see(tk.END)
         
     def generate_cad_model(self):
-        """Generate CAD model from user prompt"""
-        # Disable the generate button to prevent multiple simultaneous requests
-        self.generate_button.config(state=tk.DISABLED)
-        
-        # Run the generation in a separate thread to keep UI responsive
-        thread = threading.Thread(target=self._generate_cad_model_thread)
-        thread.daemon = True
-        thread.start()
+        """Queue a CAD model job for the current prompt"""
+        # Get prompt text here: widgets may only be read on the main thread
+        prompt_text = self.prompt_text.get("1.0", tk.END).strip()
+        
+        if not prompt_text or prompt_text.startswith("Example:"):
+            self.update_status("Error: Please enter a valid model description.")
+            return
+        
+        # The button stays enabled: further prompts queue behind this one
+        self.queue_requests.submit(self._submit_job, prompt_text, {'assembly': self.assembly_var.get()})
+        
+    def _submit_job(self, prompt_text, options):
+        """Queue a job (on the request thread); a failed submission was already reported"""
+        job = self.job_queue.submit(prompt_text, options=options)
+        if job is not None:
+            self.update_status(f"Queued job #{job.id}.")
+        
+    def _selected_job_id(self):
+        selection = self.job_list.curselection()
+        if not selection or selection[0] >= len(self._listed_job_ids):
+            self.update_status("Select a job in the job list first.")
+            return None
+        return self._listed_job_ids[selection[0]]
         
-    def _generate_cad_model_thread(self):
-        """Thread function for CAD model generation"""
-        try:
-            # Get prompt text
-            prompt_text = self.prompt_text.get("1.0", tk.END).strip()
-            
-            if not prompt_text or prompt_text.startswith("Example:"):
-                self.update_status("Error: Please enter a valid model description.")
-                return
-                
-            self.update_status("Generating model... Please wait.")
-            self.update_status(f"Processing prompt: {prompt_text}")
+    def cancel_selected_job(self):
+        """Cancel the job selected in the job list"""
+        job_id = self._selected_job_id()
+        if job_id is not None:
+            self.queue_requests.submit(self._cancel_job, job_id)
             
-            # Construct Gemini payload
-            full_prompt = self._construct_freecad_prompt(prompt_text)
+    def _cancel_job(self, job_id):
+        if self.job_queue.cancel(job_id):
+            self.update_status(f"Cancelling job #{job_id}...")
             
-            payload = {
-                "contents": [
-                    {
-                        "role": "user",
-                        "parts": [{"text": full_prompt}]
-                    }
-                ],
-                "generationConfig": {
-                    "responseMimeType": "text/plain",
-                    "maxOutputTokens": 4096,
-                    "temperature": 0.3
-                }
-            }
+    def bump_selected_job(self):
+        """Move the selected queued job to the front of the queue"""
+        job_id = self._selected_job_id()
+        if job_id is not None:
+            self.queue_requests.submit(self._bump_job, job_id)
             
-            # Call Gemini API
-            self.update_status("Connecting to Gemini AI...")
+    def _bump_job(self, job_id):
+        if self.job_queue.bump(job_id):
+            self.update_status(f"Job #{job_id} will run next.")
             
-            try:
-                response = requests.post(GEMINI_API_URL, json=payload, timeout=60)
-                response.raise_for_status()
-                result = response.json()
-                
-                # Extract the generated script
-                generated_script = self._extract_script_from_response(result)
-                
-                if not generated_script:
-                    self.update_status("Error: Gemini API returned empty or invalid response.")
-                    return
-                    
-                self.update_status("AI response received. Validating script...")
-                
-                # Enhanced validation with stronger checks
-                is_valid, validation_message = self.validate_freecad_script(generated_script)
-                
-                if not is_valid:
-                    self.update_status(f"Error: Script validation failed - {validation_message}")
-                    self.update_status("Possible AI hallucination detected. Please try a different prompt.")
-                    return
-                    
-                self.update_status("Script validation passed. Creating temporary file...")
-                
-                # Save script to temporary file
-                script_path = self._save_script_to_temp_file(generated_script)
-                
-                if not script_path:
-                    return
-                    
-                # Execute FreeCAD
-                self._execute_freecad(script_path)
-                
-            except requests.exceptions.RequestException as e:
-                if hasattr(e, 'response') and e.response is not None:
-                    self.update_status(f"Error connecting to Gemini API: {e.response.status_code} {e.response.reason}")
-                    try:
-                        error_details = e.response.text
-                        if error_details:
-                            self.update_status(f"Gemini API Error Details: {error_details}")
-                    except:
-                        pass
-                else:
-                    self.update_status(f"Error connecting to Gemini API: {e}")
-                return
-            except ValueError as e:
-                self.update_status(f"Error parsing Gemini response: {e}")
-                return
-            except Exception as e:
-                self.update_status(f"An unexpected error occurred during API call: {e}")
-                return
-                
-        finally:
-            # Re-enable the generate button
-            self.generate_button.config(state=tk.NORMAL)
+    def open_history(self):
+        """Show the generation history window"""
+        if self.engine.history is None:
+            self.update_status("The history is still loading; try again in a moment.")
+            return
+        HistoryWindow(self)
             
-    def _construct_freecad_prompt(self, user_prompt):
-        """Construct the full prompt for Gemini AI"""
-        return f"""Generate a complete and valid Python script for FreeCAD to create a 3D model based on the following description.
+    def _on_job_change(self, job):
+        """Called on worker threads whenever a job changes state"""
+        if job.done:
+            self.update_status(f"Job #{job.id} {job.state} after {job.elapsed():.1f}s"
+                               + (f": {job.error}" if job.error and job.state != DONE else ""))
+            self.update_status(f"Session {self.engine.tracer.format_summary()}")
+        self.status_queue.call(self.refresh_job_list)
+        
+    def refresh_job_list(self):
+        """Redraw the job list, and keep redrawing while jobs are unfinished (main thread only)"""
+        if self._job_refresh_id is not None:
+            self.after_cancel(self._job_refresh_id)
+            self._job_refresh_id = None
+        jobs = self.job_queue.jobs()
+        selection = self.job_list.curselection()
+        selected_id = self._listed_job_ids[selection[0]] if selection and selection[0] < len(self._listed_job_ids) else None
+        
+        self.job_list.delete(0, tk.END)
+        for job in jobs:
+            self.job_list.insert(tk.END, job.describe())
+        self._listed_job_ids = [job.id for job in jobs]
+        if selected_id in self._listed_job_ids:
+            self.job_list.selection_set(self._listed_job_ids.index(selected_id))
+        if jobs:
+            self.job_list.see(tk.END if selected_id is None else self._listed_job_ids.index(selected_id))
+        
+        if any(not job.done for job in jobs):
+            self._job_refresh_id = self.after(JOB_LIST_REFRESH_MS, self.refresh_job_list)
 
-REQUIREMENTS:
-- The script must be self-contained and runnable within FreeCAD
-- Use only FreeCAD's built-in modules (FreeCAD, Part, Draft, etc.)
-- Do NOT import os, subprocess, sys, or any external libraries
-- Do NOT include user interaction, file saving, or file I/O operations
-- Create a new document at the start
-- Add all geometry to the document
-- End with FreeCAD.ActiveDocument.recompute() and FreeCAD.Gui.ActiveDocument.ActiveView.fitAll()
-- Use proper Python syntax and FreeCAD API calls
-- Create realistic dimensions if not specified
+class HistoryWindow(tk.Toplevel):
+    """Searchable list of past generations; any stored script reopens in FreeCAD without an API call"""
+    
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.history = app.engine.history
+        self.entries = []
+        self._search_id = None
+        colors = app.colors
+        self.title("GenCAD AI - History")
+        self.configure(bg=colors['bg_primary'])
+        self.geometry("820x420")
+        
+        search_frame = tk.Frame(self, bg=colors['bg_primary'])
+        search_frame.pack(fill=tk.X, padx=15, pady=(15, 8))
+        tk.Label(search_frame, text="Search prompts:", font=("Arial", 11, "bold"),
+                 bg=colors['bg_primary'], fg=colors['fg_primary']).pack(side=tk.LEFT)
+        self.query_var = tk.StringVar()
+        self.query_var.trace_add("write", lambda *args: self._schedule_search())
+        query_entry = tk.Entry(search_frame, textvariable=self.query_var, font=("Arial", 11),
+                               bg=colors['bg_input'], relief=tk.SOLID, bd=1)
+        query_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+        query_entry.focus_set()
+        
+        list_frame = tk.Frame(self, bg=colors['border'], relief=tk.SOLID, bd=1)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=15)
+        scrollbar = tk.Scrollbar(list_frame)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.entry_list = tk.Listbox(list_frame, font=("Courier New", 10), bg=colors['bg_secondary'],
+                                     fg=colors['fg_primary'], relief=tk.FLAT, highlightthickness=0,
+                                     selectbackground="#0078D4", activestyle=tk.NONE,
+                                     yscrollcommand=scrollbar.set)
+        self.entry_list.pack(fill=tk.BOTH, expand=True)
+        scrollbar.config(command=self.entry_list.yview)
+        self.entry_list.bind("<Double-Button-1>", lambda event: self.open_selected())
+        
+        button_frame = tk.Frame(self, bg=colors['bg_primary'])
+        button_frame.pack(fill=tk.X, padx=15, pady=(8, 15))
+        for text, command in (("Open in FreeCAD", self.open_selected), ("Use Prompt", self.use_selected_prompt)):
+            tk.Button(button_frame, text=text, font=("Arial", 10), bg=colors['button_bg'], fg=colors['button_fg'],
+                      activebackground=colors['button_active'], activeforeground=colors['button_fg'],
+                      relief=tk.FLAT, bd=0, padx=12, pady=4, cursor="hand2",
+                      command=command).pack(side=tk.LEFT, padx=(0, 8))
+        
+        self.search()
+        
+    def _schedule_search(self):
+        """Search once typing pauses rather than on every keystroke"""
+        if self._search_id is not None:
+            self.after_cancel(self._search_id)
+        self._search_id = self.after(HISTORY_SEARCH_DELAY_MS, self.search)
+        
+    def search(self):
+        """Fill the list with the entries matching the search text (newest first)"""
+        import sqlite3
+        from gencad_history import describe
 
-EXAMPLE STRUCTURE:
-```python
-import FreeCAD
-import Part
-
-# Create new document
-doc = FreeCAD.newDocument("Model")
-
-# Create geometry using Part module
-# ... your geometry creation code here ...
-
-# Add objects to document
-doc.addObject("Part::Feature", "Model").Shape = your_shape
-
-# Finalize
-doc.recompute()
-FreeCAD.Gui.ActiveDocument.ActiveView.fitAll()
-```
-
-USER DESCRIPTION: {user_prompt}
-
-Generate only the Python script code, no explanations or markdown formatting:"""
-        
-    def _extract_script_from_response(self, result):
-        """Extract the generated script from Gemini API response"""
-        try:
-            if (result and 
-                result.get('candidates') and 
-                result['candidates'][0].get('content') and 
-                result['candidates'][0]['content'].get('parts')):
-                
-                generated_text = result['candidates'][0]['content']['parts'][0].get('text', '').strip()
-                
-                # Remove markdown code blocks if present
-                if '```python' in generated_text:
-                    # Extract code between ```python and ```
-                    start = generated_text.find('```python') + 9
-                    end = generated_text.find('```', start)
-                    if end != -1:
-                        generated_text = generated_text[start:end].strip()
-                elif '```' in generated_text:
-                    # Extract code between ``` and ```
-                    start = generated_text.find('```') + 3
-                    end = generated_text.find('```', start)
-                    if end != -1:
-                        generated_text = generated_text[start:end].strip()
-                        
-                return generated_text
-            else:
-                raise ValueError("Unexpected response structure from Gemini API")
-                
-        except Exception as e:
-            self.update_status(f"Error extracting script from API response: {e}")
-            return None
-            
-    def _save_script_to_temp_file(self, script):
-        """Save the generated script to a temporary file"""
+        self._search_id = None
         try:
-            with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.py', encoding='utf-8') as temp_file:
-                temp_file.write(script)
-                script_path = temp_file.name
-                
-            self.update_status(f"Script saved to: {script_path}")
-            return script_path
+            self.entries = self.history.search(self.query_var.get(), HISTORY_LIMIT)
+        except sqlite3.Error as e:
+            self.app.update_status(f"Error: History search failed - {e}")
+            self.entries = []
+        self.entry_list.delete(0, tk.END)
+        for entry in self.entries:
+            self.entry_list.insert(tk.END, describe(entry))
             
-        except IOError as e:
-            self.update_status(f"Error saving temporary script: {e}")
+    def _selected(self):
+        selection = self.entry_list.curselection()
+        if not selection or selection[0] >= len(self.entries):
+            self.app.update_status("Select an entry in the history first.")
             return None
-            
-    def _execute_freecad(self, script_path):
-        """Execute FreeCAD with the generated script"""
-        self.update_status("Opening FreeCAD with the generated model...")
-        
+        return self.entries[selection[0]]
+        
+    def open_selected(self):
+        """Reopen the selected entry's stored script in FreeCAD"""
+        entry = self._selected()
+        if entry is None:
+            return
+        script = self.history.script(entry.script_hash) if entry.script_hash else None
+        if script is None:
+            self.app.update_status(f"History entry #{entry.id} has no stored script ({entry.outcome}).")
+            return
+        self.app.update_status(f"Reopening history entry #{entry.id} (no API call needed)...")
+        # Saving and starting FreeCAD stay off the main loop, like a job's launch
+        threading.Thread(target=self._reopen, args=(script,), daemon=True).start()
+        
+    def _reopen(self, script):
+        engine = self.app.engine
         try:
-            # Check if FreeCAD is available
-            subprocess.run([FREECAD_COMMAND, "--version"], 
-                         capture_output=True, timeout=10, check=True)
-            
-            # Launch FreeCAD with the script
-            subprocess.Popen([FREECAD_COMMAND, script_path])
-            
-            self.update_status("FreeCAD launched successfully!")
-            self.update_status("Check the FreeCAD window for your generated 3D model.")
-            
-            # Schedule cleanup of temporary file after delay
-            self.after(30000, lambda: self._cleanup_temp_file(script_path))
-            
-        except subprocess.CalledProcessError:
-            self.update_status(f"Error: FreeCAD command '{FREECAD_COMMAND}' failed to execute.")
-            self.update_status("Please ensure FreeCAD is properly installed.")
-            
-        except FileNotFoundError:
-            self.update_status(f"Error: FreeCAD command '{FREECAD_COMMAND}' not found.")
-            self.update_status("Please ensure FreeCAD is installed and available in your system's PATH.")
-            self.update_status("You can install FreeCAD using your system's package manager:")
-            self.update_status("  Ubuntu/Debian: sudo apt install freecad")
-            self.update_status("  Fedora: sudo dnf install freecad")
-            self.update_status("  Arch: sudo pacman -S freecad")
-            
-        except subprocess.TimeoutExpired:
-            self.update_status("Error: FreeCAD version check timed out.")
-            
-        except Exception as e:
-            self.update_status(f"Error launching FreeCAD: {e}")
-            
-    def _cleanup_temp_file(self, file_path):
-        """Clean up temporary script file"""
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                self.update_status(f"Temporary file cleaned up: {file_path}")
-        except Exception as e:
-            self.update_status(f"Warning: Could not clean up temporary file: {e}")
+            script_path = engine.save_script(script)
+        except IOError as e:
+            self.app.update_status(f"Error saving the stored script: {e}")
+            return
+        engine.launch_freecad(script_path)
+        
+    def use_selected_prompt(self):
+        """Copy the selected entry's prompt into the prompt box"""
+        entry = self._selected()
+        if entry is None:
+            return
+        self.app.example_cleared = True
+        self.app.prompt_text.delete("1.0", tk.END)
+        self.app.prompt_text.insert("1.0", entry.prompt)
+
+def print_startup_report(app):
+    """Print phase timings and the window target, then close the window"""
+    for line in app.timer.lines():
+        print(line)
+    painted = app.timer.elapsed_ms("first paint")
+    verdict = "within" if painted <= WINDOW_TARGET_MS else "OVER"
+    print(f"Window painted after {painted:.1f} ms ({verdict} the {WINDOW_TARGET_MS} ms target)")
+    print("Import breakdown: python3 gencad_startup.py gencad_ai")
+    app.destroy()
+
 
 def main():
     """Main application entry point"""
     try:
-        app = GenCADApp()
+        args = sys.argv[1:]
+        server_url = args[args.index("--server") + 1] if "--server" in args[:-1] else os.environ.get("GENCAD_SERVER")
+        app = GenCADApp(server_url=server_url)
+        if "--startup-report" in sys.argv[1:]:
+            app.bind("<<StartupFinished>>", lambda event: app.after(0, print_startup_report, app))
         app.mainloop()
     except KeyboardInterrupt:
         print("\nApplication interrupted by user")
@@ -0,0 +1,467 @@
+"""
+GenCAD AI - Script Analyzer
+AST-based checks of generated FreeCAD scripts against a declarative allow-list policy.
+
+Unlike the regex screen in gencad_validator, the analyzer ignores comments and strings,
+follows import aliases (import os as o, from os import system), and also reports
+shape statistics that a scheduler can use to predict execution cost. Compiled
+policies are memoized and results are cached per (policy, script hash).
+"""
+
+import ast
+import functools
+import hashlib
+import io
+import json
+import keyword
+import threading
+import tokenize
+from collections import OrderedDict
+
+from gencad_validator import Violation
+
+DEFAULT_POLICY = {
+    # Top-level modules a script may import
+    'allowed_modules': ['FreeCAD', 'FreeCADGui', 'Part', 'Draft', 'Sketcher', 'PartDesign', 'Mesh', 'math'],
+    # Modules that must be imported
+    'required_modules': ['FreeCAD', 'Part'],
+    # Builtins a script may call; anything else must be defined by the script itself
+    'allowed_builtins': ['abs', 'all', 'any', 'bool', 'dict', 'divmod', 'enumerate', 'filter', 'float',
+                         'int', 'isinstance', 'len', 'list', 'map', 'max', 'min', 'pow', 'print', 'range',
+                         'reversed', 'round', 'set', 'sorted', 'str', 'sum', 'tuple', 'zip'],
+    # Names that may not even be referenced
+    'denied_names': ['__builtins__', '__import__', 'breakpoint', 'compile', 'delattr', 'eval', 'exec', 'exit',
+                     'getattr', 'globals', 'hasattr', 'help', 'input', 'locals', 'open', 'quit', 'setattr',
+                     'vars', 'file', 'raw_input'],
+    # Attributes the FreeCAD modules may be used through; anything else on them is rejected.
+    # A name starting with one of the module_attribute_prefixes is also allowed.
+    'module_attributes': {
+        'FreeCAD': ['ActiveDocument', 'Base', 'Gui', 'GuiUp', 'Matrix', 'Placement', 'Rotation', 'Units', 'Vector',
+                    'Version', 'activeDocument', 'closeDocument', 'getDocument', 'listDocuments', 'newDocument',
+                    'setActiveDocument'],
+        'FreeCADGui': ['ActiveDocument', 'activeDocument', 'updateGui'],
+        'Part': ['Arc', 'ArcOfCircle', 'BSplineCurve', 'BezierCurve', 'Circle', 'Compound', 'Edge', 'Ellipse',
+                 'Face', 'Feature', 'Line', 'LineSegment', 'Plane', 'Point', 'Shape', 'Shell', 'Solid', 'Vertex',
+                 'Wire', 'show'],
+        'Draft': ['array', 'clone', 'cut', 'downgrade', 'extrude', 'fuse', 'mirror', 'move', 'offset', 'rotate',
+                  'scale', 'upgrade'],
+        'Sketcher': ['Constraint'],
+        'PartDesign': [],
+        'Mesh': ['Feature', 'Mesh']
+    },
+    'module_attribute_prefixes': ['make'],
+    # Attributes that reach the file system, run code, or escape the sandbox, on any object
+    'denied_attributes': ['doCommand', 'doCommandGui', 'runCommand', 'loadFile', 'openDocument', 'open', 'save',
+                          'saveAs', 'saveCopy', 'export', 'exportStep', 'exportStl', 'exportIges', 'exportBrep',
+                          'read', 'write', 'insert', 'ParamGet', 'SendMsgToActiveView', 'os', 'sys',
+                          'subprocess', 'builtins'],
+    # Attribute name prefixes denied the same way (importBrep, importDXF, exportStep, saveCopy...)
+    'denied_attribute_prefixes': ['import', 'export', 'save', 'load', 'read', 'write'],
+    # Calls that count toward the shape statistics
+    'object_calls': ['addObject'],
+    'boolean_calls': ['cut', 'fuse', 'common', 'section', 'makeFillet', 'makeChamfer', 'makeThickness'],
+    'boolean_object_types': ['Part::Cut', 'Part::Fuse', 'Part::Common', 'Part::MultiFuse', 'Part::MultiCommon',
+                             'Part::Fillet', 'Part::Chamfer'],
+    'primitive_calls': ['makeBox', 'makeCylinder', 'makeSphere', 'makeCone', 'makeTorus', 'makePolygon',
+                        'makeCircle', 'makeLine', 'makeHelix', 'makeWedge', 'makePrism', 'extrude', 'revolve']
+}
+
+# Cost weights for the estimate returned with each analysis
+COST_WEIGHTS = {'objects': 1.0, 'primitives': 1.0, 'booleans': 5.0}
+UNKNOWN_LOOP_COUNT = 10
+# A LineScreen holding this many lines that still do not tokenize (prose, say) stops screening
+MAX_PENDING_LINES = 50
+RESULT_CACHE_SIZE = 1024
+
+
+class Policy:
+    """Immutable, compiled form of a policy dictionary"""
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.key = hashlib.sha256(json.dumps(spec, sort_keys=True).encode('utf-8')).hexdigest()
+        self.allowed_modules = frozenset(spec['allowed_modules'])
+        self.required_modules = tuple(spec['required_modules'])
+        self.allowed_builtins = frozenset(spec['allowed_builtins'])
+        self.denied_names = frozenset(spec['denied_names'])
+        self.module_attributes = {module: frozenset(names) for module, names in spec['module_attributes'].items()}
+        self.module_attribute_prefixes = tuple(spec['module_attribute_prefixes'])
+        self.denied_attributes = frozenset(spec['denied_attributes'])
+        self.denied_attribute_prefixes = tuple(spec['denied_attribute_prefixes'])
+        self.object_calls = frozenset(spec['object_calls'])
+        self.boolean_calls = frozenset(spec['boolean_calls'])
+        self.boolean_object_types = frozenset(spec['boolean_object_types'])
+        self.primitive_calls = frozenset(spec['primitive_calls'])
+
+    def denies_attribute(self, name):
+        return name in self.denied_attributes or name.startswith(self.denied_attribute_prefixes)
+
+    def allows_module_attribute(self, module, name):
+        """Whether module.name is allowed; modules without a listed API (math) are unrestricted"""
+        names = self.module_attributes.get(module)
+        return names is None or name in names or name.startswith(self.module_attribute_prefixes)
+
+
+@functools.lru_cache(maxsize=32)
+def _compile_policy(spec_json):
+    return Policy(json.loads(spec_json))
+
+
+def compile_policy(spec=None):
+    """Return the memoized compiled policy for a policy dictionary (default: DEFAULT_POLICY)"""
+    merged = dict(DEFAULT_POLICY, **(spec or {}))
+    return _compile_policy(json.dumps(merged, sort_keys=True))
+
+
+class Analysis:
+    """Outcome of analyzing one script"""
+
+    def __init__(self, violations, stats):
+        self.violations = violations
+        self.stats = stats
+
+    @property
+    def ok(self):
+        return not self.violations
+
+    @property
+    def message(self):
+        if self.ok:
+            return "Script validation passed"
+        violation = self.violations[0]
+        if violation.line is None:
+            return violation.message
+        return f"{violation.message} (line {violation.line}, column {violation.column})"
+
+
+def _literal(node):
+    """Value of a literal expression node, or None"""
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        return None
+
+
+def _loop_count(node):
+    """Iteration count of a for-loop over range() with constant arguments, else a guess"""
+    iterator = node.iter
+    if (isinstance(iterator, ast.Call) and isinstance(iterator.func, ast.Name)
+            and iterator.func.id == 'range' and iterator.args):
+        try:
+            return len(range(*[ast.literal_eval(arg) for arg in iterator.args]))
+        except (ValueError, TypeError):
+            pass
+    if isinstance(iterator, (ast.List, ast.Tuple)):
+        return len(iterator.elts)
+    return UNKNOWN_LOOP_COUNT
+
+
+def _import_aliases(node):
+    """(local name, what it refers to) for each name an import statement binds"""
+    if isinstance(node, ast.Import):
+        for alias in node.names:
+            top = alias.name.split('.')[0]
+            yield alias.asname or top, alias.name if alias.asname else top
+    else:
+        for alias in node.names:
+            if alias.name != '*':
+                yield alias.asname or alias.name, f"{node.module or ''}.{alias.name}"
+
+
+def _bindings(target, value):
+    """(name, value expression) pairs of an assignment, unpacking equal-length tuples and lists"""
+    if isinstance(target, ast.Name):
+        return [(target.id, value)]
+    if (isinstance(target, (ast.Tuple, ast.List)) and isinstance(value, (ast.Tuple, ast.List))
+            and len(target.elts) == len(value.elts)):
+        return [pair for t, v in zip(target.elts, value.elts) for pair in _bindings(t, v)]
+    return []
+
+
+class _Analyzer(ast.NodeVisitor):
+    """Single AST walk that collects violations and shape statistics"""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.violations = []
+        self.aliases = {}  # local name -> imported module
+        self.module_uses = set()  # ids of module expressions used as an attribute base or bound to an alias
+        self.defined = set()
+        self.imported_modules = set()
+        self.has_new_document = False
+        self.multiplier = 1
+        self.stats = {'objects': 0, 'booleans': 0, 'primitives': 0, 'loops': 0, 'functions': 0, 'nodes': 0}
+
+    def flag(self, node, rule, message):
+        self.violations.append(Violation(rule, message, node.lineno, node.col_offset + 1))
+
+    def collect_definitions(self, tree):
+        """Names the script binds itself may be called freely"""
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+                self.defined.add(node.id)
+            elif isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+                self.defined.add(node.name)
+            elif isinstance(node, ast.arg):
+                self.defined.add(node.arg)
+
+    def collect_aliases(self, tree):
+        """Bind import aliases and names assigned a module (App = FreeCAD) before the walk,
+        so a use that comes before its binding in the source is still checked"""
+        assignments = []
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.aliases.update(_import_aliases(node))
+            elif isinstance(node, ast.Assign):
+                assignments.extend(pair for target in node.targets for pair in _bindings(target, node.value))
+        changed = True
+        while changed:
+            changed = False
+            for name, value in assignments:
+                module = self.module_of(value)
+                # The first module bound wins; a name rebound to another module is checked against the first
+                if module is not None and name not in self.aliases:
+                    self.aliases[name] = module
+                    changed = True
+
+    def restricted_module(self, node):
+        """Module with an attribute allow-list that node evaluates to, else None"""
+        module = self.module_of(node)
+        return module if module in self.policy.module_attributes else None
+
+    def check_module_use(self, node):
+        # A module passed around as a value would escape the per-module allow-list
+        module = self.restricted_module(node)
+        if module is not None and id(node) not in self.module_uses:
+            self.flag(node, 'name', f"Module '{module}' may only be used as {module}.<name> or bound to an alias")
+
+    def generic_visit(self, node):
+        self.stats['nodes'] += 1
+        super().generic_visit(node)
+
+    def check_module(self, node, module):
+        top = module.split('.')[0]
+        self.imported_modules.add(top)
+        if top not in self.policy.allowed_modules:
+            self.flag(node, 'import', f"Import of module '{module}' is not allowed")
+        return top
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            self.check_module(node, alias.name)
+        self.aliases.update(_import_aliases(node))
+        self.generic_visit(node)
+
+    def visit_ImportFrom(self, node):
+        module = node.module or ''
+        if node.level:
+            self.flag(node, 'import', "Relative imports are not allowed")
+        self.check_module(node, module)
+        for alias in node.names:
+            if alias.name == '*':
+                self.flag(node, 'import', f"Wildcard import from '{module}' is not allowed")
+            elif (self.policy.denies_attribute(alias.name) or alias.name.startswith('_')
+                    or not self.policy.allows_module_attribute(module, alias.name)):
+                self.flag(node, 'attribute', f"Import of '{module}.{alias.name}' is not allowed")
+        self.aliases.update(_import_aliases(node))
+        self.generic_visit(node)
+
+    def visit_Assign(self, node):
+        for target in node.targets:
+            for _, value in _bindings(target, node.value):
+                if self.restricted_module(value) is not None:
+                    self.module_uses.add(id(value))
+        self.generic_visit(node)
+
+    def visit_Name(self, node):
+        if node.id in self.policy.denied_names:
+            self.flag(node, 'name', f"Use of '{node.id}' is not allowed")
+        elif isinstance(node.ctx, ast.Load):
+            self.check_module_use(node)
+        self.generic_visit(node)
+
+    def module_of(self, node):
+        """Imported module an expression refers to (FreeCAD, or FreeCADGui for FreeCAD.Gui), else None"""
+        if isinstance(node, ast.Name):
+            module = self.aliases.get(node.id)
+            # from FreeCAD import Gui / import FreeCAD.Gui as G bind the same module as FreeCADGui
+            return 'FreeCADGui' if module == 'FreeCAD.Gui' else module
+        if isinstance(node, ast.Attribute) and node.attr == 'Gui' and self.module_of(node.value) == 'FreeCAD':
+            return 'FreeCADGui'
+        return None
+
+    def visit_Attribute(self, node):
+        module = self.module_of(node.value)
+        self.module_uses.add(id(node.value))
+        if isinstance(node.ctx, ast.Load):
+            self.check_module_use(node)
+        if node.attr.startswith('__'):
+            self.flag(node, 'attribute', f"Access to dunder attribute '{node.attr}' is not allowed")
+        elif self.policy.denies_attribute(node.attr):
+            self.flag(node, 'attribute', f"Access to '.{node.attr}' is not allowed")
+        elif module is not None and not self.policy.allows_module_attribute(module, node.attr):
+            self.flag(node, 'attribute', f"Use of '{module}.{node.attr}' is not allowed")
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        func = node.func
+        if isinstance(func, ast.Name):
+            name = func.id
+            if (name not in self.policy.allowed_builtins and name not in self.defined
+                    and name not in self.aliases and name not in self.policy.denied_names):
+                self.flag(node, 'call', f"Call to unknown function '{name}'")
+        elif isinstance(func, ast.Attribute):
+            name = func.attr
+            if name == 'newDocument':
+                self.has_new_document = True
+            if name in self.policy.object_calls:
+                self.stats['objects'] += self.multiplier
+                if node.args and _literal(node.args[0]) in self.policy.boolean_object_types:
+                    self.stats['booleans'] += self.multiplier
+            elif name in self.policy.boolean_calls:
+                self.stats['booleans'] += self.multiplier
+            elif name in self.policy.primitive_calls:
+                self.stats['primitives'] += self.multiplier
+        self.generic_visit(node)
+
+    def visit_loop(self, node, count):
+        self.stats['loops'] += 1
+        outer = self.multiplier
+        self.multiplier = outer * max(1, count)
+        self.generic_visit(node)
+        self.multiplier = outer
+
+    def visit_For(self, node):
+        self.visit_loop(node, _loop_count(node))
+
+    def visit_While(self, node):
+        self.visit_loop(node, UNKNOWN_LOOP_COUNT)
+
+    def visit_FunctionDef(self, node):
+        self.stats['functions'] += 1
+        self.generic_visit(node)
+
+
+def _analyze(script, policy):
+    if not script or not script.strip():
+        return Analysis([Violation('empty', "Script is empty or contains only whitespace", None, None)], {})
+
+    try:
+        tree = ast.parse(script)
+    except SyntaxError as e:
+        return Analysis([Violation('syntax', f"Script has invalid Python syntax: {e.msg}", e.lineno, e.offset)], {})
+
+    analyzer = _Analyzer(policy)
+    analyzer.collect_definitions(tree)
+    analyzer.collect_aliases(tree)
+    analyzer.visit(tree)
+
+    missing = [Violation('required', f"Missing required import of module '{module}'", None, None)
+               for module in policy.required_modules if module not in analyzer.imported_modules]
+    if not analyzer.has_new_document:
+        missing.append(Violation(
+            'required',
+            "Script does not appear to be a valid FreeCAD Python script (missing FreeCAD.newDocument()). Possible hallucination or invalid response.",
+            None, None
+        ))
+
+    stats = analyzer.stats
+    stats['estimated_cost'] = round(sum(stats[key] * weight for key, weight in COST_WEIGHTS.items()), 1)
+    return Analysis(missing + sorted(analyzer.violations, key=lambda v: (v.line or 0, v.column or 0)), stats)
+
+
+class LineScreen:
+    """Early, token-level screen of a script arriving line by line (e.g. while streaming).
+
+    Flags only what analyze_script is certain to reject: imports of modules outside the
+    policy, denied names, and denied attributes. Strings and comments are ignored. Lines that
+    do not tokenize on their own (a multi-line string or bracket) are held until they do, and
+    anything the screen cannot decide is left to analyze_script on the complete script.
+    """
+
+    def __init__(self, policy=None):
+        self.policy = policy if isinstance(policy, Policy) else compile_policy(policy)
+        self.gave_up = False
+        self._pending = []
+
+    def reset(self):
+        """Forget held lines, e.g. when a code fence shows they were prose"""
+        self.gave_up = False
+        self._pending = []
+
+    def feed(self, line):
+        """Screen one complete line; returns the first Violation it completes, or None"""
+        if self.gave_up:
+            return None
+        self._pending.append(line.rstrip("\n") + "\n")
+        try:
+            tokens = [token for token in tokenize.generate_tokens(io.StringIO("".join(self._pending)).readline)
+                      if token.type in (tokenize.NAME, tokenize.OP)]
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            # An incomplete statement or string: wait for more lines, within reason
+            if len(self._pending) >= MAX_PENDING_LINES:
+                self.gave_up = True
+                self._pending = []
+            return None
+        self._pending = []
+        return self._check(tokens)
+
+    def _check(self, tokens):
+        policy = self.policy
+        for index, token in enumerate(tokens):
+            previous = tokens[index - 1].string if index else None
+            following = tokens[index + 1].string if index + 1 < len(tokens) else None
+            if token.type != tokenize.NAME:
+                continue
+            if token.string in ('import', 'from') and previous in (None, ';'):
+                for module in self._imported(tokens[index + 1:], token.string == 'from'):
+                    if module not in policy.allowed_modules:
+                        return Violation('import', f"Import of module '{module}' is not allowed", None, None)
+            if previous == '.' and not keyword.iskeyword(token.string):
+                if token.string.startswith('__') or policy.denies_attribute(token.string):
+                    return Violation('attribute', f"Access to '.{token.string}' is not allowed", None, None)
+            elif (previous != '.' and token.string in policy.denied_names and previous not in ('def', 'class', 'as')
+                    and following != '='):
+                return Violation('name', f"Use of '{token.string}' is not allowed", None, None)
+        return None
+
+    @staticmethod
+    def _imported(tokens, from_import):
+        """Top-level modules named by the tokens after 'import' (or after 'from': just the first)"""
+        modules = []
+        expect_module = True
+        for token in tokens:
+            if token.string in (';', 'import') or token.type == tokenize.OP and token.string not in ('.', ','):
+                break
+            if expect_module and token.type == tokenize.NAME:
+                modules.append(token.string)
+                if from_import:
+                    break
+                expect_module = False
+            elif token.string == ',':
+                expect_module = True
+        return modules
+
+
+_result_cache = OrderedDict()
+_result_lock = threading.Lock()
+
+
+def analyze_script(script, policy=None):
+    """Analyze a script against a policy (a dict or compiled Policy); results are cached per script hash"""
+    if not isinstance(policy, Policy):
+        policy = compile_policy(policy)
+    key = (policy.key, hashlib.sha256((script or '').encode('utf-8')).hexdigest())
+
+    with _result_lock:
+        if key in _result_cache:
+            _result_cache.move_to_end(key)
+            return _result_cache[key]
+
+    analysis = _analyze(script, policy)
+
+    with _result_lock:
+        _result_cache[key] = analysis
+        if len(_result_cache) > RESULT_CACHE_SIZE:
+            _result_cache.popitem(last=False)
+    return analysis
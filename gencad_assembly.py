@@ -0,0 +1,161 @@
+"""
+GenCAD AI - Assembly Planning
+Splits a multi-part prompt (a gear train, an enclosure with lid and standoffs) into separate part
+prompts, and combines the separately generated part scripts into one FreeCAD document.
+
+Each part script runs unchanged inside its own function, so its names stay out of the other parts'
+way. The finished shapes of the documents it creates are copied into the assembly document at the
+planned position, and the part documents are then closed. Parts whose meaning would change inside a
+function (global statements, star and __future__ imports) are rejected rather than combined.
+"""
+
+import ast
+import json
+import re
+from collections import namedtuple
+
+DEFAULT_MAX_PARTS = 8
+# Overrides of generationConfig for the planning request
+PLAN_GENERATION_CONFIG = {"responseMimeType": "application/json", "temperature": 0.2}
+
+PLAN_TEMPLATE = """Split the following CAD assembly into the separate parts a designer would model one at a time.
+
+Reply with JSON only, in this form:
+{"parts": [{"name": "base", "prompt": "...", "position": [0, 0, 0], "rotation": [0, 0, 1, 0]}]}
+
+- "prompt" fully describes one part on its own, with every dimension in mm, modelled at the origin
+- "position" is where that part's origin goes in the assembly, in mm
+- "rotation" is an axis (x, y, z) and an angle in degrees applied before the move
+- Repeat a part (for example four standoffs) as separate entries with their own positions
+- Use at most {max_parts} parts; if the description is a single part, return exactly one part
+
+ASSEMBLY: {user_prompt}"""
+
+PlannedPart = namedtuple('PlannedPart', ['name', 'prompt', 'position', 'rotation'])
+
+
+def construct_plan_prompt(user_prompt, max_parts=DEFAULT_MAX_PARTS):
+    """Construct the planning prompt for Gemini"""
+    return PLAN_TEMPLATE.replace("{max_parts}", str(max_parts)).replace("{user_prompt}", user_prompt)
+
+
+def _numbers(value, default, count):
+    if value is None:
+        return default
+    if (not isinstance(value, (list, tuple)) or len(value) != count
+            or not all(isinstance(n, (int, float)) and not isinstance(n, bool) for n in value)):
+        raise ValueError(f"expected {count} numbers, got {value!r}")
+    return tuple(float(n) for n in value)
+
+
+def parse_plan(text, max_parts=DEFAULT_MAX_PARTS):
+    """Turn the planner's JSON reply into PlannedParts; raises ValueError if it is unusable"""
+    try:
+        plan = json.loads(text)
+    except ValueError as e:
+        raise ValueError(f"Planner reply is not JSON: {e}")
+    items = plan.get('parts') if isinstance(plan, dict) else plan
+    if not isinstance(items, list) or not items:
+        raise ValueError("Planner reply has no parts")
+    if len(items) > max_parts:
+        raise ValueError(f"Planner returned {len(items)} parts; the limit is {max_parts}")
+
+    parts = []
+    names = set()
+    for index, item in enumerate(items, 1):
+        if not isinstance(item, dict) or not isinstance(item.get('prompt'), str) or not item['prompt'].strip():
+            raise ValueError(f"Part {index} has no prompt")
+        # Part names become Python identifiers and object names in the combined script
+        name = re.sub(r'\W+', '_', str(item.get('name') or f"part_{index}")).strip('_').lower() or f"part_{index}"
+        if name[0].isdigit():
+            name = f"part_{name}"
+        unique, suffix = name, 2
+        while unique in names:
+            unique, suffix = f"{name}_{suffix}", suffix + 1
+        names.add(unique)
+        try:
+            position = _numbers(item.get('position'), (0.0, 0.0, 0.0), 3)
+            rotation = _numbers(item.get('rotation'), (0.0, 0.0, 1.0, 0.0), 4)
+        except ValueError as e:
+            raise ValueError(f"Part {index}: {e}")
+        parts.append(PlannedPart(unique, item['prompt'].strip(), position, rotation))
+    return parts
+
+
+def _vector(values):
+    return "FreeCAD.Vector(" + ", ".join(f"{value:g}" for value in values) + ")"
+
+
+_HEADER = '''import FreeCAD
+import Part
+
+# Assembly of {count} parts, each generated separately: {prompt}
+assembly = FreeCAD.newDocument("Assembly")
+
+
+def place_part(name, build, axis, angle, position):
+    """Run one part's script and copy its finished shapes into the assembly"""
+    before = set(FreeCAD.listDocuments())
+    build()
+    for document_name in sorted(set(FreeCAD.listDocuments()) - before):
+        document = FreeCAD.getDocument(document_name)
+        document.recompute()
+        for obj in document.Objects:
+            # Objects another object consumes (the inputs of a cut, say) are not finished shapes
+            if obj.InList or not obj.isDerivedFrom("Part::Feature") or obj.Shape.isNull():
+                continue
+            shape = obj.Shape.copy()
+            shape.rotate(FreeCAD.Vector(0, 0, 0), axis, angle)
+            shape.translate(position)
+            assembly.addObject("Part::Feature", name + "_" + obj.Name).Shape = shape
+        FreeCAD.closeDocument(document_name)
+'''
+
+_FOOTER = '''
+FreeCAD.setActiveDocument(assembly.Name)
+assembly.recompute()
+if FreeCAD.GuiUp:
+    FreeCAD.Gui.ActiveDocument.ActiveView.fitAll()
+'''
+
+
+def _function_body(part, script):
+    """The part script indented by one level, leaving the contents of multi-line strings untouched"""
+    source = script.strip()
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        raise ValueError(f"Part '{part.name}' is not valid Python: {e}")
+    verbatim = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Global):
+            raise ValueError(f"Part '{part.name}' uses a global statement, which would change meaning "
+                             f"inside build_{part.name}()")
+        if isinstance(node, ast.ImportFrom) and (node.module == '__future__'
+                                                 or any(alias.name == '*' for alias in node.names)):
+            raise ValueError(f"Part '{part.name}' has an import that is only allowed at module level")
+        # Lines after the first of a multi-line string are string contents, not code
+        if isinstance(node, (ast.Constant, ast.JoinedStr)) and node.end_lineno > node.lineno:
+            verbatim.update(range(node.lineno + 1, node.end_lineno + 1))
+    return "\n".join(line if number in verbatim or not line.strip() else "    " + line
+                     for number, line in enumerate(source.split("\n"), 1))
+
+
+def combine_parts(prompt, parts, scripts):
+    """One FreeCAD script that places every part in a single assembly document; raises ValueError
+    naming a part that cannot run inside a function unchanged"""
+    summary = " ".join(prompt.split())
+    sections = [_HEADER.format(count=len(parts), prompt=summary[:200])]
+    for part, script in zip(parts, scripts):
+        body = _function_body(part, script)
+        sections.append(f'''
+
+# --- {part.name}: {" ".join(part.prompt.split())[:200]}
+def build_{part.name}():
+{body}
+
+
+place_part("{part.name}", build_{part.name}, {_vector(part.rotation[:3])}, {part.rotation[3]:g}, {_vector(part.position)})
+''')
+    sections.append(_FOOTER)
+    return "".join(sections)
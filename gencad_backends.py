@@ -0,0 +1,251 @@
+"""
+GenCAD AI - Script Backends
+Pluggable sources of scripts that the engine tries before calling Gemini. A backend returns
+a script for prompts it understands and None for everything else, which falls through to
+the next backend and finally to Gemini.
+
+ParametricBackend answers common primitives (cubes, cubes with a through hole, washers,
+hollow cylinders and hex nuts) from a strict parser and fixed script templates. A prompt
+is only answered when every clause in it is understood; anything else falls through.
+"""
+
+import math
+import re
+
+# Millimetres per unit; a dimension without a unit is taken as millimetres
+UNITS = {
+    'mm': 1.0, 'millimeter': 1.0, 'millimeters': 1.0, 'millimetre': 1.0, 'millimetres': 1.0,
+    'cm': 10.0, 'centimeter': 10.0, 'centimeters': 10.0, 'centimetre': 10.0, 'centimetres': 10.0,
+    'm': 1000.0, 'meter': 1000.0, 'meters': 1000.0, 'metre': 1000.0, 'metres': 1000.0,
+    'in': 25.4, 'inch': 25.4, 'inches': 25.4, '"': 25.4,
+}
+
+# ISO 4032 hex nuts and ISO 7089 washers by metric size: (across flats, nut height, washer OD, washer ID, washer thickness)
+METRIC_SIZES = {
+    3: (5.5, 2.4, 7.0, 3.2, 0.5),
+    4: (7.0, 3.2, 9.0, 4.3, 0.8),
+    5: (8.0, 4.7, 10.0, 5.3, 1.0),
+    6: (10.0, 5.2, 12.0, 6.4, 1.6),
+    8: (13.0, 6.8, 16.0, 8.4, 1.6),
+    10: (16.0, 8.4, 20.0, 10.5, 2.0),
+    12: (18.0, 10.8, 24.0, 13.0, 2.5),
+    16: (24.0, 14.8, 30.0, 17.0, 3.0),
+    20: (30.0, 18.0, 37.0, 21.0, 3.0),
+}
+
+_UNIT = r'(mm|millimet(?:er|re)s?|cm|centimet(?:er|re)s?|met(?:er|re)s?|m|inch(?:es)?|in|")?'
+_LENGTH = r'(\d+(?:\.\d+)?)\s*' + _UNIT
+_LEAD = re.compile(r'^(?:please\s+)?(?:(?:create|make|generate|design|build|model|draw|give me)\s+)?(?:an?\s+)?(?:simple\s+)?')
+_NOUN = re.compile(r'\b(cube|washer|hollow cylinder|hollow tube|tube|pipe|hex(?:agonal)? nut|nut)\b')
+_SEPARATORS = re.compile(r',|;|\band\b|\bwith\b')
+
+# (parameter, pattern) pairs; a clause must match one of these in full
+_CLAUSES = [
+    ('outer', r'(?:outer|outside|external) diameter (?:of |is )?L'),
+    ('outer', r'L (?:outer|outside|external) diameter'),
+    ('outer', r'od (?:of )?L|L od'),
+    ('inner', r'(?:inner|inside|internal|bore|hole) diameter (?:of |is )?L'),
+    ('inner', r'L (?:inner|inside|internal|bore|hole) diameter'),
+    ('inner', r'id (?:of )?L|L id'),
+    ('wall', r'(?:a )?wall thickness (?:of |is )?L|L (?:thick )?walls?(?: thickness)?'),
+    ('thickness', r'(?:a )?thickness (?:of |is )?L|L thick(?:ness)?'),
+    ('height', r'(?:a )?(?:height|length) (?:of |is )?L|L (?:high|tall|height|long|length)'),
+    ('across_flats', r'L across flats|across flats (?:of )?L|L af'),
+    ('side', r'(?:a )?(?:side|edge)(?: length)? (?:of |is )?L|L (?:sides?|edges?)'),
+    ('hole', r'(?:an? )?L (?:diameter )?(?:cylindrical |round |circular )?(?:through[ -])?hole'
+             r'(?: (?:through|in|at) (?:the )?(?:center|centre|middle))?'),
+    ('metric', r'(?:an? )?m(\d+)(?: (?:thread|threads|size|bolt))?'),
+]
+_CLAUSES = [(name, re.compile(pattern.replace('L', _LENGTH))) for name, pattern in _CLAUSES]
+
+
+class Backend:
+    """A script source tried before Gemini"""
+
+    name = "backend"
+
+    def generate(self, prompt):
+        """Return a FreeCAD script for prompt, or None to fall through to the next backend"""
+        raise NotImplementedError
+
+
+def _to_mm(value, unit):
+    return float(value) * UNITS.get(unit or 'mm', 1.0)
+
+
+def _length(found):
+    """Millimetres from a clause match; alternatives each have their own (value, unit) groups"""
+    groups = found.groups()
+    for index in range(0, len(groups), 2):
+        if groups[index] is not None:
+            return _to_mm(groups[index], groups[index + 1])
+    return None
+
+
+def _format(value):
+    return f"{value:g}"
+
+
+def _consistent(params):
+    """True when every dimension is positive and each hole is smaller than the face around it"""
+    if not all(value > 0 for value in params.values()):
+        return False
+    face = params.get('side', params.get('outer', params.get('across_flats')))
+    if face is not None and any(params.get(name, 0) >= face for name in ('hole', 'inner', 'metric')):
+        return False
+    return 2 * params.get('wall', 0) < params.get('outer', math.inf)
+
+
+def parse_prompt(prompt):
+    """Return (family, parameters in mm) when every part of the prompt is understood, else None"""
+    text = _LEAD.sub('', " ".join(prompt.lower().split()).rstrip('.!'))
+    match = _NOUN.search(text)
+    if not match:
+        return None
+    family = match.group(1)
+    family = {'hollow tube': 'hollow cylinder', 'tube': 'hollow cylinder', 'pipe': 'hollow cylinder',
+              'hexagonal nut': 'hex nut', 'nut': 'hex nut'}.get(family, family)
+
+    params = {}
+    head = text[:match.start()].strip()
+    clauses = _SEPARATORS.split(text[match.end():])
+    # "50mm cube": a bare length before the noun is the cube's side
+    size = re.fullmatch(_LENGTH, head)
+    if family == 'cube' and size:
+        params['side'] = _to_mm(*size.groups())
+    else:
+        clauses.insert(0, head)
+
+    for clause in clauses:
+        clause = re.sub(r'^(?:an?|the|of|having|that is|which is)\s+', '', clause.strip())
+        if not clause:
+            continue
+        for name, pattern in _CLAUSES:
+            found = pattern.fullmatch(clause)
+            if found:
+                if name in params:
+                    return None  # the same dimension twice is ambiguous
+                params[name] = int(found.group(1)) if name == 'metric' else _length(found)
+                break
+        else:
+            return None  # a clause we do not understand: not confident enough to answer locally
+    if not _consistent(params):
+        return None  # zero sizes or a hole as wide as the part: let Gemini ask or decide
+    return family, params
+
+
+def _washer_from_metric(params):
+    size = METRIC_SIZES.get(params.get('metric'))
+    if size:
+        params.setdefault('outer', size[2])
+        params.setdefault('inner', size[3])
+        params.setdefault('thickness', size[4])
+
+
+def _header(name):
+    return f'''import math
+import FreeCAD
+import Part
+
+# {name}, generated locally from the prompt's dimensions (mm)
+doc = FreeCAD.newDocument("Model")
+'''
+
+
+_FOOTER = '''doc.recompute()
+if FreeCAD.GuiUp:
+    FreeCAD.Gui.ActiveDocument.ActiveView.fitAll()
+'''
+
+
+def _ring_script(name, outer, inner, height):
+    return _header(name) + f'''outer_radius = {_format(outer / 2)}
+inner_radius = {_format(inner / 2)}
+height = {_format(height)}
+outer = Part.makeCylinder(outer_radius, height)
+inner = Part.makeCylinder(inner_radius, height)
+doc.addObject("Part::Feature", "{name.replace(' ', '')}").Shape = outer.cut(inner)
+''' + _FOOTER
+
+
+def build_script(family, params):
+    """FreeCAD script for a parsed prompt, or None if required dimensions are missing or inconsistent"""
+    params = dict(params)
+    if not _consistent(params):
+        return None
+    if family == 'cube':
+        if set(params) - {'side', 'hole'} or 'side' not in params:
+            return None
+        side = params['side']
+        if 'hole' not in params:
+            return _header("Cube") + f'''side = {_format(side)}
+doc.addObject("Part::Feature", "Cube").Shape = Part.makeBox(side, side, side)
+''' + _FOOTER
+        if not 0 < params['hole'] < side:
+            return None
+        return _header("Cube with hole") + f'''side = {_format(side)}
+hole_radius = {_format(params['hole'] / 2)}
+cube = Part.makeBox(side, side, side)
+hole = Part.makeCylinder(hole_radius, side, FreeCAD.Vector(side / 2, side / 2, 0))
+doc.addObject("Part::Feature", "CubeWithHole").Shape = cube.cut(hole)
+''' + _FOOTER
+
+    if family == 'washer':
+        _washer_from_metric(params)
+        if set(params) - {'outer', 'inner', 'thickness', 'metric'}:
+            return None
+        if not all(name in params for name in ('outer', 'inner', 'thickness')):
+            return None
+        if not 0 < params['inner'] < params['outer']:
+            return None
+        return _ring_script("Washer", params['outer'], params['inner'], params['thickness'])
+
+    if family == 'hollow cylinder':
+        if set(params) - {'outer', 'inner', 'wall', 'height'} or 'outer' not in params or 'height' not in params:
+            return None
+        if 'wall' in params:
+            if 'inner' in params:
+                return None
+            params['inner'] = params['outer'] - 2 * params['wall']
+        if not 0 < params.get('inner', 0) < params['outer']:
+            return None
+        return _ring_script("Hollow cylinder", params['outer'], params['inner'], params['height'])
+
+    if family == 'hex nut':
+        if set(params) - {'metric', 'across_flats', 'height', 'thickness', 'inner'}:
+            return None
+        size = METRIC_SIZES.get(params.get('metric'))
+        across_flats = params.get('across_flats', size[0] if size else None)
+        height = params.get('height', params.get('thickness', size[1] if size else None))
+        hole = params.get('inner', float(params['metric']) if 'metric' in params else None)
+        if not (across_flats and height and hole) or hole >= across_flats:
+            return None
+        return _header("Hex nut") + f'''across_flats = {_format(across_flats)}
+height = {_format(height)}
+hole_radius = {_format(hole / 2)}
+corner_radius = across_flats / math.sqrt(3)
+corners = [FreeCAD.Vector(corner_radius * math.cos(math.radians(60 * i)),
+                          corner_radius * math.sin(math.radians(60 * i)), 0) for i in range(7)]
+body = Part.Face(Part.makePolygon(corners)).extrude(FreeCAD.Vector(0, 0, height))
+hole = Part.makeCylinder(hole_radius, height)
+doc.addObject("Part::Feature", "HexNut").Shape = body.cut(hole)
+''' + _FOOTER
+
+    return None
+
+
+class ParametricBackend(Backend):
+    """Answers simple parametric parts locally, without an API call"""
+
+    name = "parametric"
+
+    def generate(self, prompt):
+        parsed = parse_prompt(prompt)
+        if parsed is None:
+            return None
+        return build_script(*parsed)
+
+
+def default_backends():
+    """Backends the app and command line tools try before Gemini"""
+    return [ParametricBackend()]
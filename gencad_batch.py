@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+GenCAD AI - Batch Runner
+Generates FreeCAD scripts for many prompts concurrently on a bounded worker pool.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from gencad_assembly import DEFAULT_MAX_PARTS
+from gencad_backends import default_backends
+from gencad_cache import DEFAULT_CACHE_DIR, ResponseCache
+from gencad_client import GeminiClient, TokenBucket
+from gencad_engine import DEFAULT_REPAIR_ATTEMPTS, GEMINI_API_URL, GenerationEngine
+from gencad_history import DEFAULT_HISTORY_FILE, History
+from gencad_templates import DEFAULT_TEMPLATE_DIR, TemplateStore
+from gencad_workers import WorkerPool
+
+RESULTS_FILE = "results.jsonl"
+METRICS_JSON_FILE = "metrics.json"
+METRICS_PROMETHEUS_FILE = "metrics.prom"
+
+
+def iter_prompts(lines, markdown=False):
+    """Yield prompts from lines of text.
+
+    Plain files hold one prompt per line; blank lines and '#' comments are skipped.
+    Markdown catalogs (like examples/example_prompts.md) only contribute lines inside ``` fences.
+    """
+    in_fence = False
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            in_fence = not in_fence
+            continue
+        if markdown and not in_fence:
+            continue
+        if not stripped or stripped.startswith('#'):
+            continue
+        yield stripped
+
+
+def script_filename(index, prompt):
+    """Build a readable, unique file name for a prompt's script"""
+    slug = re.sub(r'[^a-z0-9]+', '_', prompt.lower()).strip('_')[:40] or "model"
+    return f"{index:04d}_{slug}.py"
+
+
+class BatchRunner:
+    """Runs prompts through a GenerationEngine on a thread pool with bounded in-flight work"""
+
+    def __init__(self, engine=None, workers=4, max_pending=None, status_callback=None, assembly=False):
+        self.engine = engine or GenerationEngine()
+        self.workers = max(1, workers)
+        # Prompts are read lazily, so at most this many are submitted but not yet finished
+        self.max_pending = max(self.workers, max_pending or self.workers * 2)
+        self.status_callback = status_callback
+        # Split each prompt into parts generated in parallel (see GenerationEngine.generate)
+        self.assembly = assembly
+
+    def report(self, message):
+        """Forward a progress message to the status callback, if any"""
+        if self.status_callback:
+            self.status_callback(message)
+
+    def _run_one(self, index, prompt, output_dir):
+        """Generate one prompt and write its script; returns the result record"""
+        started = time.monotonic()
+        result = self.engine.generate(prompt, save=False, assembly=self.assembly)
+        record = result.to_dict()
+        record['index'] = index
+        record['script_file'] = None
+
+        if result.ok:
+            script_file = script_filename(index, prompt)
+            try:
+                with open(os.path.join(output_dir, script_file), 'w', encoding='utf-8') as f:
+                    f.write(result.script)
+                record['script_file'] = script_file
+            except IOError as e:
+                record['ok'] = False
+                record['error'] = f"Error saving script: {e}"
+
+        if record['ok'] and self.engine.worker_pool is not None:
+            script_path = os.path.join(output_dir, record['script_file'])
+            execution = self.engine.execute_headless(script_path, trace=result.trace)
+            # Send FreeCAD's traceback back for a fix, within the engine's repair budget
+            for _ in range(self.engine.repair_attempts):
+                if execution is None or execution.get('ok'):
+                    break
+                problem = execution.get('traceback') or execution.get('error')
+                if not self.engine.repair_script(result, [f"FreeCAD raised: {problem}"], save=False):
+                    break
+                with open(script_path, 'w', encoding='utf-8') as f:
+                    f.write(result.script)
+                execution = self.engine.execute_headless(script_path, trace=result.trace)
+            record['execution'] = execution
+            record['timings'] = result.trace.to_dict()['timings']
+            if not execution or not execution.get('ok'):
+                record['ok'] = False
+                record['error'] = f"FreeCAD execution failed: {execution.get('error') if execution else 'worker error'}"
+
+        record['elapsed_seconds'] = round(time.monotonic() - started, 3)
+        return record
+
+    def run(self, prompts, output_dir):
+        """Generate every prompt, writing scripts and results.jsonl into output_dir; returns a summary"""
+        os.makedirs(output_dir, exist_ok=True)
+        results_path = os.path.join(output_dir, RESULTS_FILE)
+
+        slots = threading.BoundedSemaphore(self.max_pending)
+        lock = threading.Lock()
+        summary = {'total': 0, 'succeeded': 0, 'failed': 0}
+        started = time.monotonic()
+
+        with open(results_path, 'a', encoding='utf-8') as results_file, \
+                ThreadPoolExecutor(max_workers=self.workers) as pool:
+
+            def on_done(future, index, prompt):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {'index': index, 'prompt': prompt, 'ok': False, 'error': f"Unexpected error: {e}"}
+                with lock:
+                    results_file.write(json.dumps(record) + "\n")
+                    results_file.flush()
+                    summary['succeeded' if record['ok'] else 'failed'] += 1
+                    self.report(f"[{index}] {'OK' if record['ok'] else 'FAILED'}: {prompt}"
+                                + ("" if record['ok'] else f" - {record['error']}"))
+                slots.release()
+
+            for index, prompt in enumerate(prompts, 1):
+                slots.acquire()
+                summary['total'] += 1
+                future = pool.submit(self._run_one, index, prompt, output_dir)
+                future.add_done_callback(lambda f, i=index, p=prompt: on_done(f, i, p))
+
+        elapsed = time.monotonic() - started
+        summary['elapsed_seconds'] = round(elapsed, 3)
+        summary['prompts_per_minute'] = round(summary['total'] * 60.0 / elapsed, 2) if elapsed > 0 else 0.0
+        summary['results_file'] = results_path
+        if self.engine.cache is not None:
+            summary['cache'] = self.engine.cache.stats()
+        if self.engine.templates is not None:
+            summary['templates'] = self.engine.templates.stats()
+        if self.engine.history is not None:
+            self.engine.history.flush()
+            summary['history'] = self.engine.history.stats()
+        summary['single_flight'] = self.engine.flights.stats()
+        summary['stages'] = self.write_metrics(output_dir)
+        tracer_summary = self.engine.tracer.summary()
+        for name in ('fast_path', 'effective_cache'):
+            if name in tracer_summary:
+                summary[name] = tracer_summary[name]
+        return summary
+
+    def write_metrics(self, output_dir):
+        """Write the engine's stage metrics as metrics.json and metrics.prom; returns the JSON summary"""
+        metrics = self.engine.tracer.summary()
+        try:
+            with open(os.path.join(output_dir, METRICS_JSON_FILE), 'w', encoding='utf-8') as f:
+                json.dump(metrics, f, indent=2)
+            with open(os.path.join(output_dir, METRICS_PROMETHEUS_FILE), 'w', encoding='utf-8') as f:
+                f.write(self.engine.tracer.prometheus())
+        except IOError as e:
+            self.report(f"Warning: Could not write metrics: {e}")
+        return metrics['stages']
+
+
+def print_status(message):
+    """Print a timestamped status message to stderr"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}", file=sys.stderr)
+
+
+def build_parser():
+    """Build the command line argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="gencad_batch.py",
+        description="Generate FreeCAD scripts for a file of prompts using a concurrent worker pool."
+    )
+    parser.add_argument("prompts", help="Prompt file (one per line, or a Markdown catalog); '-' reads stdin")
+    parser.add_argument("-o", "--output-dir", default="gencad_batch_output", help="Directory for scripts and results.jsonl")
+    parser.add_argument("-j", "--workers", type=int, default=4, help="Number of concurrent Gemini requests")
+    parser.add_argument("--max-pending", type=int, default=None, help="Maximum prompts submitted but not finished (default: 2x workers)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress per-prompt status lines")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Maximum Gemini requests per minute shared by all workers")
+    parser.add_argument("--execute", action="store_true", help="Build every validated script in warm headless FreeCAD workers")
+    parser.add_argument("--freecad-workers", type=int, default=2, help="Number of headless FreeCAD workers for --execute")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Parallel candidates per prompt; the first valid one is kept (default: 1)")
+    parser.add_argument("--max-candidate-tokens", type=int, default=None,
+                        help="Cost ceiling: the summed maxOutputTokens of one prompt's candidates")
+    parser.add_argument("--assembly", action="store_true",
+                        help="Split multi-part prompts into parts, generate them in parallel and combine them")
+    parser.add_argument("--max-parts", type=int, default=DEFAULT_MAX_PARTS,
+                        help="Most parts --assembly may split a prompt into (default: %(default)s)")
+    parser.add_argument("--repair-attempts", type=int, default=DEFAULT_REPAIR_ATTEMPTS,
+                        help="Follow-up requests allowed to fix a rejected or failing script (default: %(default)s)")
+    parser.add_argument("--no-local", action="store_true",
+                        help="Always call Gemini, even for simple parts the local generator can build")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache and always call Gemini")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory of the response cache")
+    parser.add_argument("--no-templates", action="store_true",
+                        help="Do not reuse stored scripts for prompts that differ only in their dimensions")
+    parser.add_argument("--template-dir", default=DEFAULT_TEMPLATE_DIR, help="Directory of the script templates")
+    parser.add_argument("--no-history", action="store_true", help="Do not record the prompts in the generation history")
+    parser.add_argument("--history-file", default=DEFAULT_HISTORY_FILE, help="SQLite generation history database")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    templates = None if args.no_cache or args.no_templates else TemplateStore(args.template_dir)
+    history = None if args.no_history else History(args.history_file)
+    rate_limiter = TokenBucket(args.rate_limit / 60.0) if args.rate_limit else None
+    client = GeminiClient(GEMINI_API_URL, rate_limiter=rate_limiter, pool_size=max(1, args.workers))
+    worker_pool = WorkerPool(size=args.freecad_workers) if args.execute else None
+    engine = GenerationEngine(cache=cache, templates=templates, history=history, client=client, worker_pool=worker_pool,
+                              candidates=args.candidates, candidate_token_ceiling=args.max_candidate_tokens,
+                              repair_attempts=args.repair_attempts, max_parts=args.max_parts,
+                              backends=None if args.no_local else default_backends())
+    runner = BatchRunner(engine, workers=args.workers, max_pending=args.max_pending,
+                         status_callback=None if args.quiet else print_status, assembly=args.assembly)
+
+    try:
+        if args.prompts == '-':
+            summary = runner.run(iter_prompts(sys.stdin), args.output_dir)
+        else:
+            with open(args.prompts, encoding='utf-8') as prompt_file:
+                prompts = iter_prompts(prompt_file, markdown=args.prompts.endswith('.md'))
+                summary = runner.run(prompts, args.output_dir)
+    finally:
+        if worker_pool:
+            worker_pool.close()
+        if history is not None:
+            history.close()
+
+    print(json.dumps(summary, indent=2))
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
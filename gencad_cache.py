@@ -0,0 +1,150 @@
+"""
+GenCAD AI - Response Cache
+Persistent, content-addressed cache of validated scripts returned by Gemini.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "gencad_ai", "responses"
+)
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # seconds
+
+
+def make_cache_key(prompt_template, user_prompt, api_url, generation_config):
+    """Hash everything that determines a generation into a hex cache key"""
+    # The query string carries the API key; rotating keys must not invalidate the cache
+    scheme, netloc, path, _, _ = urlsplit(api_url)
+    material = json.dumps({
+        'template': prompt_template,
+        'prompt': user_prompt,
+        'model_url': urlunsplit((scheme, netloc, path, '', '')),
+        'generation_config': generation_config
+    }, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """On-disk cache mapping a cache key to a validated script, with size and age eviction"""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached script for key, or None on a miss"""
+        entry = self.get_entry(key)
+        return entry['script'] if entry is not None else None
+
+    def get_entry(self, key):
+        """Return the cached entry (script, prompt, created) for key, or None on a miss"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            expired = self.max_age is not None and time.time() - entry['created'] > self.max_age
+        except (IOError, ValueError, KeyError):
+            entry, expired = None, False
+
+        with self._lock:
+            if entry is None or expired:
+                self.misses += 1
+                if expired:
+                    self._remove(path)
+                return None
+            self.hits += 1
+
+        # Touch the entry so eviction is least-recently-used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, script, prompt=None):
+        """Store a validated script atomically and evict old entries if over budget"""
+        entry = {'script': script, 'prompt': prompt, 'created': time.time()}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except (IOError, OSError):
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until within the size budget"""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        removed = 0
+        while entries:
+            mtime, size, path = entries[0]
+            too_old = self.max_age is not None and now - mtime > self.max_age
+            too_big = len(entries) > self.max_entries or total_bytes > self.max_bytes
+            if not (too_old or too_big):
+                break
+            self._remove(path)
+            entries.pop(0)
+            total_bytes -= size
+            removed += 1
+
+        with self._lock:
+            self.evictions += removed
+        return removed
+
+    def clear(self):
+        """Remove every cached entry"""
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                self._remove(os.path.join(self.directory, name))
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
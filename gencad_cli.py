@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+GenCAD AI - Command Line Interface
+Generates FreeCAD scripts from text prompts without opening a window.
+"""
+
+import argparse
+import atexit
+import json
+import os
+import sys
+from datetime import datetime
+
+from gencad_assembly import DEFAULT_MAX_PARTS
+from gencad_backends import default_backends
+from gencad_cache import DEFAULT_CACHE_DIR, ResponseCache
+from gencad_engine import DEFAULT_REPAIR_ATTEMPTS, GenerationEngine
+from gencad_export import DEFAULT_MESH_CACHE_DIR, DEFAULT_TOLERANCE, EXPORT_FORMATS, MeshCache, parse_formats
+from gencad_history import DEFAULT_HISTORY_FILE, History
+from gencad_metrics import Tracer
+from gencad_templates import DEFAULT_TEMPLATE_DIR, TemplateStore
+from gencad_workers import WorkerPool
+from gencad_workspace import DEFAULT_WORKSPACE_DIR, Workspace
+
+
+def print_status(message):
+    """Print a timestamped status message to stderr"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}", file=sys.stderr)
+
+
+def print_tokens(text):
+    """Echo streamed response text to stderr as it arrives"""
+    sys.stderr.write(text)
+    sys.stderr.flush()
+
+
+def build_parser():
+    """Build the command line argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="gencad_cli.py",
+        description="Generate FreeCAD 3D model scripts from text prompts using Google Gemini AI."
+    )
+    parser.add_argument("prompt", help="Description of the 3D model to generate")
+    parser.add_argument("-o", "--output", help="Write the validated script to this path instead of stdout")
+    parser.add_argument("--launch", action="store_true", help="Open the generated script in FreeCAD")
+    parser.add_argument("--execute", action="store_true", help="Build the model in headless FreeCAD to check that it runs")
+    parser.add_argument("--export-dir", help="Build the model in headless FreeCAD and write CAD files to this directory")
+    parser.add_argument("--formats", default=",".join(EXPORT_FORMATS),
+                        help="Comma-separated export formats: step, stl, fcstd (default: all)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="STL tessellation tolerance in mm (default: %(default)s)")
+    parser.add_argument("--mesh-cache-dir", default=DEFAULT_MESH_CACHE_DIR, help="Directory of the STL mesh cache")
+    parser.add_argument("--metrics", help="Write per-stage timings to this file (Prometheus text if it ends in .prom, else JSON)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress status messages")
+    parser.add_argument("--stream", action="store_true", help="Stream the response and show it as it is generated")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Request this many scripts in parallel and keep the first valid one (default: 1)")
+    parser.add_argument("--max-candidate-tokens", type=int, default=None,
+                        help="Cost ceiling: the summed maxOutputTokens of all candidates (fewer are requested if needed)")
+    parser.add_argument("--assembly", action="store_true",
+                        help="Split a multi-part prompt into parts, generate them in parallel and combine them")
+    parser.add_argument("--max-parts", type=int, default=DEFAULT_MAX_PARTS,
+                        help="Most parts --assembly may split a prompt into (default: %(default)s)")
+    parser.add_argument("--repair-attempts", type=int, default=DEFAULT_REPAIR_ATTEMPTS,
+                        help="Follow-up requests allowed to fix a rejected or failing script (default: %(default)s)")
+    parser.add_argument("--no-local", action="store_true",
+                        help="Always call Gemini, even for simple parts the local generator can build")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache and always call Gemini")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory of the response cache")
+    parser.add_argument("--no-templates", action="store_true",
+                        help="Do not reuse stored scripts for prompts that differ only in their dimensions")
+    parser.add_argument("--template-dir", default=DEFAULT_TEMPLATE_DIR, help="Directory of the script templates")
+    parser.add_argument("--no-history", action="store_true", help="Do not record this run in the generation history")
+    parser.add_argument("--history-file", default=DEFAULT_HISTORY_FILE, help="SQLite generation history database")
+    parser.add_argument("--workspace-dir", default=DEFAULT_WORKSPACE_DIR,
+                        help="Directory where scripts for --launch/--execute/--export-dir are stored by content hash")
+    parser.add_argument("--server", default=os.environ.get("GENCAD_SERVER"),
+                        help="Generate on a running gencad_server.py at this URL (default: $GENCAD_SERVER); "
+                             "the service's own cache and generation settings apply")
+    return parser
+
+
+def write_metrics(tracer, path):
+    """Write the tracer's metrics as Prometheus text (.prom) or a JSON summary"""
+    with open(path, 'w', encoding='utf-8') as f:
+        if path.endswith('.prom'):
+            f.write(tracer.prometheus())
+        else:
+            json.dump(tracer.summary(), f, indent=2)
+
+
+def main(argv=None):
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    tracer = Tracer()
+    try:
+        return run(args, tracer)
+    finally:
+        if args.metrics:
+            write_metrics(tracer, args.metrics)
+
+
+def run(args, tracer):
+    """Generate, then optionally execute, export and launch, as the arguments ask"""
+    formats = None
+    if args.export_dir:
+        try:
+            formats = parse_formats(args.formats)
+        except ValueError as e:
+            build_parser().error(str(e))
+
+    if args.server:
+        return run_remote(args, formats)
+
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    templates = None if args.no_cache or args.no_templates else TemplateStore(args.template_dir)
+    history = None if args.no_history else History(args.history_file)
+    if history is not None:
+        atexit.register(history.close)
+    save = args.launch or args.execute or bool(args.export_dir)
+    workspace = None
+    if save:
+        workspace = Workspace(args.workspace_dir)
+        workspace.collect_garbage()
+        atexit.register(workspace.collect_garbage)
+    engine = GenerationEngine(
+        status_callback=None if args.quiet else print_status,
+        cache=cache,
+        templates=templates,
+        history=history,
+        stream=args.stream,
+        token_callback=None if args.quiet else print_tokens,
+        worker_pool=WorkerPool(size=1) if args.execute or args.export_dir else None,
+        mesh_cache=MeshCache(args.mesh_cache_dir) if args.export_dir and not args.no_cache else None,
+        tracer=tracer,
+        workspace=workspace,
+        candidates=args.candidates,
+        candidate_token_ceiling=args.max_candidate_tokens,
+        repair_attempts=args.repair_attempts,
+        max_parts=args.max_parts,
+        backends=None if args.no_local else default_backends()
+    )
+    result = engine.generate(args.prompt, save=save, assembly=args.assembly)
+
+    if not result.ok:
+        return 1
+
+    if engine.worker_pool:
+        try:
+            # An export builds the model too, so it doubles as --execute
+            if args.export_dir:
+                export = engine.export_model(result.script_path, args.export_dir, formats, args.tolerance,
+                                             trace=result.trace)
+                succeeded = export is not None and export.ok
+            else:
+                execution = engine.execute_headless(result.script_path, trace=result.trace)
+                # A script that passes validation can still fail in FreeCAD; send the traceback back
+                for _ in range(args.repair_attempts):
+                    if execution is None or execution.get('ok'):
+                        break
+                    problem = execution.get('traceback') or execution.get('error')
+                    if not engine.repair_script(result, [f"FreeCAD raised: {problem}"]):
+                        break
+                    execution = engine.execute_headless(result.script_path, trace=result.trace)
+                succeeded = execution is not None and execution.get('ok')
+        finally:
+            engine.worker_pool.close()
+        if not succeeded:
+            return 1
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(result.script)
+        engine.report(f"Script written to: {args.output}")
+    elif not args.launch:
+        print(result.script)
+
+    if args.launch and not engine.launch_freecad(result.script_path, trace=result.trace):
+        return 1
+
+    return 0
+
+
+
+def run_remote(args, formats):
+    """Generate (and execute or export) on a gencad_server.py service; write and launch locally"""
+    # Deferred so local runs never pay for urllib's imports
+    from gencad_jobs import DONE
+    from gencad_remote import ServiceClient, ServiceError
+
+    status = (lambda message: None) if args.quiet else print_status
+    client = ServiceClient(args.server)
+    try:
+        job = client.submit(args.prompt, execute=args.execute, formats=formats, tolerance=args.tolerance,
+                            assembly=args.assembly)
+        status(f"Queued job #{job['id']} on {args.server}")
+        job = client.wait(job['id'], on_update=lambda job: status(f"Job #{job['id']} {job['state']}"))
+        if job['state'] != DONE:
+            status(f"Error: Job #{job['id']} {job['state']}: {job['error']}")
+            return 1
+        script = client.script(job['id'])
+        if args.export_dir:
+            os.makedirs(args.export_dir, exist_ok=True)
+            for fmt, link in sorted(job['outputs']['export']['files'].items()):
+                path = client.download(link, os.path.join(args.export_dir, link.rsplit('/', 1)[-1]))
+                status(f"Wrote {fmt.upper()}: {path}")
+    except ServiceError as e:
+        status(f"Error: {e}")
+        return 1
+    status(f"Job #{job['id']} done in {job['elapsed_seconds']:.2f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            output_file.write(script)
+        status(f"Script written to: {args.output}")
+    elif not args.launch:
+        print(script)
+
+    if args.launch:
+        engine = GenerationEngine(status_callback=status)
+        if not engine.launch_freecad(engine.save_script(script)):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""
+GenCAD AI - Gemini Client
+Reusable HTTP client for the Gemini generateContent endpoint with a pooled keep-alive
+session, retries with exponential backoff and jitter, and a shared token-bucket rate limiter.
+requests (with urllib3, certifi and charset detection) is imported on first use, not at
+import time, so start-up paths that never call the API do not pay for it.
+"""
+
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+DEFAULT_MAX_RETRIES = 4
+DEFAULT_BACKOFF_BASE = 1.0  # seconds
+DEFAULT_BACKOFF_MAX = 30.0  # seconds
+DEFAULT_POOL_SIZE = 16
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime  # rarely needed; email.utils is slow to import
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def stream_url_for(api_url):
+    """Turn a generateContent URL into the matching server-sent-events streaming URL"""
+    scheme, netloc, path, query, fragment = urlsplit(api_url)
+    path = path.replace(':generateContent', ':streamGenerateContent')
+    params = [(k, v) for k, v in parse_qsl(query) if k != 'alt'] + [('alt', 'sse')]
+    return urlunsplit((scheme, netloc, path, urlencode(params), fragment))
+
+
+def response_text(result):
+    """Concatenate the text parts of the first candidate in a (partial) Gemini response"""
+    candidates = result.get('candidates') or []
+    if not candidates:
+        return ""
+    parts = (candidates[0].get('content') or {}).get('parts') or []
+    return "".join(part.get('text', '') for part in parts)
+
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every job that talks to the API"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)  # tokens per second
+        self.capacity = float(capacity or max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a token is available; returns the seconds spent waiting"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def defer(self, seconds):
+        """Hold back every caller for the given time, e.g. after a 429 with Retry-After"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class GeminiClient:
+    """Pooled, retrying client for one Gemini endpoint; safe to share between threads"""
+
+    def __init__(self, api_url, timeout=60, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX,
+                 rate_limiter=None, pool_size=DEFAULT_POOL_SIZE):
+        self.api_url = api_url
+        self.stream_url = stream_url_for(api_url)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The keep-alive session, created (and requests imported) on first use"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    # One keep-alive session reuses TCP+TLS connections across requests
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def warm_up(self):
+        """Import requests and build the session now, e.g. on a background thread after start-up"""
+        return self.session
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """Exponential backoff with full jitter, never shorter than the server's Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_max))
+        return delay
+
+    def _post(self, url, payload, on_retry=None, stream=False):
+        """POST with retries on connection errors and 429/5xx responses.
+
+        on_retry(attempt, delay, reason) is called before each retry. Returns the final
+        successful response; raises requests exceptions once retries are exhausted.
+        """
+        import requests
+
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                reason, retry_after = f"{type(e).__name__}", None
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                    response.raise_for_status()
+                    return response
+                reason = f"{response.status_code} {response.reason}"
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                response.close()
+                if response.status_code == 429 and self.rate_limiter and retry_after:
+                    self.rate_limiter.defer(retry_after)
+
+            delay = self.backoff_delay(attempt, retry_after)
+            attempt += 1
+            if on_retry:
+                on_retry(attempt, delay, reason)
+            time.sleep(delay)
+
+    def generate_content(self, payload, on_retry=None):
+        """POST a generateContent payload and return the decoded JSON response"""
+        return self._post(self.api_url, payload, on_retry).json()
+
+    def stream_content(self, payload, on_retry=None, on_usage=None):
+        """Yield text chunks from streamGenerateContent as the server sends them.
+
+        Retries only happen before the first chunk. Closing the generator early closes
+        the response, which aborts the generation and frees the connection. on_usage is
+        called with each usageMetadata dict the stream reports (the last one is final).
+        """
+        response = self._post(self.stream_url, payload, on_retry, stream=True)
+        try:
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            # chunk_size=None hands over each chunk as soon as it arrives instead of buffering
+            for line in response.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                event = json.loads(line[5:])
+                if on_usage and event.get('usageMetadata'):
+                    on_usage(event['usageMetadata'])
+                text = response_text(event)
+                if text:
+                    yield text
+        finally:
+            response.close()
+
+    def close(self):
+        """Close pooled connections"""
+        if self._session is not None:
+            self._session.close()
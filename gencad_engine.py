@@ -0,0 +1,924 @@
+#!/usr/bin/env python3
+"""
+GenCAD AI - Generation Engine
+Headless prompt -> FreeCAD script -> validated artifact pipeline.
+Shared by the desktop GUI and the command line; this module never imports tkinter.
+"""
+
+import json
+import os
+import queue
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gencad_assembly import (DEFAULT_MAX_PARTS, PLAN_GENERATION_CONFIG, combine_parts,
+                             construct_plan_prompt, parse_plan)
+from gencad_cache import make_cache_key
+from gencad_client import GeminiClient
+from gencad_export import EXPORT_FORMATS, ModelExporter, script_digest
+from gencad_freecad import GUI_CANDIDATES, default_locator
+from gencad_metrics import Tracer
+from gencad_singleflight import Cancelled, CancelToken, SingleFlight
+from gencad_templates import canonical_prompt
+from gencad_analyzer import LineScreen, analyze_script
+from gencad_workers import WorkerError
+
+# Constants
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_API_URL = os.environ.get(
+    "GEMINI_API_URL",
+    f"https://generativelanguage.googleapis.com/v1beta/models/{GEMINI_MODEL}:generateContent?key={GEMINI_API_KEY}"
+)
+REQUEST_TIMEOUT = 60
+DEFAULT_REPAIR_ATTEMPTS = 2  # used by the app and command line tools; the engine itself defaults to 0
+CANDIDATE_TEMPERATURE_STEP = 0.25  # each extra parallel candidate samples this much hotter, up to 1.0
+
+GENERATION_CONFIG = {
+    "responseMimeType": "text/plain",
+    "maxOutputTokens": 4096,
+    "temperature": 0.3
+}
+
+PROMPT_TEMPLATE = """Generate a complete and valid Python script for FreeCAD to create a 3D model based on the following description.
+
+REQUIREMENTS:
+- The script must be self-contained and runnable within FreeCAD
+- Use only FreeCAD's built-in modules (FreeCAD, Part, Draft, etc.)
+- Do NOT import os, subprocess, sys, or any external libraries
+- Do NOT include user interaction, file saving, or file I/O operations
+- Create a new document at the start
+- Add all geometry to the document
+- End with FreeCAD.ActiveDocument.recompute(); only call FreeCAD.Gui.ActiveDocument.ActiveView.fitAll() under `if FreeCAD.GuiUp:` so the script also runs headless
+- Use proper Python syntax and FreeCAD API calls
+- Create realistic dimensions if not specified
+
+EXAMPLE STRUCTURE:
+```python
+import FreeCAD
+import Part
+
+# Create new document
+doc = FreeCAD.newDocument("Model")
+
+# Create geometry using Part module
+# ... your geometry creation code here ...
+
+# Add objects to document
+doc.addObject("Part::Feature", "Model").Shape = your_shape
+
+# Finalize
+doc.recompute()
+if FreeCAD.GuiUp:
+    FreeCAD.Gui.ActiveDocument.ActiveView.fitAll()
+```
+
+USER DESCRIPTION: {user_prompt}
+
+Generate only the Python script code, no explanations or markdown formatting:"""
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so trivially different spellings of a prompt share a key"""
+    return " ".join(prompt.split())
+
+
+# Compact follow-up for a rejected script: the problems and the script, without the full template
+REPAIR_TEMPLATE = """This FreeCAD Python script was generated for: {user_prompt}
+
+It was rejected for these problems:
+{problems}
+
+Return the complete corrected script. Keep the same geometry. Import only FreeCAD, Part and math, start with
+doc = FreeCAD.newDocument(), end with doc.recompute(), and only touch FreeCAD.Gui under `if FreeCAD.GuiUp:`.
+Do not use file I/O, getattr, eval, exec or other modules. Reply with the Python code only.
+
+```python
+{script}
+```"""
+
+
+def construct_freecad_prompt(user_prompt):
+    """Construct the full prompt for Gemini AI"""
+    return PROMPT_TEMPLATE.replace("{user_prompt}", user_prompt)
+
+
+def format_problems(problems):
+    """Bullet list of validator Violations and/or FreeCAD error strings for a repair prompt"""
+    lines = []
+    for problem in problems:
+        if isinstance(problem, str):
+            lines.append(f"- {problem.strip()}")
+        elif problem.line is None:
+            lines.append(f"- {problem.message}")
+        else:
+            lines.append(f"- line {problem.line}: {problem.message}")
+    return "\n".join(lines)
+
+
+def construct_repair_prompt(user_prompt, script, problems):
+    """Construct the follow-up prompt asking Gemini to fix a rejected script"""
+    return (REPAIR_TEMPLATE.replace("{user_prompt}", user_prompt)
+            .replace("{problems}", format_problems(problems))
+            .replace("{script}", script.strip()))
+
+
+def build_payload(full_prompt, generation_config=None):
+    """Build the Gemini generateContent request body"""
+    return {
+        "contents": [
+            {
+                "role": "user",
+                "parts": [{"text": full_prompt}]
+            }
+        ],
+        "generationConfig": dict(generation_config or GENERATION_CONFIG)
+    }
+
+
+def validate_freecad_script(script):
+    """Validate a script against the AST allow-list policy; returns (is_valid, message)"""
+    analysis = analyze_script(script)
+    return analysis.ok, analysis.message
+
+
+def strip_code_fences(generated_text):
+    """Remove markdown code blocks if present"""
+    if '```python' in generated_text:
+        # Extract code between ```python and ```
+        start = generated_text.find('```python') + 9
+        end = generated_text.find('```', start)
+        if end != -1:
+            generated_text = generated_text[start:end].strip()
+    elif '```' in generated_text:
+        # Extract code between ``` and ```
+        start = generated_text.find('```') + 3
+        end = generated_text.find('```', start)
+        if end != -1:
+            generated_text = generated_text[start:end].strip()
+    return generated_text
+
+
+def extract_script_from_response(result):
+    """Extract the generated script from a Gemini API response, raising ValueError on bad structure"""
+    if (result and
+            result.get('candidates') and
+            result['candidates'][0].get('content') and
+            result['candidates'][0]['content'].get('parts')):
+        generated_text = result['candidates'][0]['content']['parts'][0].get('text', '').strip()
+        return strip_code_fences(generated_text)
+    raise ValueError("Unexpected response structure from Gemini API")
+
+
+class ScriptAssembler:
+    """Builds a script from streamed text, stripping fences and screening lines as they complete.
+
+    The screen (gencad_analyzer.LineScreen) only stops the stream for lines analyze_script is
+    certain to reject; everything else is decided once the script is complete.
+
+    Lines before an opening ``` fence are treated as code unless a fence follows, in which
+    case they are dropped as prose. Once the closing fence arrives the script is complete and
+    the rest of the stream (usually explanation) can be skipped.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._partial = ""
+        self._fenced = False
+        self.complete = False
+        self.violation = None
+        self.violation_line = None
+        self._screen = LineScreen()
+
+    def feed(self, text):
+        """Add streamed text and screen every newly completed line"""
+        self._chunks.append(text)
+        lines = (self._partial + text).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            self._check_line(line)
+
+    def finish(self):
+        """Screen the trailing partial line once the stream ends"""
+        if self._partial:
+            self._check_line(self._partial)
+            self._partial = ""
+
+    def _check_line(self, line):
+        if self.complete or self.violation:
+            return
+        stripped = line.strip()
+        if stripped.startswith('```'):
+            if self._fenced:
+                self.complete = True
+            else:
+                self._fenced = True
+                self._screen.reset()  # anything held before the fence was prose
+            return
+        violation = self._screen.feed(line)
+        if violation:
+            self.violation = violation.message
+            self.violation_line = line
+
+    def script(self):
+        """Return the assembled script with code fences removed"""
+        return strip_code_fences("".join(self._chunks).strip())
+
+
+class StreamAborted(Exception):
+    """Raised when a streamed script is rejected before the response finishes"""
+
+    def __init__(self, message, script="", line=""):
+        super().__init__(message)
+        self.script = script  # what had arrived when the stream was stopped
+        self.line = line
+
+    def problem(self):
+        """The rejection, worded as a problem for a repair prompt"""
+        return (f"{self} in `{self.line.strip()}`. The response was stopped at that line, "
+                f"so return the complete script")
+
+
+def save_script_to_temp_file(script):
+    """Save the generated script to a temporary file and return its path"""
+    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.py', encoding='utf-8') as temp_file:
+        temp_file.write(script)
+        return temp_file.name
+
+
+class GenerationResult:
+    """Outcome of a single prompt -> script generation job"""
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+        self.script = None
+        self.script_path = None
+        self.is_valid = False
+        self.cache_hit = False
+        self.template_hit = False  # a stored script was reused with this prompt's dimensions
+        self.backend = None  # name of the local backend that answered, if Gemini was not needed
+        self.coalesced = False  # the script came from another caller's identical in-flight request
+        self.cancelled = False
+        self.parts = []  # GenerationResults of an assembly's parts, when it was split
+        self.stats = {}
+        self.error = None
+        self.trace = None  # gencad_metrics.JobTrace with per-stage timings
+        self.history_key = None  # set by gencad_history.History.record; recording again replaces the row
+
+    @property
+    def ok(self):
+        return self.is_valid and self.error is None
+
+    def to_dict(self):
+        return {
+            'prompt': self.prompt,
+            'ok': self.ok,
+            'is_valid': self.is_valid,
+            'script_path': self.script_path,
+            'cache_hit': self.cache_hit,
+            'template_hit': self.template_hit,
+            'backend': self.backend,
+            'coalesced': self.coalesced,
+            'parts': [part.to_dict() for part in self.parts],
+            'stats': self.stats,
+            'error': self.error,
+            'job_id': self.trace.job_id if self.trace else None,
+            'timings': self.trace.to_dict()['timings'] if self.trace else {}
+        }
+
+
+class GenerationEngine:
+    """Runs the generation pipeline without any UI; progress goes to status_callback"""
+
+    def __init__(self, api_url=None, generation_config=None, timeout=REQUEST_TIMEOUT,
+                 freecad_locator=None, status_callback=None, cache=None, client=None,
+                 stream=False, token_callback=None, worker_pool=None, mesh_cache=None, tracer=None,
+                 flights=None, workspace=None, candidates=1, candidate_token_ceiling=None, repair_attempts=0,
+                 backends=None, templates=None, max_parts=DEFAULT_MAX_PARTS, history=None):
+        self.api_url = api_url or GEMINI_API_URL
+        self.generation_config = dict(generation_config or GENERATION_CONFIG)
+        self.timeout = timeout
+        self.client = client or GeminiClient(self.api_url, timeout=timeout)
+        # Resolves the FreeCAD executables once per process (see gencad_freecad)
+        self.freecad = freecad_locator or default_locator()
+        self.status_callback = status_callback
+        self.cache = cache
+        # Optional gencad_templates.TemplateStore: reuses scripts for prompts that differ only in dimensions
+        self.templates = templates
+        # With stream=True the response is read incrementally and streamed text goes to token_callback
+        self.stream = stream
+        self.token_callback = token_callback
+        # Optional gencad_workers.WorkerPool for running scripts in warm headless FreeCAD processes
+        self.worker_pool = worker_pool
+        # Optional gencad_export.MeshCache so re-exports at the same tolerance skip tessellation
+        self.mesh_cache = mesh_cache
+        # Per-stage spans of every job; export with tracer.summary() or tracer.prometheus()
+        self.tracer = tracer or Tracer()
+        # Optional gencad_workspace.Workspace; without one, each saved script gets its own temp file
+        self.workspace = workspace
+        # candidates > 1 requests that many scripts in parallel and keeps the first valid one;
+        # candidate_token_ceiling caps the summed maxOutputTokens those requests may spend
+        self.candidates = max(1, candidates)
+        self.candidate_token_ceiling = candidate_token_ceiling
+        # gencad_backends.Backend instances tried in order before Gemini (see default_backends())
+        self.backends = list(backends or [])
+        # Optional gencad_history.History: every finished job and export is recorded off-thread
+        self.history = history
+        # Upper bound on the parts generate(assembly=True) splits a prompt into
+        self.max_parts = max_parts
+        # Follow-up round trips allowed to fix a script that fails validation
+        self.repair_attempts = repair_attempts
+        # Identical concurrent requests and headless runs share one call (see gencad_singleflight)
+        self.flights = flights or SingleFlight()
+        self._local = threading.local()  # the JobTrace and CancelToken of the job on this thread
+
+    def report(self, message):
+        """Forward a progress message to the status callback, if any"""
+        if self.status_callback:
+            self.status_callback(message)
+
+    def current_trace(self):
+        """The JobTrace of the job running on this thread (a detached one outside generate())"""
+        trace = getattr(self._local, 'trace', None)
+        return trace if trace is not None else self.tracer.job()
+
+    def request_script(self, prompt, generation_config=None):
+        """Send the prompt to Gemini and return the extracted script text"""
+        trace = self.current_trace()
+        with trace.span('prompt'):
+            payload = build_payload(construct_freecad_prompt(prompt), generation_config or self.generation_config)
+        return self._send(payload, 'request')
+
+    def _send(self, payload, stage):
+        """Send a payload (streamed or not) and return the extracted script, timing it as stage"""
+        trace = self.current_trace()
+        if self.stream:
+            with trace.span(stage, streamed=True):
+                return self._stream_script(payload)
+        with trace.span(stage):
+            result = self.client.generate_content(payload, on_retry=self._report_retry)
+        self._record_usage(result.get('usageMetadata'))
+        with trace.span('extract'):
+            return extract_script_from_response(result)
+
+    def request_text(self, full_prompt, stage, generation_config=None):
+        """Send a prompt as written (no FreeCAD template, never streamed); returns the response text"""
+        payload = build_payload(full_prompt, generation_config or self.generation_config)
+        with self.current_trace().span(stage):
+            result = self.client.generate_content(payload, on_retry=self._report_retry)
+        self._record_usage(result.get('usageMetadata'))
+        return extract_script_from_response(result)
+
+    def request_repair(self, prompt, script, problems):
+        """Send a rejected script and its problems back to Gemini; returns the corrected script text"""
+        payload = build_payload(construct_repair_prompt(prompt, script, problems), self.generation_config)
+        return self._send(payload, 'repair')
+
+    def repair_until_valid(self, prompt, script, cancel=None, aborted=None):
+        """Repair a script that fails validation, up to repair_attempts round trips; returns the last script.
+
+        aborted is the StreamAborted of a response stopped mid-stream; script is then what had
+        arrived. It is raised again if the repairs run out while the last response is still one.
+        """
+        trace = self.current_trace()
+        for attempt in range(1, self.repair_attempts + 1):
+            if cancel is not None and cancel.cancelled:
+                break
+            if aborted is not None:
+                problems, message = [aborted.problem()], str(aborted)
+            else:
+                analysis = analyze_script(script) if script else None
+                if analysis is None or analysis.ok:
+                    break
+                problems, message = analysis.violations, analysis.message
+            self.report(f"Script rejected ({message}); asking Gemini to repair it "
+                        f"(attempt {attempt} of {self.repair_attempts})...")
+            trace.incr('repairs')
+            aborted = None
+            try:
+                repaired = self.request_repair(prompt, script, problems)
+            except StreamAborted as e:
+                # The repair was itself stopped mid-stream: repair what arrived next time round
+                script, aborted = e.script, e
+                continue
+            except (OSError, ValueError) as e:
+                # requests' errors are OSErrors; keep the last script so its own error is reported
+                self.report(f"Error: Repair request failed - {e}")
+                break
+            if repaired:
+                script = repaired
+        if aborted is not None:
+            raise aborted
+        return script
+
+    def repair_script(self, result, problems, save=True):
+        """Ask Gemini to fix result.script for the given problems (e.g. a FreeCAD traceback).
+
+        The repaired script is validated (and repaired again within the budget) and stored in
+        result. Returns True if result now holds a valid script.
+        """
+        trace = result.trace or self.current_trace()
+        self.report("Asking Gemini to repair the script...")
+        trace.incr('repairs')
+        try:
+            script = self.request_repair(result.prompt, result.script, problems)
+            script = self.repair_until_valid(result.prompt, script)
+        except Exception as e:
+            self.report(f"Error: Repair request failed - {e}")
+            return False
+        result.error = None
+        result.is_valid = False
+        result.script_path = None
+        self._finish(result, script, save)
+        if self.history is not None:
+            # Replaces the row generate() wrote, so the history keeps only the final outcome
+            self.history.record(result)
+        return result.ok
+
+    def candidate_configs(self):
+        """generationConfig of each parallel candidate, trimmed to fit the token ceiling"""
+        count = self.candidates
+        if self.candidate_token_ceiling:
+            per_candidate = self.generation_config.get('maxOutputTokens', GENERATION_CONFIG['maxOutputTokens'])
+            count = min(count, max(1, self.candidate_token_ceiling // per_candidate))
+        base = self.generation_config.get('temperature', GENERATION_CONFIG['temperature'])
+        return [dict(self.generation_config, temperature=round(min(1.0, base + index * CANDIDATE_TEMPERATURE_STEP), 2))
+                for index in range(count)]
+
+    def request_candidates(self, prompt):
+        """Request several scripts in parallel and return the first that passes validation.
+
+        The remaining requests are cancelled as soon as one wins. If none is valid, the
+        lowest-numbered script is returned so the usual validation error is reported.
+        """
+        configs = self.candidate_configs()
+        if len(configs) == 1:
+            return self.request_script(prompt)
+
+        trace = self.current_trace()
+        outer_cancel = getattr(self._local, 'cancel', None)
+        tokens = [CancelToken() for _ in configs]
+        if outer_cancel is not None:
+            outer_cancel.add_callback(lambda: [token.cancel() for token in tokens])
+        outcomes = queue.Queue()
+
+        def run(index, config):
+            # Each candidate gets its own detached trace; usage is summed into the job below
+            self._local.trace = candidate_trace = self.tracer.job(candidate=index)
+            self._local.cancel = tokens[index]
+            self._local.mute = index > 0  # only the first candidate streams to token_callback
+            script, error, valid = None, None, False
+            try:
+                script = self.request_script(prompt, config)
+                valid = bool(script) and analyze_script(script).ok
+            except Exception as e:
+                error = e
+            outcomes.put((index, script, error, valid, candidate_trace))
+
+        with trace.span('candidates', count=len(configs)):
+            for index, config in enumerate(configs):
+                threading.Thread(target=run, args=(index, config), daemon=True).start()
+            results = {}
+            winner = None
+            while len(results) < len(configs):
+                index, script, error, valid, candidate_trace = outcomes.get()
+                results[index] = (script, error)
+                for name in ('prompt_tokens', 'response_tokens', 'retries'):
+                    if candidate_trace.attrs.get(name):
+                        trace.incr(name, candidate_trace.attrs[name])
+                if valid:
+                    winner = index
+                    break
+            for token in tokens:
+                token.cancel()
+
+        trace.set(candidates=len(configs), candidate_winner=winner)
+        if winner is not None:
+            self.report(f"Candidate {winner + 1} of {len(configs)} passed validation first.")
+            return results[winner][0]
+        for index in sorted(results):
+            if results[index][0]:
+                return results[index][0]
+        errors = [results[index][1] for index in sorted(results) if results[index][1] is not None]
+        if errors:
+            raise errors[0]
+        return None
+
+    def _record_usage(self, usage):
+        """Copy Gemini usageMetadata token counts onto the current job"""
+        if usage:
+            self.current_trace().set(prompt_tokens=usage.get('promptTokenCount', 0),
+                                     response_tokens=usage.get('candidatesTokenCount', 0))
+
+    def _stream_script(self, payload):
+        """Assemble the script from streamed chunks, aborting as soon as it is rejected"""
+        assembler = ScriptAssembler()
+        chunks = self.client.stream_content(payload, on_retry=self._report_retry, on_usage=self._record_usage)
+        cancel = getattr(self._local, 'cancel', None)
+        token_callback = None if getattr(self._local, 'mute', False) else self.token_callback
+        try:
+            for chunk in chunks:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                if token_callback:
+                    token_callback(chunk)
+                assembler.feed(chunk)
+                if assembler.violation or assembler.complete:
+                    break
+        finally:
+            # Closing the generator closes the HTTP response and stops token generation
+            chunks.close()
+            if token_callback:
+                token_callback("\n")
+
+        assembler.finish()
+        if assembler.violation:
+            raise StreamAborted(assembler.violation, assembler.script(), assembler.violation_line)
+        return assembler.script()
+
+    def _report_retry(self, attempt, delay, reason):
+        self.current_trace().incr('retries')
+        self.report(f"Gemini API unavailable ({reason}), retrying in {delay:.1f}s (attempt {attempt})...")
+
+    def cache_key(self, prompt):
+        """Cache key covering the prompt template, user prompt, model URL and generationConfig"""
+        return make_cache_key(PROMPT_TEMPLATE, prompt, self.api_url, self.generation_config)
+
+    def template_key(self, prompt):
+        """Key shared by every prompt with the same structure once numbers and units are normalised"""
+        structure, _ = canonical_prompt(prompt)
+        return self.cache_key(f"template: {structure}")
+
+    def request_shared(self, prompt, trace, cancel=None):
+        """request_script, shared with any identical request already in flight.
+
+        Returns (script, coalesced). Raises Cancelled if cancel fires first; the shared
+        request itself is only abandoned once every caller waiting on it has cancelled.
+        """
+        mute = getattr(self._local, 'mute', False)
+
+        def call(shared_cancel):
+            # Runs on the flight's own thread, so carry the first caller's trace across
+            self._local.trace = trace
+            self._local.cancel = shared_cancel
+            self._local.mute = mute
+            aborted = None
+            try:
+                if self.candidates > 1:
+                    script = self.request_candidates(prompt)
+                else:
+                    script = self.request_script(prompt)
+            except StreamAborted as e:
+                # A stream stopped at an unsafe line still gets repaired, from the part that arrived
+                script, aborted = e.script, e
+            # Repairing inside the shared call lets coalesced callers share the repairs too
+            return self.repair_until_valid(prompt, script, shared_cancel, aborted)
+
+        key = self.cache_key(normalize_prompt(prompt))
+        started = time.monotonic()
+        script, coalesced = self.flights.do(key, call, cancel)
+        if coalesced:
+            # The first caller's trace holds the real request spans; this one waited for them
+            trace.set(coalesced=True)
+            trace.record('request', time.monotonic() - started, started, {'coalesced': True})
+        return script, coalesced
+
+    def local_script(self, prompt, trace):
+        """Ask each backend in turn; returns (backend name, valid script) or (None, None) to use Gemini"""
+        with trace.span('backend'):
+            for backend in self.backends:
+                try:
+                    script = backend.generate(prompt)
+                except Exception as e:
+                    self.report(f"Warning: Local {backend.name} generator failed - {e}")
+                    continue
+                if script is not None and analyze_script(script).ok:
+                    trace.set(backend=backend.name)
+                    return backend.name, script
+        trace.set(backend=None)
+        return None, None
+
+    def plan_assembly(self, prompt, use_cache=True):
+        """Ask Gemini to split an assembly prompt into parts; returns gencad_assembly.PlannedParts"""
+        key = self.cache_key(f"plan: {normalize_prompt(prompt)}")
+        use_cache = use_cache and self.cache is not None
+        text = self.cache.get(key) if use_cache else None
+        cached = text is not None
+        if not cached:
+            text = self.request_text(construct_plan_prompt(prompt, self.max_parts), 'plan',
+                                     dict(self.generation_config, **PLAN_GENERATION_CONFIG))
+        parts = parse_plan(text, self.max_parts)
+        if use_cache and not cached:
+            self.cache.put(key, text, prompt)
+        return parts
+
+    def generate(self, prompt, save=True, use_cache=True, cancel=None, assembly=False):
+        """Generate and validate a FreeCAD script; optionally save it to a temporary file.
+
+        With use_cache=False the response cache is neither read nor written. cancel is an
+        optional gencad_singleflight.CancelToken that stops this job. With assembly=True the
+        prompt is first split into parts, which are generated concurrently and combined.
+        """
+        result = GenerationResult(prompt)
+        result.trace = self._local.trace = self.tracer.job(prompt_chars=len(prompt))
+        try:
+            if assembly:
+                parts = self._plan_or_none(prompt, use_cache)
+                if parts is not None and len(parts) > 1:
+                    return self._generate_assembly(result, parts, save, use_cache, cancel)
+            return self._generate(result, save, use_cache, cancel)
+        finally:
+            self._local.trace = None
+            result.trace.finish('ok' if result.ok else 'error')
+            self.report(f"Timing: {result.trace.breakdown()}")
+            # An assembly is recorded as a whole, not part by part
+            if self.history is not None and not getattr(self._local, 'part', False):
+                self.history.record(result)
+
+    def _plan_or_none(self, prompt, use_cache):
+        """plan_assembly, or None (generate as one part) if planning fails"""
+        self.report("Planning the assembly's parts...")
+        try:
+            return self.plan_assembly(prompt, use_cache)
+        except Exception as e:
+            self.report(f"Warning: Assembly planning failed - {e}. Generating it as a single part.")
+            return None
+
+    def _generate_assembly(self, result, parts, save, use_cache, cancel=None):
+        """Generate every planned part concurrently through generate(), then combine them"""
+        trace = result.trace
+        trace.set(parts=len(parts))
+        self.report(f"Generating {len(parts)} parts in parallel: {', '.join(part.name for part in parts)}")
+
+        def run(index_part):
+            index, part = index_part
+            self._local.mute = index > 0  # only the first part streams to token_callback
+            self._local.part = True
+            try:
+                return self.generate(part.prompt, save=False, use_cache=use_cache, cancel=cancel)
+            finally:
+                self._local.mute = self._local.part = False
+
+        with trace.span('parts', count=len(parts)):
+            with ThreadPoolExecutor(max_workers=len(parts)) as pool:
+                result.parts = list(pool.map(run, enumerate(parts)))
+        for part_result in result.parts:
+            for name in ('prompt_tokens', 'response_tokens', 'retries', 'repairs'):
+                if part_result.trace.attrs.get(name):
+                    trace.incr(name, part_result.trace.attrs[name])
+
+        for part, part_result in zip(parts, result.parts):
+            if part_result.cancelled:
+                result.cancelled = True
+                result.error = "Generation cancelled."
+                return result
+            if not part_result.ok:
+                result.error = f"Error: Part '{part.name}' failed - {part_result.error}"
+                self.report(result.error)
+                return result
+
+        self.report(f"All {len(parts)} parts passed validation. Combining them into one document...")
+        with trace.span('combine'):
+            try:
+                script = combine_parts(result.prompt, parts, [part_result.script for part_result in result.parts])
+            except ValueError as e:
+                result.error = f"Error: {e}"
+                self.report(result.error)
+                return result
+        return self._finish(result, script, save)
+
+    def _generate(self, result, save, use_cache, cancel=None):
+        prompt = result.prompt
+        trace = result.trace
+
+        self.report("Generating model... Please wait.")
+        self.report(f"Processing prompt: {prompt}")
+
+        if self.backends:
+            backend, local_script = self.local_script(prompt, trace)
+            if local_script is not None:
+                result.backend = backend
+                self.report(f"Built by the local {backend} generator (no API call needed).")
+                return self._finish(result, local_script, save)
+
+        use_templates = use_cache and self.templates is not None
+        use_cache = use_cache and self.cache is not None
+        cached_script = None
+        if use_cache:
+            with trace.span('cache'):
+                cache_key = self.cache_key(prompt)
+                cached_script = self.cache.get(cache_key)
+            trace.set(cache_hit=cached_script is not None)
+
+        if cached_script is not None:
+            result.cache_hit = True
+            self.report("Using cached script for this prompt (no API call needed).")
+            return self._finish(result, cached_script, save)
+
+        if use_templates:
+            with trace.span('template'):
+                template_key = self.template_key(prompt)
+                template_script = self.templates.lookup(template_key, prompt)
+            trace.set(template_hit=template_script is not None)
+            if template_script is not None:
+                result.template_hit = True
+                self.report("Reusing a stored script with this prompt's dimensions (no API call needed).")
+                return self._finish(result, template_script, save)
+
+        self.report("Connecting to Gemini AI...")
+        # Deferred until a request is actually made; see gencad_client
+        import requests
+
+        try:
+            generated_script, result.coalesced = self.request_shared(prompt, trace, cancel)
+        except Cancelled:
+            result.cancelled = True
+            result.error = "Generation cancelled."
+            self.report(result.error)
+            return result
+        except requests.exceptions.RequestException as e:
+            if getattr(e, 'response', None) is not None:
+                result.error = f"Error connecting to Gemini API: {e.response.status_code} {e.response.reason}"
+                self.report(result.error)
+                if e.response.text:
+                    self.report(f"Gemini API Error Details: {e.response.text}")
+            else:
+                result.error = f"Error connecting to Gemini API: {e}"
+                self.report(result.error)
+            return result
+        except StreamAborted as e:
+            result.error = f"Error: Script validation failed - {e}"
+            self.report(result.error)
+            self.report("Generation stopped early; the rest of the response was not downloaded.")
+            return result
+        except ValueError as e:
+            result.error = f"Error parsing Gemini response: {e}"
+            self.report(result.error)
+            return result
+        except Exception as e:
+            result.error = f"An unexpected error occurred during API call: {e}"
+            self.report(result.error)
+            return result
+
+        if not generated_script:
+            result.error = "Error: Gemini API returned empty or invalid response."
+            self.report(result.error)
+            return result
+
+        if result.coalesced:
+            self.report("Shared the response of an identical request already in flight.")
+        self.report("AI response received. Validating script...")
+        result = self._finish(result, generated_script, save)
+        if result.is_valid and (use_cache or use_templates):
+            with trace.span('cache_store'):
+                if use_cache:
+                    self.cache.put(cache_key, result.script, prompt)
+                if use_templates:
+                    self.templates.learn(template_key, prompt, result.script)
+        return result
+
+    def _finish(self, result, generated_script, save):
+        """Validate a script and optionally save it to a temporary file"""
+        result.script = generated_script
+        trace = result.trace or self.current_trace()
+
+        with trace.span('validate'):
+            analysis = analyze_script(generated_script)
+        result.stats = analysis.stats
+        if not analysis.ok:
+            result.error = f"Error: Script validation failed - {analysis.message}"
+            self.report(result.error)
+            self.report("Possible AI hallucination detected. Please try a different prompt.")
+            return result
+
+        result.is_valid = True
+
+        if save:
+            self.report("Script validation passed. Creating temporary file...")
+            try:
+                with trace.span('save'):
+                    result.script_path = self.save_script(generated_script)
+            except IOError as e:
+                result.error = f"Error saving temporary script: {e}"
+                self.report(result.error)
+                return result
+            self.report(f"Script saved to: {result.script_path}")
+
+        return result
+
+    def save_script(self, script):
+        """Store a script in the workspace (reusing an identical one) or in a temp file; returns its path"""
+        if self.workspace is None:
+            return save_script_to_temp_file(script)
+        return self.workspace.store_script(script)
+
+    def execute_headless(self, script_path, trace=None, **options):
+        """Run a saved script on a warm headless FreeCAD worker; returns the worker response or None"""
+        if self.worker_pool is None:
+            self.report("Error: No headless FreeCAD worker pool is configured.")
+            return None
+
+        self.report("Running script in headless FreeCAD...")
+        try:
+            with (trace or self.tracer.job()).span('execute'):
+                # Identical scripts (say, duplicate prompts in one batch) are built only once
+                key = ('execute', script_digest(script_path), json.dumps(options, sort_keys=True, default=str))
+                response, _ = self.flights.do(key, lambda cancel: self.worker_pool.run_script(script_path, **options))
+                response = dict(response)
+        except (WorkerError, OSError) as e:
+            self.report(f"Error: FreeCAD worker failed - {e}")
+            return None
+
+        if response.get('ok'):
+            self.report(f"FreeCAD built the model: {response.get('objects', 0)} objects in {response.get('elapsed_seconds', 0)}s")
+        else:
+            self.report(f"Error: FreeCAD reported an error - {response.get('error')}")
+        return response
+
+    def export_model(self, script_path, output_dir=None, formats=EXPORT_FORMATS, tolerance=None, trace=None):
+        """Build a saved script headlessly and write STEP/STL/FCStd files; returns an ExportResult or None.
+
+        Without output_dir the files go to the workspace's artifact directory for this script.
+        """
+        if self.worker_pool is None:
+            self.report("Error: No headless FreeCAD worker pool is configured.")
+            return None
+        if output_dir is None:
+            if self.workspace is None:
+                self.report("Error: No export directory given and no workspace is configured.")
+                return None
+            output_dir = self.workspace.artifact_dir(script_digest(script_path))
+
+        self.report(f"Exporting {', '.join(formats).upper()} to {output_dir}...")
+        exporter = ModelExporter(self.worker_pool, self.mesh_cache)
+        try:
+            with (trace or self.tracer.job()).span('export', formats=list(formats)):
+                export = exporter.export(script_path, output_dir, formats, tolerance)
+        except WorkerError as e:
+            self.report(f"Error: FreeCAD worker failed - {e}")
+            return None
+
+        if not export.ok:
+            self.report(f"Error: Export failed - {export.error}")
+            return export
+        for fmt, path in sorted(export.artifacts.items()):
+            source = " (cached mesh)" if fmt in export.cached else ""
+            self.report(f"Wrote {fmt.upper()}: {path}{source}")
+        if self.history is not None:
+            self.history.record_artifacts(script_digest(script_path), export.artifacts)
+        return export
+
+    def launch_freecad(self, script_path, trace=None):
+        """Open the FreeCAD GUI with the generated script; returns True when launched"""
+        with (trace or self.tracer.job()).span('launch'):
+            return self._launch_freecad(script_path)
+
+    def _launch_freecad(self, script_path):
+        self.report("Opening FreeCAD with the generated model...")
+
+        # Resolved and version-checked once per process, so this spawns nothing extra
+        installation = self.freecad.resolve()
+
+        if installation.gui_command is None:
+            self.report(f"Error: FreeCAD command '{GUI_CANDIDATES[0]}' not found.")
+            self.report("Please ensure FreeCAD is installed and available in your system's PATH.")
+            self.report("You can install FreeCAD using your system's package manager:")
+            self.report("  Ubuntu/Debian: sudo apt install freecad")
+            self.report("  Fedora: sudo dnf install freecad")
+            self.report("  Arch: sudo pacman -S freecad")
+            return False
+
+        if installation.error == 'timeout':
+            self.report("Error: FreeCAD version check timed out.")
+            self.freecad.invalidate()
+            return False
+
+        if installation.error:
+            self.report(f"Error: FreeCAD command '{installation.gui_command[0]}' failed to execute.")
+            self.report("Please ensure FreeCAD is properly installed.")
+            return False
+
+        try:
+            # Launch FreeCAD with the script
+            subprocess.Popen(installation.gui_command + [script_path])
+        except Exception as e:
+            self.report(f"Error launching FreeCAD: {e}")
+            self.freecad.invalidate()
+            return False
+
+        self.report("FreeCAD launched successfully!")
+        self.report("Check the FreeCAD window for your generated 3D model.")
+        return True
+
+    def cleanup_temp_file(self, file_path):
+        """Clean up temporary script file"""
+        if not file_path or (self.workspace is not None and self.workspace.contains(file_path)):
+            return  # workspace files may be shared by other jobs; its garbage collector removes them
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                self.report(f"Temporary file cleaned up: {file_path}")
+        except Exception as e:
+            self.report(f"Warning: Could not clean up temporary file: {e}")
@@ -0,0 +1,189 @@
+"""
+GenCAD AI - Headless Export
+Builds a validated script on a headless FreeCAD worker and writes STEP, STL and FCStd files.
+Tessellated STL meshes are cached by (script hash, tolerance), so re-exporting the same
+script at the same resolution copies the cached mesh instead of tessellating again.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+EXPORT_FORMATS = ('step', 'stl', 'fcstd')
+EXPORT_EXTENSIONS = {'step': '.step', 'stl': '.stl', 'fcstd': '.FCStd'}
+DEFAULT_TOLERANCE = 0.1  # mm, maximum distance between the mesh and the true surface
+DEFAULT_MESH_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "gencad_ai", "meshes"
+)
+DEFAULT_MESH_CACHE_MAX_BYTES = 500 * 1024 * 1024
+
+
+def script_digest(script_path):
+    """SHA-256 of a script file's contents"""
+    digest = hashlib.sha256()
+    with open(script_path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def parse_formats(value):
+    """Turn 'step,stl' into ['step', 'stl']; raises ValueError on unknown formats"""
+    formats = [fmt.strip().lower() for fmt in value.split(',') if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format(s): {', '.join(unknown)} (choose from {', '.join(EXPORT_FORMATS)})")
+    return formats
+
+
+class MeshCache:
+    """On-disk STL cache keyed by (script hash, tolerance), evicted least-recently-used by size"""
+
+    def __init__(self, directory=DEFAULT_MESH_CACHE_DIR, max_bytes=DEFAULT_MESH_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, digest, tolerance):
+        # '%.6g' makes 0.1, 0.10 and 1e-1 share one entry
+        return os.path.join(self.directory, f"{digest}-{float(tolerance):.6g}.stl")
+
+    def get(self, digest, tolerance):
+        """Return the path of the cached mesh, or None on a miss"""
+        path = self._path(digest, tolerance)
+        try:
+            os.utime(path)  # touch for LRU eviction
+        except OSError:
+            path = None
+        with self._lock:
+            if path is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return path
+
+    def put(self, digest, tolerance, stl_path):
+        """Copy a freshly tessellated mesh into the cache atomically"""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            os.close(fd)
+            shutil.copyfile(stl_path, tmp_path)
+            os.replace(tmp_path, self._path(digest, tolerance))
+        except (IOError, OSError):
+            return
+        self.evict()
+
+    def evict(self):
+        """Remove least-recently-used meshes until the cache fits max_bytes"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.stl'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class ExportResult:
+    """Files written by one export, plus which came from the mesh cache"""
+
+    def __init__(self, script_path):
+        self.script_path = script_path
+        self.artifacts = {}
+        self.cached = []
+        self.worker_ran = False
+        self.error = None
+        self.elapsed_seconds = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def to_dict(self):
+        return {
+            'script_path': self.script_path,
+            'artifacts': self.artifacts,
+            'cached': self.cached,
+            'worker_ran': self.worker_ran,
+            'error': self.error,
+            'elapsed_seconds': round(self.elapsed_seconds, 4)
+        }
+
+
+class ModelExporter:
+    """Exports scripts through a WorkerPool, reusing cached meshes where possible"""
+
+    def __init__(self, worker_pool, mesh_cache=None, tolerance=DEFAULT_TOLERANCE):
+        self.worker_pool = worker_pool
+        self.mesh_cache = mesh_cache
+        self.tolerance = tolerance
+
+    def export(self, script_path, output_dir, formats=EXPORT_FORMATS, tolerance=None, basename=None):
+        """Write the model built by script_path into output_dir; raises WorkerError if the worker fails"""
+        started = time.monotonic()
+        result = ExportResult(script_path)
+        tolerance = self.tolerance if tolerance is None else tolerance
+        basename = basename or os.path.splitext(os.path.basename(script_path))[0]
+        os.makedirs(output_dir, exist_ok=True)
+
+        pending = list(formats)
+        digest = script_digest(script_path) if self.mesh_cache and 'stl' in pending else None
+        if digest:
+            cached_mesh = self.mesh_cache.get(digest, tolerance)
+            if cached_mesh:
+                target = os.path.join(output_dir, basename + EXPORT_EXTENSIONS['stl'])
+                shutil.copyfile(cached_mesh, target)
+                result.artifacts['stl'] = target
+                result.cached.append('stl')
+                pending.remove('stl')
+
+        if pending:
+            response = self.worker_pool.run_script(script_path, export={
+                'output_dir': os.path.abspath(output_dir),
+                'basename': basename,
+                'formats': pending,
+                'tolerance': tolerance
+            })
+            result.worker_ran = True
+            if response.get('ok'):
+                result.artifacts.update(response.get('artifacts', {}))
+                if digest and 'stl' in result.artifacts:
+                    self.mesh_cache.put(digest, tolerance, result.artifacts['stl'])
+            else:
+                result.error = response.get('error') or "FreeCAD export failed"
+
+        result.elapsed_seconds = time.monotonic() - started
+        return result
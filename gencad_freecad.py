@@ -0,0 +1,217 @@
+"""
+GenCAD AI - FreeCAD Discovery
+Finds the FreeCAD GUI and console executables (PATH, AppImage, or environment overrides)
+once per process, and caches their version and capabilities in memory and on disk.
+A cached result is reused until the executable's mtime or size changes, so launching a
+model never spends an extra FreeCAD startup on a version check.
+"""
+
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+
+GUI_CANDIDATES = ["freecad", "FreeCAD", "freecad-daily"]
+CONSOLE_CANDIDATES = ["freecadcmd", "FreeCADCmd", "freecadcmd-daily"]
+APPIMAGE_PATTERNS = [
+    "~/Applications/FreeCAD*.AppImage",
+    "~/.local/bin/FreeCAD*.AppImage",
+    "~/Downloads/FreeCAD*.AppImage",
+    "/opt/freecad/FreeCAD*.AppImage",
+    "/opt/FreeCAD*.AppImage",
+]
+PROBE_CACHE_FILE = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "gencad_ai", "freecad_probe.json"
+)
+PROBE_TIMEOUT = 10  # seconds
+
+
+class FreeCADInstallation:
+    """Resolved FreeCAD executables with their probed version"""
+
+    def __init__(self, gui_command=None, console_command=None, executable=None, version=None,
+                 error=None, appimage=False):
+        self.gui_command = gui_command          # argv prefix that opens the GUI, or None
+        self.console_command = console_command  # argv prefix for headless freecadcmd, or None
+        self.executable = executable            # file whose mtime/size guards the cache
+        self.version = version
+        self.error = error                      # None, 'failed' or 'timeout'
+        self.appimage = appimage
+
+    @property
+    def found(self):
+        return self.executable is not None
+
+    @property
+    def capabilities(self):
+        return {
+            'gui': self.gui_command is not None,
+            'console': self.console_command is not None,
+            'appimage': self.appimage
+        }
+
+    def to_dict(self):
+        return {
+            'gui_command': self.gui_command,
+            'console_command': self.console_command,
+            'executable': self.executable,
+            'version': self.version,
+            'error': self.error,
+            'capabilities': self.capabilities
+        }
+
+
+def _file_signature(path):
+    """(mtime, size) of a file, or None if it is gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime, stat.st_size]
+
+
+def _find_appimage():
+    for pattern in APPIMAGE_PATTERNS:
+        matches = sorted(glob.glob(os.path.expanduser(pattern)))
+        for path in reversed(matches):  # newest version name last
+            if os.access(path, os.X_OK):
+                return path
+    return None
+
+
+def _which(candidates):
+    for name in candidates:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+
+def probe_version(command, timeout=PROBE_TIMEOUT):
+    """Run '<command> --version' once; returns (version, error)"""
+    try:
+        completed = subprocess.run(command + ["--version"], capture_output=True, text=True,
+                                   timeout=timeout, check=True)
+    except subprocess.TimeoutExpired:
+        return None, 'timeout'
+    except (subprocess.CalledProcessError, OSError):
+        return None, 'failed'
+    match = re.search(r'FreeCAD\s+(\d+\.\d+(?:\.\d+)?)', completed.stdout + completed.stderr)
+    return (match.group(1) if match else "unknown"), None
+
+
+class FreeCADLocator:
+    """Resolves FreeCAD once per process; thread-safe and shareable"""
+
+    def __init__(self, gui_command=None, console_command=None, cache_file=PROBE_CACHE_FILE,
+                 probe_timeout=PROBE_TIMEOUT):
+        self.gui_override = gui_command or os.environ.get("GENCAD_FREECAD")
+        self.console_override = console_command or os.environ.get("GENCAD_FREECADCMD")
+        self.cache_file = cache_file
+        self.probe_timeout = probe_timeout
+        self.probes = 0  # number of '--version' processes this locator has spawned
+        self._installation = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _discover(self):
+        """Find executables without running anything"""
+        gui = shutil.which(self.gui_override) if self.gui_override else _which(GUI_CANDIDATES)
+        console = shutil.which(self.console_override) if self.console_override else _which(CONSOLE_CANDIDATES)
+        if gui or console:
+            return FreeCADInstallation(
+                gui_command=[gui] if gui else None,
+                console_command=[console] if console else None,
+                executable=console or gui
+            )
+
+        appimage = None if (self.gui_override or self.console_override) else _find_appimage()
+        if appimage:
+            # FreeCAD AppImages start the console binary when given 'freecadcmd' as the first argument
+            return FreeCADInstallation(gui_command=[appimage], console_command=[appimage, "freecadcmd"],
+                                       executable=appimage, appimage=True)
+        return FreeCADInstallation()
+
+    def _load_cached_probe(self, executable, signature):
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                entry = json.load(f).get(executable)
+        except (IOError, ValueError, AttributeError):
+            return None
+        if entry and entry.get('signature') == signature:
+            return entry
+        return None
+
+    def _store_probe(self, executable, signature, version, error):
+        try:
+            with open(self.cache_file, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (IOError, ValueError):
+            entries = {}
+        entries[executable] = {'signature': signature, 'version': version, 'error': error}
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.cache_file), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.cache_file)
+        except (IOError, OSError):
+            pass
+
+    def _resolve(self):
+        installation = self._discover()
+        if not installation.found:
+            return installation, None
+
+        signature = _file_signature(installation.executable)
+        cached = self._load_cached_probe(installation.executable, signature) if self.cache_file else None
+        if cached:
+            installation.version, installation.error = cached['version'], cached['error']
+        else:
+            self.probes += 1
+            probe_command = installation.console_command or installation.gui_command
+            installation.version, installation.error = probe_version(probe_command, self.probe_timeout)
+            if self.cache_file and installation.error != 'timeout':
+                self._store_probe(installation.executable, signature, installation.version, installation.error)
+        return installation, signature
+
+    def resolve(self):
+        """Return the FreeCADInstallation, probing only on first use or after the executable changed"""
+        with self._lock:
+            if self._installation is not None:
+                if not self._installation.found:
+                    return self._installation
+                if _file_signature(self._installation.executable) == self._signature:
+                    return self._installation
+            self._installation, self._signature = self._resolve()
+            return self._installation
+
+    def resolve_in_background(self):
+        """Start resolving on a daemon thread so the first launch finds the result ready"""
+        thread = threading.Thread(target=self.resolve, daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self):
+        """Forget the resolved installation, e.g. after a launch failure"""
+        with self._lock:
+            self._installation = None
+            self._signature = None
+
+
+_default_locator = None
+_default_lock = threading.Lock()
+
+
+def default_locator():
+    """The process-wide FreeCADLocator"""
+    global _default_locator
+    with _default_lock:
+        if _default_locator is None:
+            _default_locator = FreeCADLocator()
+        return _default_locator
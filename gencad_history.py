@@ -0,0 +1,358 @@
+"""
+GenCAD AI - Generation History
+SQLite store of every generation: prompt, normalized prompt, script, outcome, timings and exported
+artifacts, with a full-text index for searching past prompts. A stored script can be reopened in
+FreeCAD later without another API call.
+
+Writes are queued and committed in batches by one background thread, so recording history never
+blocks a generation or the Tk main loop. The database runs in WAL mode, so searches read while a
+batch is being written.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import closing
+
+from gencad_workspace import text_digest
+
+DEFAULT_HISTORY_FILE = os.path.join(
+    os.environ.get("XDG_STATE_HOME", os.path.join(os.path.expanduser("~"), ".local", "state")),
+    "gencad_ai", "history.sqlite3"
+)
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_FLUSH_INTERVAL = 0.5  # seconds a record may wait for others to share its transaction
+DEFAULT_LIMIT = 50
+# Row ids remembered for results that may be recorded again (after a repair) and replace their row
+TRACKED_ROWS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scripts (
+    hash TEXT PRIMARY KEY,
+    script TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS generations (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    prompt TEXT NOT NULL,
+    normalized_prompt TEXT NOT NULL,
+    script_hash TEXT,
+    outcome TEXT NOT NULL,
+    error TEXT,
+    source TEXT,
+    total_seconds REAL,
+    timings TEXT,
+    script_path TEXT
+);
+CREATE INDEX IF NOT EXISTS generations_normalized ON generations (normalized_prompt);
+CREATE INDEX IF NOT EXISTS generations_script ON generations (script_hash);
+CREATE TABLE IF NOT EXISTS artifacts (
+    script_hash TEXT NOT NULL,
+    format TEXT NOT NULL,
+    path TEXT NOT NULL,
+    created REAL NOT NULL,
+    PRIMARY KEY (script_hash, format, path)
+);
+"""
+
+# External-content index: the prompt text lives once, in generations
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS generations_fts USING fts5 (prompt, content='generations', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS generations_fts_insert AFTER INSERT ON generations BEGIN
+    INSERT INTO generations_fts (rowid, prompt) VALUES (new.id, new.prompt);
+END;
+"""
+
+_COLUMNS = "g.id, g.created, g.prompt, g.outcome, g.error, g.source, g.total_seconds, g.script_hash, g.script_path"
+
+HistoryEntry = namedtuple('HistoryEntry', ['id', 'created', 'prompt', 'outcome', 'error', 'source',
+                                           'total_seconds', 'script_hash', 'script_path'])
+
+
+def outcome_of(result):
+    """'ok', 'invalid' (the script failed validation), 'cancelled' or 'error'"""
+    if result.cancelled:
+        return 'cancelled'
+    if result.ok:
+        return 'ok'
+    return 'invalid' if result.script and not result.is_valid else 'error'
+
+
+def source_of(result):
+    """Where a result's script came from"""
+    if result.script is None:
+        return None
+    if result.parts:
+        return 'assembly'
+    if result.backend:
+        return result.backend
+    if result.cache_hit:
+        return 'cache'
+    if result.template_hit:
+        return 'template'
+    return 'shared' if result.coalesced else 'gemini'
+
+
+def match_expression(query):
+    """FTS5 query matching every word of the user's text as a prefix, or None if it has no words"""
+    words = re.findall(r'\w+', query)
+    return " ".join(f'"{word}"*' for word in words) or None
+
+
+class History:
+    """Generation history in SQLite with batched background writes and full-text prompt search"""
+
+    def __init__(self, path=DEFAULT_HISTORY_FILE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fts = True  # False when this SQLite build has no FTS5; search then scans the prompts
+        self.records = 0
+        self.batches = 0
+        self.errors = 0
+        self._queue = queue.Queue()
+        self._keys = itertools.count(1)
+        self._rows = OrderedDict()  # result.history_key -> generations.id, used by the writer only
+        self._thread = None
+        self._closed = False
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """Open a connection, creating the database and its schema on first use"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        with self._lock:
+            if not self._ready:
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(_SCHEMA)
+                try:
+                    connection.executescript(_FTS_SCHEMA)
+                except sqlite3.OperationalError:
+                    self.fts = False
+                self._ready = True
+        # Losing the last batch on power failure is acceptable; an fsync per commit is not
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # Writes: queued here, committed by the writer thread
+
+    def record(self, result):
+        """Queue a finished GenerationResult; returns at once. Recording it again replaces its row."""
+        if result.history_key is None:
+            result.history_key = next(self._keys)
+        trace = result.trace.to_dict() if result.trace else {'timings': {}}
+        script_hash = text_digest(result.script) if result.script else None
+        row = (time.time(), result.prompt, " ".join(result.prompt.split()), script_hash, outcome_of(result),
+               result.error, source_of(result), trace['timings'].get('total'),
+               json.dumps(trace['timings'], sort_keys=True), result.script_path)
+        self._put(('generation', (result.history_key, row), result.script))
+
+    def record_artifacts(self, script_hash, artifacts):
+        """Queue the files exported from a script ({format: path})"""
+        now = time.time()
+        for fmt, path in sorted(artifacts.items()):
+            self._put(('artifact', (script_hash, fmt, os.path.abspath(path), now), None))
+
+    def _put(self, item):
+        if self._closed:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_loop, daemon=True)
+                self._thread.start()
+        self._queue.put(item)
+
+    def flush(self, timeout=10):
+        """Wait until everything queued so far is committed; returns False on timeout"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(('flush', done, None))
+        return done.wait(timeout)
+
+    def close(self):
+        """Commit what is queued and stop the writer"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(10)
+
+    def _write_loop(self):
+        try:
+            connection = self._connect()
+        except (sqlite3.Error, OSError):
+            connection = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            # Gather what arrives within flush_interval into the same transaction
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][0] != 'flush':
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            self._write_batch(connection, batch)
+        if connection is not None:
+            connection.close()
+
+    def _write_batch(self, connection, batch):
+        generations = [item for kind, item, _ in batch if kind == 'generation']
+        scripts = {item[1][3]: script for kind, item, script in batch if kind == 'generation' and script}
+        artifacts = [row for kind, row, _ in batch if kind == 'artifact']
+        if connection is None:
+            self.errors += len(generations) + len(artifacts)
+        elif generations or artifacts:
+            try:
+                with connection:
+                    connection.executemany("INSERT OR IGNORE INTO scripts (hash, script) VALUES (?, ?)",
+                                           scripts.items())
+                    inserted = self._write_generations(connection, generations)
+                    connection.executemany("INSERT OR REPLACE INTO artifacts (script_hash, format, path, created)"
+                                           " VALUES (?, ?, ?, ?)", artifacts)
+                # Only remember row ids once their transaction has committed
+                self._rows.update(inserted)
+                while len(self._rows) > TRACKED_ROWS:
+                    self._rows.popitem(last=False)
+                self.records += len(inserted)
+                self.batches += 1
+            except sqlite3.Error:
+                self.errors += len(generations) + len(artifacts)
+        for kind, done, _ in batch:
+            if kind == 'flush':
+                done.set()
+
+    def _write_generations(self, connection, generations):
+        """Insert new results and update the rows of results recorded before; returns {key: id} inserted"""
+        inserted = {}
+        for key, row in generations:
+            rowid = inserted.get(key, self._rows.get(key))
+            if rowid is None:
+                cursor = connection.execute(
+                    "INSERT INTO generations (created, prompt, normalized_prompt, script_hash, outcome, error,"
+                    " source, total_seconds, timings, script_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                inserted[key] = cursor.lastrowid
+            else:
+                # The prompt is unchanged, so the full-text index needs no update
+                connection.execute("UPDATE generations SET script_hash = ?, outcome = ?, error = ?, source = ?,"
+                                   " total_seconds = ?, timings = ?, script_path = ? WHERE id = ?",
+                                   row[3:] + (rowid,))
+        return inserted
+
+    # Reads: a short-lived connection each, which WAL lets run alongside the writer
+
+    def _query(self, sql, parameters=()):
+        with closing(self._connect()) as connection:
+            return connection.execute(sql, parameters).fetchall()
+
+    def recent(self, limit=DEFAULT_LIMIT):
+        """The newest entries first"""
+        rows = self._query(f"SELECT {_COLUMNS} FROM generations g ORDER BY g.id DESC LIMIT ?", (limit,))
+        return [HistoryEntry(*row) for row in rows]
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Entries whose prompt contains every word of query (as word prefixes), newest first"""
+        expression = match_expression(query)
+        if expression is None:
+            return self.recent(limit)
+        if self._fts_available():
+            rows = self._query(f"SELECT {_COLUMNS} FROM generations_fts f JOIN generations g ON g.id = f.rowid"
+                               " WHERE generations_fts MATCH ? ORDER BY g.id DESC LIMIT ?", (expression, limit))
+        else:
+            words = re.findall(r'\w+', query)
+            where = " AND ".join("g.prompt LIKE ?" for _ in words)
+            rows = self._query(f"SELECT {_COLUMNS} FROM generations g WHERE {where} ORDER BY g.id DESC LIMIT ?",
+                               [f"%{word}%" for word in words] + [limit])
+        return [HistoryEntry(*row) for row in rows]
+
+    def _fts_available(self):
+        if not self._ready:
+            self._connect().close()  # creating the schema settles self.fts
+        return self.fts
+
+    def entry(self, entry_id):
+        rows = self._query(f"SELECT {_COLUMNS} FROM generations g WHERE g.id = ?", (entry_id,))
+        return HistoryEntry(*rows[0]) if rows else None
+
+    def script(self, script_hash):
+        """Text of a stored script, or None"""
+        rows = self._query("SELECT script FROM scripts WHERE hash = ?", (script_hash,))
+        return rows[0][0] if rows else None
+
+    def artifacts(self, script_hash):
+        """{format: [paths]} of the files exported from a script"""
+        files = {}
+        for fmt, path in self._query("SELECT format, path FROM artifacts WHERE script_hash = ? ORDER BY created",
+                                     (script_hash,)):
+            files.setdefault(fmt, []).append(path)
+        return files
+
+    def stats(self):
+        return {'records': self.records, 'batches': self.batches, 'errors': self.errors,
+                'pending': self._queue.qsize(), 'fts': self.fts}
+
+
+def describe(entry):
+    """One line for a history list: date, outcome, source, time and prompt"""
+    when = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.created))
+    seconds = f"{entry.total_seconds:.1f}s" if entry.total_seconds is not None else "-"
+    prompt = " ".join(entry.prompt.split())
+    return f"#{entry.id:<5} {when}  {entry.outcome:<9} {entry.source or '-':<10} {seconds:>6}  {prompt[:80]}"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Search past generations and reopen their scripts")
+    parser.add_argument("query", nargs="*", help="Words the prompt must contain (default: list recent entries)")
+    parser.add_argument("--history-file", default=DEFAULT_HISTORY_FILE, help="SQLite history database")
+    parser.add_argument("-n", "--limit", type=int, default=DEFAULT_LIMIT, help="Maximum entries to list")
+    parser.add_argument("--show", type=int, metavar="ID", help="Print the script of an entry")
+    parser.add_argument("--open", type=int, metavar="ID", help="Open an entry's script in FreeCAD (no API call)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    history = History(args.history_file)
+    entry_id = args.show or args.open
+    if entry_id is None:
+        for entry in history.search(" ".join(args.query), args.limit):
+            print(describe(entry))
+        return 0
+
+    entry = history.entry(entry_id)
+    script = history.script(entry.script_hash) if entry and entry.script_hash else None
+    if script is None:
+        print(f"Error: No stored script for history entry #{entry_id}", file=sys.stderr)
+        return 1
+    if args.show:
+        print(script)
+        return 0
+
+    # Deferred so listing and --show never import the engine
+    from gencad_engine import GenerationEngine
+    engine = GenerationEngine(status_callback=print)
+    return 0 if engine.launch_freecad(engine.save_script(script)) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+GenCAD AI - Job Queue
+Runs many prompts through the engine on a bounded pool of worker threads. Jobs can be
+cancelled, bumped ahead of other queued jobs, and each one has an overall deadline that
+covers the Gemini request, validation and the FreeCAD launch.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+from gencad_metrics import format_seconds
+from gencad_singleflight import CancelToken
+
+DEFAULT_WORKERS = 2
+DEFAULT_DEADLINE = 180.0  # seconds from start to FreeCAD launch
+MAX_FINISHED_JOBS = 50    # finished jobs kept for the job list
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TIMED_OUT = "timed out"
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMED_OUT)
+
+
+class Job:
+    """One prompt in the queue; its fields are updated by the queue's worker threads"""
+
+    def __init__(self, job_id, prompt, priority, deadline, options=None):
+        self.id = job_id
+        self.prompt = prompt
+        self.priority = priority
+        self.deadline = deadline
+        self.state = QUEUED
+        self.submitted = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.result = None  # gencad_engine.GenerationResult once generation returns
+        self.options = dict(options or {})  # passed through to the queue's finish hook
+        self.outputs = {}  # whatever the finish hook produced (headless run, exported files)
+        self.error = None
+        self.cancel = CancelToken()
+        self.timed_out = False
+
+    @property
+    def done(self):
+        return self.state in FINISHED_STATES
+
+    def elapsed(self):
+        """Seconds since the job started running (or waiting, while queued)"""
+        start = self.started or self.submitted
+        return (self.finished or time.monotonic()) - start
+
+    def describe(self, width=60):
+        """One line for the job list"""
+        prompt = self.prompt if len(self.prompt) <= width else self.prompt[:width - 3] + "..."
+        priority = f" +{self.priority}" if self.priority else ""
+        return f"#{self.id:<3} {self.state:<9} {format_seconds(self.elapsed()):>7}{priority}  {prompt}"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'prompt': self.prompt,
+            'priority': self.priority,
+            'state': self.state,
+            'elapsed_seconds': round(self.elapsed(), 3),
+            'error': self.error,
+            'options': self.options,
+            'result': self.result.to_dict() if self.result else None,
+            'outputs': self.outputs
+        }
+
+
+class JobQueue:
+    """Priority queue of generation jobs served by at most `workers` threads.
+
+    on_change(job) is called from worker threads whenever a job changes state. finish(job), if
+    given, runs after a successful generation instead of the FreeCAD launch and returns an
+    error message or None.
+    """
+
+    def __init__(self, engine, workers=DEFAULT_WORKERS, deadline=DEFAULT_DEADLINE, launch=True,
+                 on_change=None, max_finished=MAX_FINISHED_JOBS, finish=None):
+        self.engine = engine
+        self.workers = workers
+        self.deadline = deadline
+        self.launch = launch
+        self.on_change = on_change
+        self.finish = finish
+        self.max_finished = max_finished
+        self._jobs = []   # every job still listed, in submission order
+        self._heap = []   # (-priority, sequence, job) for queued jobs
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._threads = []
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def submit(self, prompt, priority=0, deadline=None, options=None):
+        """Queue a prompt and return its Job"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Job queue is closed")
+            job = Job(next(self._ids), prompt, priority, deadline or self.deadline, options)
+            self._jobs.append(job)
+            heapq.heappush(self._heap, (-priority, next(self._sequence), job))
+            if len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._worker, daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            self._condition.notify()
+        self._changed(job)
+        return job
+
+    def jobs(self):
+        """Snapshot of the listed jobs, oldest first"""
+        with self._condition:
+            return list(self._jobs)
+
+    def get(self, job_id):
+        with self._condition:
+            for job in self._jobs:
+                if job.id == job_id:
+                    return job
+        return None
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns False if it already finished"""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel.cancel()
+        with self._condition:
+            # A queued job is finished right away; a running one stops at its next checkpoint
+            if job.state == QUEUED:
+                self._finish(job, CANCELLED)
+        self._changed(job)
+        return True
+
+    def bump(self, job_id):
+        """Raise a queued job's priority so it runs before jobs that were ahead of it"""
+        with self._condition:
+            job = next((job for job in self._jobs if job.id == job_id), None)
+            if job is None or job.state != QUEUED:
+                return False
+            job.priority = max([-entry[0] for entry in self._heap] + [0]) + 1
+            self._heap = [entry for entry in self._heap if entry[2] is not job]
+            self._heap.append((-job.priority, next(self._sequence), job))
+            heapq.heapify(self._heap)
+        self._changed(job)
+        return True
+
+    def counts(self):
+        """Number of listed jobs in each state"""
+        counts = {}
+        for job in self.jobs():
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
+    def close(self):
+        """Cancel every unfinished job and stop the worker threads"""
+        with self._condition:
+            self._closed = True
+            pending = [job for job in self._jobs if not job.done]
+            self._condition.notify_all()
+        for job in pending:
+            self.cancel(job.id)
+
+    def _changed(self, job):
+        if self.on_change:
+            self.on_change(job)
+
+    def _finish(self, job, state):
+        """Mark a job finished and drop the oldest finished jobs beyond max_finished (lock held)"""
+        job.state = state
+        job.finished = time.monotonic()
+        finished = [listed for listed in self._jobs if listed.done]
+        for old in finished[:max(0, len(finished) - self.max_finished)]:
+            self._jobs.remove(old)
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                while self._heap:
+                    job = heapq.heappop(self._heap)[2]
+                    if job.state == QUEUED:  # cancelled jobs stay in the heap until popped
+                        job.state = RUNNING
+                        job.started = time.monotonic()
+                        return job
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            self._changed(job)
+            timer = threading.Timer(job.deadline, self._expire, args=(job,))
+            timer.daemon = True
+            timer.start()
+            try:
+                state = self._run(job)
+            except Exception as e:
+                job.error = f"Unexpected error: {e}"
+                state = FAILED
+            finally:
+                timer.cancel()
+            if job.cancel.cancelled and state != DONE:
+                state = TIMED_OUT if job.timed_out else CANCELLED
+            with self._condition:
+                self._finish(job, state)
+            self._changed(job)
+
+    def _expire(self, job):
+        job.timed_out = True
+        job.cancel.cancel()
+        self.engine.report(f"Job #{job.id} exceeded its {job.deadline:.0f}s deadline and was stopped.")
+
+    def _run(self, job):
+        """Generate, validate and launch one job, checking for cancellation between stages"""
+        result = job.result = self.engine.generate(job.prompt, cancel=job.cancel,
+                                                   assembly=job.options.get('assembly', False))
+        if not result.ok:
+            job.error = result.error
+            return FAILED
+        if job.cancel.cancelled:
+            self.engine.cleanup_temp_file(result.script_path)
+            return CANCELLED
+        if self.finish is not None:
+            job.error = self.finish(job)
+            return FAILED if job.error else DONE
+        if self.launch and not self.engine.launch_freecad(result.script_path, trace=result.trace):
+            job.error = "FreeCAD could not be launched"
+            return FAILED
+        return DONE
@@ -0,0 +1,192 @@
+"""
+GenCAD AI - Status Log
+Bounded in-memory model of the status panel plus a rotating JSON-lines journal on disk.
+The view keeps only the last max_lines lines, so memory use and insert time stay flat
+however long the session runs; the journal keeps the full history.
+"""
+
+import collections
+import json
+import os
+import re
+import threading
+import time
+
+from gencad_status import STATUS, TOKENS, format_status
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+LEVEL_RANK = {level: rank for rank, level in enumerate(LEVELS)}
+TOKEN_LEVEL = 'DEBUG'  # streamed model output
+
+DEFAULT_MAX_LINES = 2000
+DEFAULT_JOURNAL_FILE = os.path.join(
+    os.environ.get("XDG_STATE_HOME", os.path.join(os.path.expanduser("~"), ".local", "state")),
+    "gencad_ai", "status.jsonl"
+)
+DEFAULT_JOURNAL_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_JOURNAL_BACKUPS = 5
+DEFAULT_JOURNAL_BUFFER = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+
+_ERROR_PATTERN = re.compile(r'^(error|fatal)\b|failed', re.IGNORECASE)
+_WARNING_PATTERN = re.compile(r'^warning\b|retrying|hallucination|stopped early', re.IGNORECASE)
+
+
+def level_for(message):
+    """Infer the level of an engine status message from its wording"""
+    if _ERROR_PATTERN.search(message):
+        return 'ERROR'
+    if _WARNING_PATTERN.search(message):
+        return 'WARNING'
+    return 'INFO'
+
+
+class Journal:
+    """Append-only, buffered JSON-lines file that rotates to path.1 ... path.N when full"""
+
+    def __init__(self, path=DEFAULT_JOURNAL_FILE, max_bytes=DEFAULT_JOURNAL_MAX_BYTES,
+                 backups=DEFAULT_JOURNAL_BACKUPS, buffer_size=DEFAULT_JOURNAL_BUFFER,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.records = 0
+        self.rotations = 0
+        self._file = None
+        self._size = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8', buffering=self.buffer_size)
+        self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        for n in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{n}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{n + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.rotations += 1
+        self._open()
+
+    def write(self, record):
+        """Append one record; errors writing the journal never reach the caller"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._open()
+                self._file.write(line)
+                self._size += len(line.encode('utf-8'))
+                self.records += 1
+                if self._size >= self.max_bytes:
+                    self._rotate()
+                elif time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._file.flush()
+                    self._last_flush = time.monotonic()
+            except (IOError, OSError):
+                pass
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.flush()
+                except (IOError, OSError):
+                    pass
+                self._last_flush = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                try:
+                    self._file.close()
+                except (IOError, OSError):
+                    pass
+                self._file = None
+
+
+class StatusLog:
+    """Ring buffer of the last max_lines status lines, filtered by a minimum level"""
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, journal=None, min_level='DEBUG'):
+        self.max_lines = max_lines
+        self.journal = journal
+        self.min_level = min_level
+        self.total_lines = 0
+        self._lines = collections.deque(maxlen=max_lines)  # (level, text ending in '\n')
+        self._partial = ""  # streamed text after the last newline
+
+    @property
+    def dropped_lines(self):
+        return self.total_lines - len(self._lines)
+
+    def visible(self, level):
+        return LEVEL_RANK[level] >= LEVEL_RANK[self.min_level]
+
+    def _push(self, level, line):
+        self._lines.append((level, line))
+        self.total_lines += 1
+
+    def add(self, events):
+        """Record a batch of status/token events; returns the text to append to the view"""
+        out = []
+        tokens = []
+        for event in events:
+            if event.kind == STATUS:
+                level = event.level or level_for(event.text)
+                line = format_status(event)
+                if self._partial:
+                    # A status line always starts on its own line
+                    self._push(TOKEN_LEVEL, self._partial + "\n")
+                    self._partial = ""
+                    if self.visible(TOKEN_LEVEL):
+                        out.append("\n")
+                self._push(level, line)
+                if self.visible(level):
+                    out.append(line)
+                self._journal_tokens(tokens)
+                self._journal(event, level, event.text)
+            elif event.kind == TOKENS:
+                *complete, self._partial = (self._partial + event.text).split("\n")
+                for text in complete:
+                    self._push(TOKEN_LEVEL, text + "\n")
+                if self.visible(TOKEN_LEVEL):
+                    out.append(event.text)
+                tokens.append(event)
+        self._journal_tokens(tokens)
+        return "".join(out)
+
+    def _journal(self, event, level, text):
+        if self.journal is not None:
+            self.journal.write({'ts': round(event.timestamp, 3), 'level': level, 'kind': event.kind,
+                                'job_id': event.job_id, 'text': text})
+
+    def _journal_tokens(self, tokens):
+        """Write a run of streamed chunks as one record instead of one per chunk"""
+        if tokens:
+            self._journal(tokens[0], TOKEN_LEVEL, "".join(event.text for event in tokens))
+            del tokens[:]
+
+    def set_level(self, level):
+        """Change the filter; returns the full text the view should now show"""
+        if level not in LEVEL_RANK:
+            raise ValueError(f"Unknown log level: {level}")
+        self.min_level = level
+        return self.view_text()
+
+    def view_text(self):
+        """Text of every retained line that passes the filter"""
+        text = "".join(line for level, line in self._lines if self.visible(level))
+        if self._partial and self.visible(TOKEN_LEVEL):
+            text += self._partial
+        return text
@@ -0,0 +1,299 @@
+"""
+GenCAD AI - Tracing and Metrics
+Records a timed span for every stage of every generation job (prompt, cache, request,
+extract, validate, save, execute, export, launch) together with per-job attributes such as
+prompt size, Gemini token counts, retries and cache hits. Aggregates export as Prometheus
+text or as a JSON summary with p50/p95/p99 per stage.
+"""
+
+import collections
+import contextlib
+import itertools
+import math
+import threading
+import time
+
+# Histogram bucket upper bounds in seconds, from validator-fast to cold-FreeCAD-slow
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+DEFAULT_MAX_SAMPLES = 10000  # per stage, for percentiles
+DEFAULT_MAX_SPANS = 10000    # recent spans kept for inspection
+
+Span = collections.namedtuple('Span', ['job_id', 'stage', 'started', 'duration', 'attrs'])
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values), max(1, math.ceil(fraction * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+class Histogram:
+    """Cumulative-bucket histogram plus a bounded sample window for percentiles"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, max_samples=DEFAULT_MAX_SAMPLES):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.samples = collections.deque(maxlen=max_samples)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def summary(self):
+        values = sorted(self.samples)
+        return {
+            'count': self.count,
+            'mean': round(self.sum / self.count, 6) if self.count else 0.0,
+            'p50': round(percentile(values, 0.50), 6),
+            'p95': round(percentile(values, 0.95), 6),
+            'p99': round(percentile(values, 0.99), 6),
+            'max': round(self.max, 6)
+        }
+
+
+class JobTrace:
+    """Spans and attributes of one job; created by Tracer.job()"""
+
+    def __init__(self, tracer, job_id, attrs):
+        self.tracer = tracer
+        self.job_id = job_id
+        self.attrs = dict(attrs)
+        self.timings = collections.OrderedDict()  # stage -> seconds, in the order stages ran
+        self.started = time.monotonic()
+        self.finished = False
+
+    @contextlib.contextmanager
+    def span(self, stage, **attrs):
+        """Time the enclosed block as one stage of this job"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, time.monotonic() - started, started, attrs)
+
+    def record(self, stage, duration, started=None, attrs=None):
+        self.timings[stage] = self.timings.get(stage, 0.0) + duration
+        self.tracer.record(Span(self.job_id, stage, started or time.monotonic() - duration, duration, attrs or {}))
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def incr(self, name, amount=1):
+        self.attrs[name] = self.attrs.get(name, 0) + amount
+
+    def finish(self, outcome):
+        """Record the job's total time and outcome ('ok' or 'error'); later calls are ignored"""
+        if self.finished:
+            return
+        self.finished = True
+        self.attrs['outcome'] = outcome
+        total = time.monotonic() - self.started
+        self.timings['total'] = total
+        self.tracer.record(Span(self.job_id, 'total', self.started, total, dict(self.attrs)))
+        self.tracer.finish_job(self)
+
+    def breakdown(self):
+        """One-line per-stage summary for the status panel"""
+        parts = [f"{stage} {format_seconds(seconds)}" for stage, seconds in self.timings.items() if stage != 'total']
+        line = " | ".join(parts) or "no stages"
+        if 'total' in self.timings:
+            line += f" (total {format_seconds(self.timings['total'])})"
+        extras = []
+        if self.attrs.get('cache_hit'):
+            extras.append("cache hit")
+        if self.attrs.get('template_hit'):
+            extras.append("template reuse")
+        if self.attrs.get('backend'):
+            extras.append(f"{self.attrs['backend']} backend")
+        if self.attrs.get('coalesced'):
+            extras.append("shared request")
+        if self.attrs.get('parts'):
+            extras.append(f"assembly of {self.attrs['parts']} parts")
+        if self.attrs.get('candidates'):
+            winner = self.attrs.get('candidate_winner')
+            extras.append(f"candidate {winner + 1}/{self.attrs['candidates']} won" if winner is not None
+                          else f"no valid candidate of {self.attrs['candidates']}")
+        if self.attrs.get('repairs'):
+            extras.append(f"{self.attrs['repairs']} repairs")
+        if self.attrs.get('retries'):
+            extras.append(f"{self.attrs['retries']} retries")
+        if self.attrs.get('response_tokens'):
+            extras.append(f"{self.attrs.get('prompt_tokens', 0)}+{self.attrs['response_tokens']} tokens")
+        return line + (f" [{', '.join(extras)}]" if extras else "")
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'timings': {stage: round(seconds, 6) for stage, seconds in self.timings.items()},
+            'attrs': self.attrs
+        }
+
+
+def format_seconds(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+
+class Tracer:
+    """Thread-safe collector of spans, stage histograms and job counters"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, max_samples=DEFAULT_MAX_SAMPLES, max_spans=DEFAULT_MAX_SPANS):
+        self.buckets = buckets
+        self.max_samples = max_samples
+        self.spans = collections.deque(maxlen=max_spans)
+        self.histograms = collections.OrderedDict()
+        self.counters = collections.Counter()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def job(self, **attrs):
+        """Start tracing a new job"""
+        return JobTrace(self, next(self._ids), attrs)
+
+    def record(self, span):
+        with self._lock:
+            self.spans.append(span)
+            histogram = self.histograms.get(span.stage)
+            if histogram is None:
+                histogram = self.histograms[span.stage] = Histogram(self.buckets, self.max_samples)
+            histogram.observe(span.duration)
+
+    def finish_job(self, trace):
+        attrs = trace.attrs
+        with self._lock:
+            self.counters[f"jobs_{attrs.get('outcome', 'ok')}"] += 1
+            if 'backend' in attrs:
+                self.counters['backend_hits' if attrs['backend'] else 'backend_misses'] += 1
+                if attrs['backend']:
+                    self.counters['backend_seconds'] += trace.timings.get('backend', 0.0)
+            if 'cache_hit' in attrs:
+                self.counters['cache_hits' if attrs['cache_hit'] else 'cache_misses'] += 1
+            if 'template_hit' in attrs:
+                self.counters['template_hits' if attrs['template_hit'] else 'template_misses'] += 1
+            self.counters['retries'] += attrs.get('retries', 0)
+            self.counters['repairs'] += attrs.get('repairs', 0)
+            self.counters['coalesced'] += 1 if attrs.get('coalesced') else 0
+            if attrs.get('parts'):
+                self.counters['assemblies'] += 1
+                self.counters['assembly_parts'] += attrs['parts']
+            if 'candidate_winner' in attrs:
+                winner = attrs['candidate_winner']
+                self.counters['candidate_wins_none' if winner is None else f'candidate_wins_{winner}'] += 1
+            self.counters['prompt_tokens'] += attrs.get('prompt_tokens', 0)
+            self.counters['response_tokens'] += attrs.get('response_tokens', 0)
+            self.counters['prompt_chars'] += attrs.get('prompt_chars', 0)
+
+    def summary(self):
+        """JSON-friendly per-stage latency percentiles and job counters"""
+        with self._lock:
+            summary = {
+                'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+                'counters': dict(self.counters)
+            }
+            request = self.histograms.get('request')
+            hits, misses = self.counters['backend_hits'], self.counters['backend_misses']
+            cache_hits, template_hits = self.counters['cache_hits'], self.counters['template_hits']
+            # Templates are only consulted after an exact-cache miss, so either count covers every lookup
+            lookups = cache_hits + max(self.counters['cache_misses'], template_hits + self.counters['template_misses'])
+        if lookups:
+            summary['effective_cache'] = {'exact_hits': cache_hits, 'template_hits': template_hits, 'lookups': lookups,
+                                          'hit_rate': round((cache_hits + template_hits) / lookups, 3)}
+        if hits or misses:
+            # Each local answer saves one Gemini request at the mean latency seen so far
+            saved = None
+            if request is not None and request.count:
+                saved = round(hits * request.sum / request.count - summary['counters'].get('backend_seconds', 0.0), 6)
+            summary['fast_path'] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3),
+                                    'saved_seconds': saved}
+        return summary
+
+    def format_summary(self):
+        """One-line p50/p95 per stage across every job so far, for the status panel"""
+        summary = self.summary()
+        parts = [f"{stage} {format_seconds(s['p50'])}/{format_seconds(s['p95'])}"
+                 for stage, s in summary['stages'].items() if s['count']]
+        line = "p50/p95: " + (" | ".join(parts) or "no jobs yet")
+        fast_path = summary.get('fast_path')
+        if fast_path and fast_path['hits']:
+            line += f"; local {fast_path['hits']}/{fast_path['hits'] + fast_path['misses']}"
+            if fast_path['saved_seconds']:
+                line += f" (saved ~{format_seconds(fast_path['saved_seconds'])})"
+        reuse = summary.get('effective_cache')
+        if reuse and reuse['template_hits']:
+            line += f"; reused {reuse['exact_hits'] + reuse['template_hits']}/{reuse['lookups']}"
+        return line
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP gencad_stage_duration_seconds Time spent in each pipeline stage.",
+            "# TYPE gencad_stage_duration_seconds histogram"
+        ]
+        with self._lock:
+            for stage, histogram in self.histograms.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'gencad_stage_duration_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'gencad_stage_duration_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'gencad_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.sum:.6f}')
+                lines.append(f'gencad_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+            counters = dict(self.counters)
+
+        lines += [
+            "# HELP gencad_jobs_total Generation jobs by outcome.",
+            "# TYPE gencad_jobs_total counter",
+            f'gencad_jobs_total{{outcome="ok"}} {counters.get("jobs_ok", 0)}',
+            f'gencad_jobs_total{{outcome="error"}} {counters.get("jobs_error", 0)}',
+            "# HELP gencad_cache_lookups_total Response cache lookups by result.",
+            "# TYPE gencad_cache_lookups_total counter",
+            f'gencad_cache_lookups_total{{result="hit"}} {counters.get("cache_hits", 0)}',
+            f'gencad_cache_lookups_total{{result="miss"}} {counters.get("cache_misses", 0)}',
+            "# HELP gencad_template_lookups_total Script template lookups by result, after an exact-cache miss.",
+            "# TYPE gencad_template_lookups_total counter",
+            f'gencad_template_lookups_total{{result="hit"}} {counters.get("template_hits", 0)}',
+            f'gencad_template_lookups_total{{result="miss"}} {counters.get("template_misses", 0)}',
+            "# HELP gencad_retries_total Gemini API retries.",
+            "# TYPE gencad_retries_total counter",
+            f'gencad_retries_total {counters.get("retries", 0)}',
+            "# HELP gencad_backend_jobs_total Jobs answered by a local backend (hit) or sent on to Gemini (miss).",
+            "# TYPE gencad_backend_jobs_total counter",
+            f'gencad_backend_jobs_total{{result="hit"}} {counters.get("backend_hits", 0)}',
+            f'gencad_backend_jobs_total{{result="miss"}} {counters.get("backend_misses", 0)}',
+            "# HELP gencad_repairs_total Follow-up requests asking Gemini to fix a rejected script.",
+            "# TYPE gencad_repairs_total counter",
+            f'gencad_repairs_total {counters.get("repairs", 0)}',
+            "# HELP gencad_coalesced_total Jobs that shared an identical in-flight Gemini request.",
+            "# TYPE gencad_coalesced_total counter",
+            f'gencad_coalesced_total {counters.get("coalesced", 0)}',
+            "# HELP gencad_assemblies_total Jobs split into separately generated parts.",
+            "# TYPE gencad_assemblies_total counter",
+            f'gencad_assemblies_total {counters.get("assemblies", 0)}',
+            "# HELP gencad_assembly_parts_total Parts generated for split jobs.",
+            "# TYPE gencad_assembly_parts_total counter",
+            f'gencad_assembly_parts_total {counters.get("assembly_parts", 0)}',
+            "# HELP gencad_candidate_wins_total Multi-candidate jobs by the index of the first valid candidate.",
+            "# TYPE gencad_candidate_wins_total counter",
+        ]
+        lines += [f'gencad_candidate_wins_total{{index="{name[len("candidate_wins_"):]}"}} {count}'
+                  for name, count in sorted(counters.items()) if name.startswith('candidate_wins_')]
+        lines += [
+            "# HELP gencad_tokens_total Gemini tokens reported by usageMetadata.",
+            "# TYPE gencad_tokens_total counter",
+            f'gencad_tokens_total{{type="prompt"}} {counters.get("prompt_tokens", 0)}',
+            f'gencad_tokens_total{{type="response"}} {counters.get("response_tokens", 0)}',
+            "# HELP gencad_prompt_chars_total Characters of user prompts.",
+            "# TYPE gencad_prompt_chars_total counter",
+            f'gencad_prompt_chars_total {counters.get("prompt_chars", 0)}'
+        ]
+        return "\n".join(lines) + "\n"
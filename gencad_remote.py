@@ -0,0 +1,266 @@
+"""
+GenCAD AI - Service Client
+Talks to a running gencad_server.py, so the command line and the desktop app can share its
+cache, Gemini connection and warm FreeCAD workers. Uses only the standard library.
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from gencad_jobs import DONE, FAILED, FINISHED_STATES, Job
+
+POLL_INTERVAL = 0.25  # seconds between job polls
+REQUEST_TIMEOUT = 30
+
+
+class ServiceError(Exception):
+    """The service could not be reached or rejected a request"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceClient:
+    """JSON client for the gencad_server.py HTTP API"""
+
+    def __init__(self, base_url, timeout=REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, method, path, body=None, raw=False):
+        data = json.dumps(body).encode('utf-8') if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            request.add_header('Content-Type', 'application/json')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = response.read()
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read())['error']
+            except (ValueError, KeyError, TypeError):
+                message = e.reason
+            raise ServiceError(f"{e.code} {message}", e.code)
+        except (urllib.error.URLError, OSError) as e:
+            raise ServiceError(f"Cannot reach GenCAD service at {self.base_url}: {getattr(e, 'reason', e)}")
+        return payload if raw else json.loads(payload)
+
+    def health(self):
+        return self._request('GET', '/health')
+
+    def submit(self, prompt, priority=0, execute=False, formats=None, tolerance=None, assembly=False):
+        """Queue a generation job; returns its job dict"""
+        body = {'prompt': prompt, 'priority': priority, 'execute': execute, 'formats': list(formats or []),
+                'assembly': assembly}
+        if tolerance is not None:
+            body['tolerance'] = tolerance
+        return self._request('POST', '/jobs', body)
+
+    def job(self, job_id):
+        return self._request('GET', f'/jobs/{job_id}')
+
+    def jobs(self):
+        return self._request('GET', '/jobs')['jobs']
+
+    def cancel(self, job_id):
+        return self._request('DELETE', f'/jobs/{job_id}')['cancelled']
+
+    def bump(self, job_id):
+        return self._request('POST', f'/jobs/{job_id}/bump')['bumped']
+
+    def script(self, job_id):
+        """Text of a finished job's validated script"""
+        return self._request('GET', f'/jobs/{job_id}/script', raw=True).decode('utf-8')
+
+    def validate(self, script):
+        return self._request('POST', '/validate', {'script': script})
+
+    def export(self, script, formats=None, tolerance=None):
+        body = {'script': script, 'formats': list(formats or [])}
+        if tolerance is not None:
+            body['tolerance'] = tolerance
+        return self._request('POST', '/export', body)
+
+    def download(self, link, path):
+        """Save a file link from an export (e.g. /files/<hash>/model.stl) to path"""
+        data = self._request('GET', link, raw=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def history(self, query="", limit=None):
+        """Past generations on the service whose prompts contain every word of query"""
+        params = {'q': query}
+        if limit is not None:
+            params['limit'] = limit
+        return self._request('GET', '/history?' + urllib.parse.urlencode(params))['entries']
+
+    def history_script(self, entry_id):
+        """Text of a past generation's script, to reopen without another API call"""
+        return self._request('GET', f'/history/{entry_id}/script', raw=True).decode('utf-8')
+
+    def metrics(self):
+        return self._request('GET', '/metrics', raw=True).decode('utf-8')
+
+    def wait(self, job_id, on_update=None, poll_interval=POLL_INTERVAL, timeout=None):
+        """Poll a job until it finishes; on_update(job dict) is called whenever its state changes"""
+        started = time.monotonic()
+        state = None
+        while True:
+            job = self.job(job_id)
+            if job['state'] != state:
+                state = job['state']
+                if on_update:
+                    on_update(job)
+            if state in FINISHED_STATES:
+                return job
+            if timeout is not None and time.monotonic() - started > timeout:
+                raise ServiceError(f"Job {job_id} still {state} after {timeout:.0f}s")
+            time.sleep(poll_interval)
+
+
+class RemoteJob(Job):
+    """Local mirror of a job queued on the service"""
+
+    def __init__(self, data):
+        super().__init__(data['id'], data['prompt'], data['priority'], None, data.get('options'))
+        self.update(data)
+
+    def update(self, data):
+        """Copy the service's view of the job; returns True if its state changed"""
+        changed = data['state'] != self.state
+        self.state = data['state']
+        self.priority = data['priority']
+        self.error = data['error']
+        self.outputs = data['outputs']
+        self.remote_result = data['result']
+        self._elapsed = data['elapsed_seconds']
+        return changed
+
+    def elapsed(self):
+        return self._elapsed
+
+
+class RemoteJobQueue:
+    """Drop-in for gencad_jobs.JobQueue that runs jobs on the service and launches FreeCAD locally.
+
+    A polling thread mirrors the service's jobs; on_change(job) is called from it whenever a
+    job changes state. Finished scripts are downloaded and opened with engine.launch_freecad.
+    """
+
+    def __init__(self, client, engine, launch=True, on_change=None, poll_interval=POLL_INTERVAL):
+        self.client = client
+        self.engine = engine
+        self.launch = launch
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def submit(self, prompt, priority=0, deadline=None, options=None):
+        """Queue a prompt on the service and return its RemoteJob (deadline is the service's).
+
+        Returns None, after reporting why, if the service is unreachable or rejects the request.
+        This makes an HTTP request: call it from a worker thread, never the Tk main loop.
+        """
+        try:
+            job = RemoteJob(self.client.submit(prompt, priority, **(options or {})))
+        except ServiceError as e:
+            self.engine.report(f"Error: Could not queue the job - {e}")
+            return None
+        with self._lock:
+            self._jobs[job.id] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll, daemon=True)
+                self._thread.start()
+        self._wake.set()
+        self._changed(job)
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.id)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        try:
+            return self.client.cancel(job_id)
+        except ServiceError as e:
+            self.engine.report(f"Error: {e}")
+            return False
+
+    def bump(self, job_id):
+        try:
+            return self.client.bump(job_id)
+        except ServiceError as e:
+            self.engine.report(f"Error: {e}")
+            return False
+
+    def counts(self):
+        counts = {}
+        for job in self.jobs():
+            counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
+    def close(self):
+        """Cancel unfinished jobs on the service and stop polling"""
+        for job in self.jobs():
+            if not job.done:
+                self.cancel(job.id)
+        self._closed = True
+        self._wake.set()
+
+    def _changed(self, job):
+        if self.on_change:
+            self.on_change(job)
+
+    def _poll(self):
+        while not self._closed:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            pending = [job for job in self.jobs() if not job.done]
+            if not pending:
+                continue
+            try:
+                remote = {data['id']: data for data in self.client.jobs()}
+            except ServiceError as e:
+                self.engine.report(f"Error: {e}")
+                continue
+            for job in pending:
+                data = remote.get(job.id)
+                if data is None:
+                    job.state, job.error = FAILED, "The service no longer lists this job"
+                    self._changed(job)
+                    continue
+                # Hold the final state back until the local launch has happened
+                finished = data['state'] == DONE and self.launch
+                if finished:
+                    data = dict(data, state=job.state)
+                if job.update(data):
+                    self._changed(job)
+                if finished:
+                    job.state = self._launch(job)
+                    self._changed(job)
+
+    def _launch(self, job):
+        """Download a finished job's script and open it in the local FreeCAD"""
+        try:
+            script_path = self.engine.save_script(self.client.script(job.id))
+        except (ServiceError, IOError) as e:
+            job.error = f"Could not download the script: {e}"
+            return FAILED
+        if not self.engine.launch_freecad(script_path):
+            job.error = "FreeCAD could not be launched"
+            return FAILED
+        return DONE
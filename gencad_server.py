@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+GenCAD AI - Local Service
+Long-running HTTP service that shares one engine between every client on the machine or
+network: one response cache and template store, one pooled Gemini connection and rate limiter,
+and one pool of warm headless FreeCAD workers.
+
+    POST   /jobs               {"prompt", "priority", "execute", "formats", "tolerance", "assembly"} -> 202 job
+    GET    /jobs               every listed job
+    GET    /jobs/<id>          poll one job
+    DELETE /jobs/<id>          cancel it
+    POST   /jobs/<id>/bump     run it next
+    GET    /jobs/<id>/script   download the validated script
+    POST   /validate           {"script"} -> analysis
+    POST   /export             {"script", "formats", "tolerance"} -> exported file links
+    GET    /files/<hash>/<name> download an exported file
+    GET    /history?q=&limit=  search the generation history
+    GET    /history/<id>/script download a past script
+    GET    /health, /metrics   liveness and Prometheus metrics
+
+Usage: python3 gencad_server.py [--port 8753]; clients use gencad_remote.py (gencad_cli.py --server URL).
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from gencad_analyzer import analyze_script
+from gencad_assembly import DEFAULT_MAX_PARTS
+from gencad_backends import default_backends
+from gencad_cache import DEFAULT_CACHE_DIR, ResponseCache
+from gencad_client import GeminiClient, TokenBucket
+from gencad_engine import DEFAULT_REPAIR_ATTEMPTS, GEMINI_API_URL, GenerationEngine
+from gencad_export import DEFAULT_MESH_CACHE_DIR, DEFAULT_TOLERANCE, MeshCache, parse_formats
+from gencad_history import DEFAULT_HISTORY_FILE, DEFAULT_LIMIT, History
+from gencad_jobs import DEFAULT_DEADLINE, DEFAULT_WORKERS, JobQueue
+from gencad_templates import DEFAULT_TEMPLATE_DIR, TemplateStore
+from gencad_workers import WorkerPool
+from gencad_workspace import DEFAULT_WORKSPACE_DIR, Workspace
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8753
+MAX_BODY_BYTES = 1024 * 1024
+
+_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class RequestError(Exception):
+    """A client error, answered with the given HTTP status and message"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _formats(value):
+    """Export formats from a JSON list or comma-separated string; RequestError if unknown"""
+    if not value:
+        return ()
+    try:
+        return parse_formats(value if isinstance(value, str) else ",".join(value))
+    except ValueError as e:
+        raise RequestError(400, str(e))
+
+
+def _tolerance(value):
+    """STL tessellation tolerance in mm from a request body; RequestError unless a positive number"""
+    if value is None:
+        return DEFAULT_TOLERANCE
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < float('inf'):
+        raise RequestError(400, "'tolerance' must be a positive number (mm)")
+    return float(value)
+
+
+class GenCADService:
+    """Generation jobs, validation and export on one shared engine"""
+
+    def __init__(self, engine, workers=DEFAULT_WORKERS, deadline=DEFAULT_DEADLINE):
+        self.engine = engine
+        self.queue = JobQueue(engine, workers=workers, deadline=deadline, launch=False, finish=self._finish_job)
+
+    def submit(self, request):
+        """Queue a generation job from a request body; returns the Job"""
+        prompt = request.get('prompt')
+        if not isinstance(prompt, str) or not prompt.strip():
+            raise RequestError(400, "'prompt' must be a non-empty string")
+        formats = _formats(request.get('formats'))
+        if (request.get('execute') or formats) and self.engine.worker_pool is None:
+            raise RequestError(400, "This service has no headless FreeCAD workers")
+        options = {'execute': bool(request.get('execute')), 'formats': list(formats),
+                   'tolerance': _tolerance(request.get('tolerance')), 'assembly': bool(request.get('assembly'))}
+        try:
+            priority = int(request.get('priority', 0))
+        except (TypeError, ValueError):
+            raise RequestError(400, "'priority' must be an integer")
+        return self.queue.submit(prompt.strip(), priority=priority, options=options)
+
+    def job(self, job_id):
+        job = self.queue.get(job_id)
+        if job is None:
+            raise RequestError(404, f"No job {job_id}")
+        return job
+
+    def _finish_job(self, job):
+        """Run or export a generated script as the job's options ask; returns an error or None"""
+        result = job.result
+        if job.options.get('formats'):
+            export = self._export(result.script_path, job.options['formats'], job.options['tolerance'], result.trace)
+            job.outputs['export'] = export
+            return export['error']
+        if job.options.get('execute'):
+            execution = self.engine.execute_headless(result.script_path, trace=result.trace)
+            # A script that passes validation can still fail in FreeCAD; send the traceback back
+            for _ in range(self.engine.repair_attempts):
+                if execution is None or execution.get('ok'):
+                    break
+                problem = execution.get('traceback') or execution.get('error')
+                if not self.engine.repair_script(result, [f"FreeCAD raised: {problem}"]):
+                    break
+                execution = self.engine.execute_headless(result.script_path, trace=result.trace)
+            job.outputs['execution'] = execution
+            if not execution or not execution.get('ok'):
+                return f"FreeCAD execution failed: {execution.get('error') if execution else 'worker error'}"
+        return None
+
+    def _export(self, script_path, formats, tolerance, trace=None):
+        export = self.engine.export_model(script_path, None, formats, tolerance, trace=trace)
+        if export is None:
+            return {'error': "Export failed: no FreeCAD worker or workspace", 'files': {}}
+        files = {fmt: f"/files/{os.path.basename(os.path.dirname(path))}/{os.path.basename(path)}"
+                 for fmt, path in export.artifacts.items()}
+        return {'error': export.error, 'files': files, 'cached': export.cached}
+
+    def validate(self, request):
+        """Analyze a script without saving or running it"""
+        script = request.get('script')
+        if not isinstance(script, str):
+            raise RequestError(400, "'script' must be a string")
+        analysis = analyze_script(script)
+        return {'ok': analysis.ok, 'message': analysis.message, 'stats': analysis.stats,
+                'violations': [violation._asdict() for violation in analysis.violations]}
+
+    def export(self, request):
+        """Validate, store and export a script supplied by the client"""
+        if self.engine.worker_pool is None:
+            raise RequestError(400, "This service has no headless FreeCAD workers")
+        validation = self.validate(request)
+        if not validation['ok']:
+            raise RequestError(422, f"Script validation failed - {validation['message']}")
+        formats = _formats(request.get('formats') or "step,stl,fcstd")
+        tolerance = _tolerance(request.get('tolerance'))
+        script_path = self.engine.save_script(request['script'])
+        export = self._export(script_path, formats, tolerance)
+        if export['error']:
+            raise RequestError(500, export['error'])
+        return export
+
+    def file_path(self, digest, name):
+        """Path of an exported file in the workspace, or None if it does not exist"""
+        workspace = self.engine.workspace
+        if workspace is None or not _DIGEST.match(digest) or name != os.path.basename(name) or name.startswith('.'):
+            return None
+        path = os.path.join(workspace.artifacts_dir, digest, name)
+        return path if os.path.isfile(path) else None
+
+    def history(self, query):
+        """Past generations matching the q= words, newest first"""
+        if self.engine.history is None:
+            raise RequestError(404, "This service keeps no history")
+        words = " ".join(query.get('q', []))
+        try:
+            limit = int(query.get('limit', [DEFAULT_LIMIT])[0])
+        except ValueError:
+            raise RequestError(400, "'limit' must be an integer")
+        return [entry._asdict() for entry in self.engine.history.search(words, limit)]
+
+    def history_script(self, entry_id):
+        """Stored script of a history entry"""
+        history = self.engine.history
+        entry = history.entry(entry_id) if history is not None else None
+        script = history.script(entry.script_hash) if entry and entry.script_hash else None
+        if script is None:
+            raise RequestError(404, f"No stored script for history entry {entry_id}")
+        return script
+
+    def close(self):
+        self.queue.close()
+        if self.engine.worker_pool is not None:
+            self.engine.worker_pool.close()
+        if self.engine.history is not None:
+            self.engine.history.close()
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Routes the JSON API to the server's GenCADService"""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        service = self.server.service
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        try:
+            body = self._read_json() if method == 'POST' else {}
+            if parts == ['health'] and method == 'GET':
+                return self._send_json(200, {'ok': True, 'jobs': service.queue.counts()})
+            if parts == ['metrics'] and method == 'GET':
+                return self._send(200, service.engine.tracer.prometheus().encode('utf-8'), "text/plain; version=0.0.4")
+            if parts == ['validate'] and method == 'POST':
+                return self._send_json(200, service.validate(body))
+            if parts == ['export'] and method == 'POST':
+                return self._send_json(200, service.export(body))
+            if parts == ['jobs'] and method == 'GET':
+                return self._send_json(200, {'jobs': [job.to_dict() for job in service.queue.jobs()]})
+            if parts == ['jobs'] and method == 'POST':
+                return self._send_json(202, service.submit(body).to_dict())
+            if len(parts) >= 2 and parts[0] == 'jobs':
+                return self._job_route(method, parts[1:])
+            if parts == ['history'] and method == 'GET':
+                return self._send_json(200, {'entries': service.history(parse_qs(url.query))})
+            if len(parts) == 3 and parts[0] == 'history' and parts[1].isdigit() and parts[2] == 'script' \
+                    and method == 'GET':
+                script = service.history_script(int(parts[1]))
+                return self._send(200, script.encode('utf-8'), "text/x-python; charset=utf-8",
+                                  f"gencad_history_{parts[1]}.py")
+            if len(parts) == 3 and parts[0] == 'files' and method == 'GET':
+                path = service.file_path(parts[1], parts[2])
+                if path is None:
+                    raise RequestError(404, "No such file")
+                with open(path, 'rb') as f:
+                    return self._send(200, f.read(), "application/octet-stream", parts[2])
+            raise RequestError(404, f"No route for {method} {self.path}")
+        except RequestError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': f"Unexpected error: {e}"})
+
+    def _job_route(self, method, parts):
+        service = self.server.service
+        if not parts[0].isdigit():
+            raise RequestError(404, f"No job {parts[0]}")
+        job = service.job(int(parts[0]))
+        if parts[1:] == [] and method == 'GET':
+            return self._send_json(200, job.to_dict())
+        if parts[1:] == [] and method == 'DELETE':
+            return self._send_json(200, {'cancelled': service.queue.cancel(job.id)})
+        if parts[1:] == ['bump'] and method == 'POST':
+            return self._send_json(200, {'bumped': service.queue.bump(job.id)})
+        if parts[1:] == ['script'] and method == 'GET':
+            if job.result is None or not job.result.ok:
+                raise RequestError(409, f"Job {job.id} has no valid script ({job.state})")
+            return self._send(200, job.result.script.encode('utf-8'), "text/x-python; charset=utf-8",
+                              f"gencad_job_{job.id}.py")
+        raise RequestError(404, f"No route for {method} {self.path}")
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(413, f"Request body over {MAX_BODY_BYTES} bytes")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            raise RequestError(400, f"Invalid JSON: {e}")
+        if not isinstance(body, dict):
+            raise RequestError(400, "Request body must be a JSON object")
+        return body
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode('utf-8'), "application/json")
+
+    def _send(self, status, body, content_type, filename=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if filename:
+            self.send_header('Content-Disposition', f'attachment; filename="{filename}"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            print_status(f"{self.address_string()} {format % args}")
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, verbose=False):
+    """HTTP server for service; call serve_forever() (port 0 picks a free port)"""
+    server = ThreadingHTTPServer((host, port), ServiceHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.verbose = verbose
+    return server
+
+
+def serve_in_background(service, host=DEFAULT_HOST, port=0):
+    """Start a server on a daemon thread and return it; its URL is server_url(server)"""
+    server = make_server(service, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def print_status(message):
+    """Print a timestamped status message to stderr"""
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    print(f"[{timestamp}] {message}", file=sys.stderr)
+
+
+def build_parser():
+    """Build the command line argument parser"""
+    parser = argparse.ArgumentParser(
+        prog="gencad_server.py",
+        description="Serve GenCAD AI generation, validation and export over a local HTTP API."
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Interface to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on (default: %(default)s)")
+    parser.add_argument("-j", "--workers", type=int, default=4, help="Jobs generated at the same time")
+    parser.add_argument("--freecad-workers", type=int, default=2,
+                        help="Warm headless FreeCAD processes for execute and export (0 disables both)")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE, help="Seconds each job may take")
+    parser.add_argument("--rate-limit", type=float, default=0, help="Maximum Gemini requests per minute (0 = unlimited)")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Request this many scripts in parallel per job and keep the first valid one")
+    parser.add_argument("--max-parts", type=int, default=DEFAULT_MAX_PARTS,
+                        help="Most parts an assembly job may be split into (default: %(default)s)")
+    parser.add_argument("--repair-attempts", type=int, default=DEFAULT_REPAIR_ATTEMPTS,
+                        help="Follow-up requests allowed to fix a rejected or failing script (default: %(default)s)")
+    parser.add_argument("--no-local", action="store_true",
+                        help="Always call Gemini, even for simple parts the local generator can build")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache and always call Gemini")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Directory of the response cache")
+    parser.add_argument("--no-templates", action="store_true",
+                        help="Do not reuse stored scripts for prompts that differ only in their dimensions")
+    parser.add_argument("--template-dir", default=DEFAULT_TEMPLATE_DIR, help="Directory of the script templates")
+    parser.add_argument("--mesh-cache-dir", default=DEFAULT_MESH_CACHE_DIR, help="Directory of the STL mesh cache")
+    parser.add_argument("--workspace-dir", default=DEFAULT_WORKSPACE_DIR,
+                        help="Directory where scripts and exported files are stored by content hash")
+    parser.add_argument("--no-history", action="store_true", help="Do not record jobs in the generation history")
+    parser.add_argument("--history-file", default=DEFAULT_HISTORY_FILE, help="SQLite generation history database")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Log every HTTP request")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress status messages")
+    return parser
+
+
+def main(argv=None):
+    """Command line entry point"""
+    args = build_parser().parse_args(argv)
+    workspace = Workspace(args.workspace_dir)
+    workspace.collect_garbage()
+    rate_limiter = TokenBucket(args.rate_limit / 60.0) if args.rate_limit else None
+    engine = GenerationEngine(
+        status_callback=None if args.quiet else print_status,
+        cache=None if args.no_cache else ResponseCache(args.cache_dir),
+        templates=None if args.no_cache or args.no_templates else TemplateStore(args.template_dir),
+        history=None if args.no_history else History(args.history_file),
+        client=GeminiClient(GEMINI_API_URL, rate_limiter=rate_limiter, pool_size=max(1, args.workers)),
+        worker_pool=WorkerPool(size=args.freecad_workers) if args.freecad_workers > 0 else None,
+        mesh_cache=None if args.no_cache else MeshCache(args.mesh_cache_dir),
+        workspace=workspace,
+        candidates=args.candidates,
+        repair_attempts=args.repair_attempts,
+        max_parts=args.max_parts,
+        backends=None if args.no_local else default_backends()
+    )
+    service = GenCADService(engine, workers=args.workers, deadline=args.deadline)
+    server = make_server(service, args.host, args.port, verbose=args.verbose)
+    print_status(f"GenCAD AI service listening on {server_url(server)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        workspace.collect_garbage()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
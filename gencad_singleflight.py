@@ -0,0 +1,140 @@
+"""
+GenCAD AI - Single-Flight Coalescing
+Concurrent calls with the same key share one execution: the first caller starts it and
+later callers attach to it, and all of them receive the same result or exception.
+Cancellation is reference-counted. A caller that cancels only detaches itself; the shared
+call is cancelled when its last caller has gone.
+"""
+
+import threading
+
+
+class Cancelled(Exception):
+    """Raised to a caller whose CancelToken fired before its result was ready"""
+
+
+class CancelToken:
+    """Thread-safe cancellation flag with callbacks"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback):
+        """Call callback when the token is cancelled (straight away if it already is)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+
+class _Flight:
+    """One shared execution and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.cancel = CancelToken()  # handed to the shared function
+        self.result = None
+        self.error = None
+        self.refs = 0
+        self.waiters = []
+
+
+class SingleFlight:
+    """Coalesces concurrent calls by key; safe to share between threads"""
+
+    def __init__(self):
+        self.calls = 0      # shared executions started
+        self.coalesced = 0  # callers that attached to an execution already in flight
+        self.cancelled = 0  # shared executions cancelled because every caller left
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def do(self, key, function, cancel=None):
+        """Return function(shared_cancel_token) for key, sharing a run already in flight.
+
+        The function runs on its own thread so any caller can leave early. Returns
+        (result, shared) where shared is True when this caller attached to another's run.
+        Raises Cancelled if cancel fires first, or re-raises the function's exception.
+        """
+        wake = threading.Event()
+        with self._lock:
+            flight = self._flights.get(key)
+            shared = flight is not None
+            if shared:
+                self.coalesced += 1
+            else:
+                flight = self._flights[key] = _Flight()
+                self.calls += 1
+            flight.refs += 1
+            flight.waiters.append(wake)
+
+        if not shared:
+            threading.Thread(target=self._run, args=(key, flight, function), daemon=True).start()
+        if cancel is not None:
+            cancel.add_callback(wake.set)
+
+        wake.wait()
+        if not flight.done.is_set():
+            self._leave(key, flight)
+            raise Cancelled()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result, shared
+
+    def _leave(self, key, flight):
+        """Detach a cancelled caller; cancel the shared run if nobody is left waiting"""
+        with self._lock:
+            flight.refs -= 1
+            abandoned = flight.refs == 0 and not flight.done.is_set()
+            if abandoned:
+                self.cancelled += 1
+                # New callers must start afresh rather than attach to a run being cancelled
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+        if abandoned:
+            flight.cancel.cancel()
+
+    def _run(self, key, flight, function):
+        try:
+            flight.result = function(flight.cancel)
+        except BaseException as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.done.set()
+                waiters = list(flight.waiters)
+            for wake in waiters:
+                wake.set()
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'cancelled': self.cancelled}
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+GenCAD AI - Startup Report
+Import-time breakdown in the spirit of 'python -X importtime', plus phase timings for the
+desktop window. The window target is WINDOW_TARGET_MS from process start to first paint.
+
+Usage: python3 gencad_startup.py [module ...] [--top 15]
+       python3 gencad_ai.py --startup-report
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+
+WINDOW_TARGET_MS = 150
+DEFAULT_MODULES = ("gencad_ai", "gencad_cli")
+# Modules the headless paths must never load at import time
+HEAVY_MODULES = ("tkinter", "requests", "urllib3")
+
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+
+class StartupTimer:
+    """Named checkpoints measured from a fixed start time"""
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter() if started is None else started
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, (time.perf_counter() - self.started) * 1000))
+
+    def elapsed_ms(self, name):
+        for mark, ms in self.marks:
+            if mark == name:
+                return ms
+        return None
+
+    def lines(self):
+        lines = []
+        previous = 0.0
+        for name, ms in self.marks:
+            lines.append(f"{name:<28} {ms:8.1f} ms  (+{ms - previous:.1f})")
+            previous = ms
+        return lines
+
+
+def parse_importtime(text):
+    """Parse '-X importtime' output into (module, self_us, cumulative_us, depth) tuples"""
+    entries = []
+    for line in text.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def import_report(module, python=None):
+    """Import module in a fresh interpreter with -X importtime; returns the parsed entries"""
+    completed = subprocess.run([python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    return parse_importtime(completed.stderr)
+
+
+def module_subtree(module, entries):
+    """The entries module imported, excluding interpreter start-up (site and friends)"""
+    for index in range(len(entries) - 1, -1, -1):
+        if entries[index][0] == module:
+            break
+    else:
+        return []
+    depth = entries[index][3]
+    start = index
+    while start > 0 and entries[start - 1][3] > depth:
+        start -= 1
+    return entries[start:index + 1]
+
+
+def format_import_report(module, entries, top=15):
+    """Total import time for module, its slowest imports, and any heavy modules it pulled in"""
+    subtree = module_subtree(module, entries)
+    total = subtree[-1][2] if subtree else 0
+    loaded = {name for name, _, _, _ in subtree}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    lines = [f"{module}: {total / 1000:.1f} ms to import"
+             + (f"; loads {', '.join(heavy)}" if heavy else "; no tkinter/requests")]
+    slowest = sorted(subtree[:-1], key=lambda e: e[2], reverse=True)[:top]
+    for name, self_us, cumulative_us, depth in slowest:
+        lines.append(f"  {cumulative_us / 1000:8.1f} ms cumulative {self_us / 1000:7.1f} ms self  {'  ' * depth}{name}")
+    return lines
+
+
+def main(argv=None):
+    """Print import reports for the given modules"""
+    parser = argparse.ArgumentParser(description="Import-time report for GenCAD AI entry points")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        for line in format_import_report(module, import_report(module), args.top):
+            print(line)
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+GenCAD AI - Status Pipeline
+Worker threads push status events into a lock-free queue; the Tk main loop drains it
+on a fixed after() tick and applies each batch with a single widget update.
+This module never imports tkinter.
+"""
+
+import collections
+import itertools
+import time
+from datetime import datetime
+
+DEFAULT_TICK_MS = 50
+DEFAULT_MAX_BATCH = 5000  # events applied per tick; the rest wait for the next tick
+
+# Event kinds
+STATUS = 'status'  # a timestamped status line
+TOKENS = 'tokens'  # streamed response text, shown as-is
+CALL = 'call'      # a callable to run on the main thread
+
+StatusEvent = collections.namedtuple('StatusEvent',
+                                     ['seq', 'kind', 'text', 'timestamp', 'job_id', 'callback', 'level'])
+
+
+class StatusQueue:
+    """Multi-producer, single-consumer event queue.
+
+    deque.append and deque.popleft are atomic in CPython, so producers never take a lock
+    and never wait for the consumer.
+    """
+
+    def __init__(self):
+        self._events = collections.deque()
+        self._seq = itertools.count(1)  # next() on a count is atomic as well
+
+    def push(self, kind, text="", job_id=None, callback=None, level=None):
+        """Queue one event; safe to call from any thread"""
+        self._events.append(StatusEvent(next(self._seq), kind, text, time.time(), job_id, callback, level))
+
+    def status(self, message, job_id=None, level=None):
+        self.push(STATUS, message, job_id, level=level)
+
+    def tokens(self, text, job_id=None):
+        self.push(TOKENS, text, job_id)
+
+    def call(self, callback):
+        """Run callback on the consumer's thread at the next drain"""
+        self.push(CALL, callback=callback)
+
+    def __len__(self):
+        return len(self._events)
+
+    def drain(self, max_items=DEFAULT_MAX_BATCH):
+        """Remove and return up to max_items events in the order they were pushed"""
+        batch = []
+        popleft = self._events.popleft
+        try:
+            while len(batch) < max_items:
+                batch.append(popleft())
+        except IndexError:
+            pass
+        return batch
+
+
+def format_status(event):
+    """Render a status event as the '[HH:MM:SS] message' line the status panel shows"""
+    timestamp = datetime.fromtimestamp(event.timestamp).strftime("%H:%M:%S")
+    return f"[{timestamp}] {event.text}\n"
+
+
+def render_batch(events):
+    """Join a batch of status and token events into one string, in order"""
+    parts = []
+    for event in events:
+        if event.kind == STATUS:
+            parts.append(format_status(event))
+        elif event.kind == TOKENS:
+            parts.append(event.text)
+    return "".join(parts)
+
+
+class StatusPump:
+    """Drains a StatusQueue on a fixed tick of the root's after() loop.
+
+    apply_batch(events) is called once per tick with every status/token event queued since
+    the previous tick; a CALL event splits the batch so the events queued before it are
+    applied first.
+    """
+
+    def __init__(self, root, status_queue, apply_batch, tick_ms=DEFAULT_TICK_MS, max_batch=DEFAULT_MAX_BATCH):
+        self.root = root
+        self.queue = status_queue
+        self.apply_batch = apply_batch
+        self.tick_ms = tick_ms
+        self.max_batch = max_batch
+        self.ticks = 0
+        self.updates = 0  # number of apply_batch calls, i.e. widget updates
+        self._after_id = None
+
+    def start(self):
+        if self._after_id is None:
+            self._after_id = self.root.after(self.tick_ms, self._tick)
+
+    def stop(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def flush(self):
+        """Apply up to max_batch queued events; returns the number handled"""
+        events = self.queue.drain(self.max_batch)
+        pending = []
+        for event in events:
+            if event.kind != CALL:
+                pending.append(event)
+                continue
+            # Keep ordering: events queued before the call are applied before it runs
+            self._apply(pending)
+            pending = []
+            event.callback()
+        self._apply(pending)
+        return len(events)
+
+    def _apply(self, events):
+        if events:
+            self.apply_batch(events)
+            self.updates += 1
+
+    def _tick(self):
+        self.ticks += 1
+        try:
+            self.flush()
+        finally:
+            self._after_id = self.root.after(self.tick_ms, self._tick)
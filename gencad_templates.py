@@ -0,0 +1,210 @@
+"""
+GenCAD AI - Script Templates
+Reuses a validated script for a prompt that differs from an earlier one only in its dimensions.
+
+Prompts are reduced to a structure ("create a #mm cube with a #mm hole") and a list of values in
+millimetres. A validated script is stored under its prompt's structure. A later prompt with the same
+structure gets that script back with its numbers swapped in, without an API call. A script is only
+reused when every dimension literal in it can be traced to exactly one value in the prompt (the value
+itself, or half of it for a radius). Angles and counts are never dimensions: literals passed to rotations
+and ranges are kept as they are, and a script where one of them equals a prompt value is not reused.
+"""
+
+import ast
+import io
+import math
+import os
+import re
+import threading
+import tokenize
+
+from gencad_analyzer import analyze_script
+from gencad_backends import UNITS
+from gencad_cache import DEFAULT_CACHE_DIR, ResponseCache
+
+DEFAULT_TEMPLATE_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "templates")
+# Literals up to this size (0, 1, 2, 0.5, ...) are treated as constants, never as dimensions
+SMALL_LITERAL = 2
+# How a script literal may relate to a prompt value: the value itself or its half (diameter -> radius)
+FACTORS = (1.0, 0.5)
+# Calls whose arguments are angles, axes or counts, and keywords that name an angle
+NON_DIMENSION_CALLS = frozenset({'rotate', 'Rotation', 'radians', 'degrees', 'range'})
+NON_DIMENSION_KEYWORDS = frozenset({'angle', 'axis'})
+
+_UNIT_NAMES = "|".join(re.escape(unit) for unit in sorted(UNITS, key=len, reverse=True))
+_NUMBER = re.compile(r'(?<![\w.])(\d+(?:\.\d+)?)(?:\s*(' + _UNIT_NAMES + r'))?(?![\w.])')
+
+
+def canonical_prompt(prompt):
+    """Return (structure, values): numbers become '#' (or '#mm', converted to millimetres)"""
+    text = " ".join(prompt.lower().split()).rstrip('.!')
+    values = []
+
+    def replace(match):
+        number, unit = match.groups()
+        if unit:
+            values.append(float(number) * UNITS[unit])
+            return "#mm"
+        values.append(float(number))
+        return "#"
+
+    return _NUMBER.sub(replace, text), values
+
+
+def _same(a, b):
+    return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def _non_dimension_positions(script):
+    """Return the (row, column) of every number literal used as an angle, axis or count"""
+    lines = script.splitlines(True)
+    positions = set()
+
+    def collect(node):
+        for child in ast.walk(node):
+            if isinstance(child, ast.Constant) and isinstance(child.value, (int, float)):
+                # ast columns count UTF-8 bytes; tokenize columns count characters
+                line = lines[child.lineno - 1].encode('utf-8')
+                positions.add((child.lineno, len(line[:child.col_offset].decode('utf-8', 'replace'))))
+
+    for node in ast.walk(ast.parse(script)):
+        if not isinstance(node, ast.Call):
+            continue
+        name = node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, 'id', None)
+        if name in NON_DIMENSION_CALLS:
+            collect(node)
+        for keyword in node.keywords:
+            if keyword.arg in NON_DIMENSION_KEYWORDS:
+                collect(keyword.value)
+    return positions
+
+
+def parameterize(script, values):
+    """Map each dimension literal in script to a prompt value; returns slots or None if not reusable.
+
+    Slots are (start, end, value index, factor, is_int) over the script text. None means some
+    literal cannot be explained by the prompt, matches more than one value, or some value is unused,
+    or an angle or count equals a prompt value (a 90 degree turn must not follow a 90mm shaft).
+    """
+    if not values:
+        return None
+    try:
+        fixed = _non_dimension_positions(script)
+    except (SyntaxError, ValueError):
+        return None
+    line_starts = [0]
+    for line in script.splitlines(True):
+        line_starts.append(line_starts[-1] + len(line))
+
+    slots = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(script).readline):
+            if token.type != tokenize.NUMBER:
+                continue
+            try:
+                literal = float(token.string.replace('_', ''))
+            except ValueError:
+                continue  # hex and complex literals are never dimensions
+            if literal <= SMALL_LITERAL:
+                continue
+            matches = {(index, factor) for index, value in enumerate(values) for factor in FACTORS
+                       if _same(literal, value * factor)}
+            if token.start in fixed:
+                if matches:
+                    return None
+                continue
+            if len(matches) != 1:
+                return None
+            index, factor = matches.pop()
+            start = line_starts[token.start[0] - 1] + token.start[1]
+            end = line_starts[token.end[0] - 1] + token.end[1]
+            is_int = not any(c in token.string for c in '.eE')
+            slots.append((start, end, index, factor, is_int))
+    except (tokenize.TokenError, SyntaxError):
+        return None
+
+    if {slot[2] for slot in slots} != set(range(len(values))):
+        return None
+    return slots
+
+
+def _format(value, is_int):
+    if is_int:
+        return str(int(value))
+    return repr(float(f"{value:.10g}"))
+
+
+def substitute(script, slots, values):
+    """Write values into the script's slots; None if an integer literal would get a fraction"""
+    parts = []
+    position = 0
+    for start, end, index, factor, is_int in slots:
+        value = values[index] * factor
+        if is_int and not _same(value, round(value)):
+            return None
+        parts.append(script[position:start])
+        parts.append(_format(round(value) if is_int else value, is_int))
+        position = end
+    parts.append(script[position:])
+    return "".join(parts)
+
+
+def same_order(old_values, new_values):
+    """True if every pair of values compares the same way in both prompts (a hole stays smaller than its cube)"""
+    def sign(a, b):
+        return 0 if _same(a, b) else (1 if a > b else -1)
+
+    return all(sign(old_values[i], old_values[j]) == sign(new_values[i], new_values[j])
+               for i in range(len(old_values)) for j in range(i + 1, len(old_values)))
+
+
+class TemplateStore:
+    """Validated scripts keyed by prompt structure, replayed with the dimensions of new prompts"""
+
+    def __init__(self, directory=DEFAULT_TEMPLATE_DIR, **cache_options):
+        self.entries = ResponseCache(directory, **cache_options)
+        self.hits = 0
+        self.misses = 0
+        self.learned = 0
+        self._lock = threading.Lock()
+
+    def learn(self, key, prompt, script):
+        """Store a validated script under key if its dimensions can be traced to the prompt"""
+        _, values = canonical_prompt(prompt)
+        if parameterize(script, values) is None:
+            return False
+        self.entries.put(key, script, prompt)
+        with self._lock:
+            self.learned += 1
+        return True
+
+    def lookup(self, key, prompt):
+        """Return the stored script for key rewritten with prompt's dimensions, or None"""
+        script = None
+        _, values = canonical_prompt(prompt)
+        entry = self.entries.get_entry(key) if values else None
+        if entry is not None and entry.get('prompt'):
+            _, old_values = canonical_prompt(entry['prompt'])
+            slots = parameterize(entry['script'], old_values)
+            if slots is not None and len(old_values) == len(values) and same_order(old_values, values):
+                script = substitute(entry['script'], slots, values)
+            if script is not None and not analyze_script(script).ok:
+                script = None
+
+        with self._lock:
+            if script is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return script
+
+    def stats(self):
+        """Return hit/miss counters and how many scripts were stored"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'learned': self.learned,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0
+            }
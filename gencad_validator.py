@@ -0,0 +1,170 @@
+"""
+GenCAD AI - Script Validator
+Precompiled safety and sanity rules for generated FreeCAD scripts. This is the legacy regex screen:
+the pipeline checks scripts with gencad_analyzer, which shares this module's Violation type.
+
+All rules are compiled once at import time. The script is lowercased once (the rules
+are case-insensitive), and each rule only runs its regex when its anchor literal
+occurs in the script, which a plain substring search rules out for most rules in
+a few microseconds. Every violation is reported with its line and column.
+"""
+
+import bisect
+import re
+from collections import namedtuple
+
+# Validation patterns (matched case-insensitively)
+REQUIRED_IMPORTS = [
+    r'import\s+FreeCAD',
+    r'import\s+Part'
+]
+
+NEW_DOCUMENT_PATTERN = r'FreeCAD\.newDocument\('
+
+FREECAD_PATTERNS = [
+    r'FreeCAD\.',
+    r'Part\.',
+    r'\.addObject\(',
+    r'\.recompute\('
+]
+
+DANGEROUS_PATTERNS = [
+    r'import\s+os(?!\w)',
+    r'import\s+subprocess',
+    r'import\s+sys(?!\w)',
+    r'import\s+shutil',
+    r'import\s+urllib',
+    r'import\s+socket',
+    r'import\s+requests',
+    r'\bos\.',
+    r'\bsubprocess\.',
+    r'\bsys\.',
+    r'\bshutil\.',
+    r'\burllib\.',
+    r'\bsocket\.',
+    r'\brequests\.',
+    r'exec\s*\(',
+    r'eval\s*\(',
+    r'__import__',
+    r'open\s*\(',
+    r'file\s*\(',
+    r'input\s*\(',
+    r'raw_input\s*\(',
+    r'compile\s*\(',
+    r'globals\s*\(',
+    r'locals\s*\(',
+    r'setattr\s*\(',
+    r'getattr\s*\(',
+    r'delattr\s*\(',
+    r'hasattr\s*\('
+]
+
+Violation = namedtuple('Violation', ['rule', 'message', 'line', 'column'])
+
+
+class Rule:
+    """One compiled pattern plus the literal that must occur for it to match"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        # Escapes in the patterns are all lowercase, so lowering only affects the literals
+        self.lower_regex = re.compile(pattern.lower())
+        self.regex = re.compile(pattern, re.IGNORECASE)
+        self.anchor = self._anchor(pattern)
+
+    @staticmethod
+    def _anchor(pattern):
+        """Longest literal run in the pattern, lowercased"""
+        literal = re.sub(r'\\[bsw]\*?\+?|\(\?!\\w\)', '\0', pattern)
+        literal = literal.replace('\\', '')
+        return max(literal.split('\0'), key=len).lower()
+
+    def finditer(self, text, lowered):
+        """Iterate matches, using the lowered text when it is available"""
+        if lowered is None:
+            return self.regex.finditer(text)
+        if self.anchor not in lowered:
+            return iter(())
+        return self.lower_regex.finditer(lowered)
+
+    def search(self, text, lowered):
+        """Return the first match or None"""
+        return next(self.finditer(text, lowered), None)
+
+
+REQUIRED_RULES = [Rule(p) for p in REQUIRED_IMPORTS]
+NEW_DOCUMENT_RULE = Rule(NEW_DOCUMENT_PATTERN)
+FREECAD_RULES = [Rule(p) for p in FREECAD_PATTERNS]
+DANGEROUS_RULES = [Rule(p) for p in DANGEROUS_PATTERNS]
+
+
+def _lowered(script):
+    """ASCII text lowercases without changing offsets; other text uses the IGNORECASE rules"""
+    return script.lower() if script.isascii() else None
+
+
+class _Positions:
+    """Maps string offsets to 1-based line and column numbers"""
+
+    def __init__(self, text):
+        self._line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+
+    def __call__(self, offset):
+        line = bisect.bisect_right(self._line_starts, offset)
+        return line, offset - self._line_starts[line - 1] + 1
+
+
+def find_violations(script):
+    """Return every rule violation in the script, ordered by rule and position"""
+    if not script or not script.strip():
+        return [Violation('empty', "Script is empty or contains only whitespace", None, None)]
+
+    lowered = _lowered(script)
+    violations = []
+
+    # Check for essential FreeCAD imports - more specific validation
+    for rule in REQUIRED_RULES:
+        if not rule.search(script, lowered):
+            violations.append(Violation(rule.pattern, f"Missing required import matching pattern: {rule.pattern}", None, None))
+
+    # Check for document creation - this is a stronger validation
+    if not NEW_DOCUMENT_RULE.search(script, lowered):
+        violations.append(Violation(
+            NEW_DOCUMENT_RULE.pattern,
+            "Script does not appear to be a valid FreeCAD Python script (missing FreeCAD.newDocument()). Possible hallucination or invalid response.",
+            None, None
+        ))
+
+    # Check for basic FreeCAD operations
+    if not any(rule.search(script, lowered) for rule in FREECAD_RULES):
+        violations.append(Violation('freecad_operations', "Script does not contain recognizable FreeCAD operations", None, None))
+
+    # Check for potentially dangerous operations (enhanced security)
+    positions = None
+    for rule in DANGEROUS_RULES:
+        for match in rule.finditer(script, lowered):
+            if positions is None:
+                positions = _Positions(script)
+            line, column = positions(match.start())
+            violations.append(Violation(
+                rule.pattern,
+                f"Script contains potentially dangerous operation: {rule.pattern}",
+                line, column
+            ))
+
+    return violations
+
+
+def format_violation(violation):
+    """Render a violation as a message with its position, if known"""
+    if violation.line is None:
+        return violation.message
+    return f"{violation.message} (line {violation.line}, column {violation.column})"
+
+
+def validate_freecad_script(script):
+    """Enhanced validation for FreeCAD Python scripts with stronger checks"""
+    violations = find_violations(script)
+    if violations:
+        return False, format_violation(violations[0])
+    return True, "Script validation passed"
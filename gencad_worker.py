@@ -0,0 +1,150 @@
+"""
+GenCAD AI - FreeCAD Worker
+Long-lived job runner started inside freecadcmd by gencad_workers.WorkerPool.
+
+Protocol: one JSON object per line. The worker first writes {"ready": true, ...}; then for
+every request {"id": ..., "script_path": ...} on stdin it runs the script in a fresh
+document, closes the documents the script opened, and writes one response line.
+A request may carry "export": {"output_dir", "basename", "formats", "tolerance"}; the
+model is then written as STEP, STL and/or FCStd before its documents are closed, and
+the response lists the files under "artifacts".
+Anything the script or FreeCAD prints goes to stderr so it cannot corrupt the protocol.
+"""
+
+import json
+import os
+import sys
+import time
+import traceback
+
+WORKER_ENV = "GENCAD_WORKER"  # set to "1" by gencad_workers.FreeCADWorker
+
+
+class _NullGui:
+    """Stands in for FreeCAD.Gui in console mode so view calls like fitAll() are no-ops"""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+
+def _protocol_stream():
+    """Keep a private handle on stdout for protocol messages and point fd 1 at stderr"""
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+    return protocol
+
+
+EXPORT_EXTENSIONS = {'step': '.step', 'stl': '.stl', 'fcstd': '.FCStd'}
+
+
+def _result_shapes(document):
+    """Shapes of the objects no other object consumes, i.e. the finished model"""
+    shapes = []
+    for obj in document.Objects:
+        shape = getattr(obj, 'Shape', None)
+        if shape is None or shape.isNull() or getattr(obj, 'InList', None):
+            continue
+        shapes.append(shape)
+    return shapes
+
+
+def export_document(document, options):
+    """Write the document's model in the requested formats; returns {format: path}"""
+    output_dir = options['output_dir']
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, options.get('basename') or document.Name)
+    formats = options.get('formats') or list(EXPORT_EXTENSIONS)
+    artifacts = {}
+
+    shape = None
+    if 'step' in formats or 'stl' in formats:
+        import Part
+        shapes = _result_shapes(document)
+        if not shapes:
+            raise ValueError("The script produced no shapes to export")
+        shape = shapes[0] if len(shapes) == 1 else Part.makeCompound(shapes)
+
+    for fmt in formats:
+        path = base + EXPORT_EXTENSIONS[fmt]
+        if fmt == 'step':
+            shape.exportStep(path)
+        elif fmt == 'stl':
+            import MeshPart
+            mesh = MeshPart.meshFromShape(Shape=shape, LinearDeflection=float(options.get('tolerance', 0.1)),
+                                          AngularDeflection=0.5, Relative=False)
+            mesh.write(path)
+        elif fmt == 'fcstd':
+            document.saveAs(path)
+        artifacts[fmt] = path
+    return artifacts
+
+
+def run_job(FreeCAD, request):
+    """Run one script in a fresh document and describe the outcome"""
+    response = {'id': request.get('id'), 'ok': False, 'error': None, 'traceback': None, 'objects': 0}
+    before = set(FreeCAD.listDocuments())
+    started = time.monotonic()
+
+    try:
+        with open(request['script_path'], encoding='utf-8') as f:
+            source = f.read()
+        namespace = {'__name__': '__main__', '__file__': request['script_path']}
+        exec(compile(source, request['script_path'], 'exec'), namespace)
+        if request.get('export'):
+            new_documents = set(FreeCAD.listDocuments()) - before
+            document = FreeCAD.ActiveDocument
+            if document is None or document.Name not in new_documents:
+                if not new_documents:
+                    raise ValueError("The script did not create a document")
+                document = FreeCAD.getDocument(sorted(new_documents)[0])
+            response['artifacts'] = export_document(document, request['export'])
+        response['ok'] = True
+    except BaseException as e:
+        response['error'] = f"{type(e).__name__}: {e}"
+        response['traceback'] = traceback.format_exc(limit=8)
+        if isinstance(e, (KeyboardInterrupt, SystemExit)):
+            response['error'] = f"Script tried to exit the worker ({type(e).__name__})"
+    finally:
+        for name in set(FreeCAD.listDocuments()) - before:
+            try:
+                response['objects'] += len(FreeCAD.getDocument(name).Objects)
+                FreeCAD.closeDocument(name)
+            except Exception:
+                pass
+
+    response['elapsed_seconds'] = round(time.monotonic() - started, 4)
+    return response
+
+
+def main():
+    """Serve job requests until stdin closes"""
+    protocol = _protocol_stream()
+
+    import FreeCAD
+    if not getattr(FreeCAD, 'GuiUp', False):
+        FreeCAD.Gui = _NullGui()
+
+    version = getattr(FreeCAD, 'Version', lambda: [])()
+    protocol.write(json.dumps({'ready': True, 'pid': os.getpid(), 'version': ".".join(version[:3])}) + "\n")
+
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            protocol.write(json.dumps({'id': None, 'ok': False, 'error': f"Bad request: {e}"}) + "\n")
+            continue
+        protocol.write(json.dumps(run_job(FreeCAD, request)) + "\n")
+
+
+# freecadcmd imports a .py argument as a module rather than running it as __main__, so the
+# pool marks its workers in the environment; a plain import of this file starts nothing
+if __name__ == "__main__" or os.environ.get(WORKER_ENV) == "1":
+    main()
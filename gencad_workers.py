@@ -0,0 +1,208 @@
+"""
+GenCAD AI - FreeCAD Worker Pool
+Keeps warm, long-lived freecadcmd processes that run generated scripts on request,
+so each job skips FreeCAD's multi-second cold start.
+"""
+
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+from collections import deque
+
+from gencad_freecad import CONSOLE_CANDIDATES, default_locator
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gencad_worker.py")
+WORKER_ENV = "GENCAD_WORKER"  # tells gencad_worker.py, which freecadcmd imports rather than runs, to serve
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_JOBS_PER_WORKER = 50
+DEFAULT_JOB_TIMEOUT = 120  # seconds
+STARTUP_TIMEOUT = 60  # seconds
+
+
+class WorkerError(Exception):
+    """Raised when a worker crashes, times out or cannot be started"""
+
+
+class FreeCADWorker:
+    """One freecadcmd process speaking the gencad_worker.py JSON-lines protocol"""
+
+    def __init__(self, command, startup_timeout=STARTUP_TIMEOUT):
+        self.command = list(command)
+        self.jobs_done = 0
+        self._responses = queue.Queue()
+        self._stderr_tail = deque(maxlen=40)
+        try:
+            self.process = subprocess.Popen(
+                self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding='utf-8', errors='replace', bufsize=1, env={**os.environ, WORKER_ENV: "1"}
+            )
+        except OSError as e:
+            raise WorkerError(f"Could not start FreeCAD worker '{self.command[0]}': {e}")
+
+        threading.Thread(target=self._read_stdout, daemon=True).start()
+        threading.Thread(target=self._read_stderr, daemon=True).start()
+
+        ready = self._next_response(startup_timeout)
+        if not ready.get('ready'):
+            self.kill()
+            raise WorkerError(f"FreeCAD worker did not start: {ready}")
+        self.pid = ready.get('pid')
+        self.version = ready.get('version')
+
+    def _read_stdout(self):
+        for line in self.process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                self._responses.put(json.loads(line))
+            except ValueError:
+                self._stderr_tail.append(line)
+        self._responses.put(None)  # EOF: the process exited
+
+    def _read_stderr(self):
+        for line in self.process.stderr:
+            self._stderr_tail.append(line.rstrip())
+
+    def _next_response(self, timeout):
+        try:
+            response = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            self.kill()
+            raise WorkerError(f"FreeCAD worker timed out after {timeout}s")
+        if response is None:
+            self.kill()
+            raise WorkerError(f"FreeCAD worker exited unexpectedly: {self.stderr_tail()}")
+        return response
+
+    def stderr_tail(self):
+        """Last lines the worker wrote to stderr, for diagnostics"""
+        return "\n".join(self._stderr_tail)
+
+    def run(self, request, timeout):
+        """Send one job and wait for its response"""
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            self.kill()
+            raise WorkerError(f"FreeCAD worker is not accepting jobs: {e}")
+        response = self._next_response(timeout)
+        self.jobs_done += 1
+        return response
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def close(self):
+        """Ask the worker to exit by closing its stdin"""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+class WorkerPool:
+    """Pool of warm FreeCAD workers; a worker is recycled after max_jobs_per_worker jobs or on any failure"""
+
+    def __init__(self, command=None, size=DEFAULT_POOL_SIZE, max_jobs_per_worker=DEFAULT_MAX_JOBS_PER_WORKER,
+                 job_timeout=DEFAULT_JOB_TIMEOUT):
+        self.command = list(command or self.default_command())
+        self.size = max(1, size)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.job_timeout = job_timeout
+        self.workers_started = 0
+        self._idle = queue.LifoQueue()  # most recently used worker first, so idle ones stay idle
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @staticmethod
+    def default_command():
+        """freecadcmd (as resolved by gencad_freecad) running the worker script"""
+        console = default_locator().resolve().console_command or [CONSOLE_CANDIDATES[0]]
+        return console + [WORKER_SCRIPT]
+
+    def _spawn(self):
+        worker = FreeCADWorker(self.command)
+        with self._lock:
+            self.workers_started += 1
+        return worker
+
+    def warm_up(self):
+        """Start all workers now instead of on first use"""
+        workers = []
+        for _ in range(self.size):
+            self._slots.acquire()
+            try:
+                workers.append(self._idle.get_nowait())
+            except queue.Empty:
+                try:
+                    workers.append(self._spawn())
+                except WorkerError:
+                    self._slots.release()
+                    raise
+        for worker in workers:
+            self._release(worker)
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            worker = self._idle.get_nowait()
+            if worker.alive():
+                return worker
+            worker.kill()
+        except queue.Empty:
+            pass
+        try:
+            return self._spawn()
+        except WorkerError:
+            self._slots.release()
+            raise
+
+    def _release(self, worker):
+        if worker is not None:
+            if self._closed or not worker.alive() or worker.jobs_done >= self.max_jobs_per_worker:
+                worker.close()
+            else:
+                self._idle.put(worker)
+        self._slots.release()
+
+    def run_script(self, script_path, timeout=None, **options):
+        """Run a script in a fresh document on a warm worker and return the worker's response dict.
+
+        Raises WorkerError if the worker crashes or times out; that worker is replaced.
+        """
+        if self._closed:
+            raise WorkerError("Worker pool is closed")
+        request = dict(options, id=next(self._ids), script_path=os.path.abspath(script_path))
+        worker = self._acquire()
+        try:
+            response = worker.run(request, timeout or self.job_timeout)
+        except WorkerError:
+            worker.kill()
+            self._release(None)
+            raise
+        self._release(worker)
+        return response
+
+    def close(self):
+        """Shut down every idle worker; busy ones exit when their job returns"""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,147 @@
+"""
+GenCAD AI - Script Workspace
+Content-addressed storage for validated scripts and their exported artifacts. A script is
+stored once as scripts/<sha256>.py, written atomically, and every later save of the same
+text reuses that file. Artifacts live in artifacts/<sha256>/. A size-capped
+least-recently-used collector keeps the directory bounded; run it at start-up and exit.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+DEFAULT_WORKSPACE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "gencad_ai", "workspace"
+)
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# Entries used this recently are never collected: FreeCAD may still be opening a script
+# the app launched just before it exited
+DEFAULT_MIN_AGE = 300  # seconds
+
+
+def text_digest(text):
+    """SHA-256 of a script's text, as stored on disk"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class Workspace:
+    """Directory of content-addressed scripts and artifacts with LRU garbage collection"""
+
+    def __init__(self, directory=DEFAULT_WORKSPACE_DIR, max_bytes=DEFAULT_MAX_BYTES, min_age=DEFAULT_MIN_AGE):
+        self.directory = directory
+        self.scripts_dir = os.path.join(directory, "scripts")
+        self.artifacts_dir = os.path.join(directory, "artifacts")
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self.writes = 0
+        self.reuses = 0
+        self.collected = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.scripts_dir, exist_ok=True)
+        os.makedirs(self.artifacts_dir, exist_ok=True)
+
+    def script_path(self, digest):
+        return os.path.join(self.scripts_dir, f"{digest}.py")
+
+    def store_script(self, script):
+        """Return the path of the stored script, writing it only if this text is new"""
+        path = self.script_path(text_digest(script))
+        try:
+            os.utime(path)  # already stored: mark it recently used instead of rewriting it
+            with self._lock:
+                self.reuses += 1
+            return path
+        except OSError:
+            pass
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.scripts_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(script)
+            # Atomic, so a concurrent writer of the same script or a reader never sees half a file
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            raise
+        with self._lock:
+            self.writes += 1
+        return path
+
+    def artifact_dir(self, digest):
+        """Directory for files exported from the script with this digest (created on demand)"""
+        path = os.path.join(self.artifacts_dir, digest)
+        os.makedirs(path, exist_ok=True)
+        os.utime(path)
+        return path
+
+    def contains(self, path):
+        """True if path is inside this workspace (its files are managed by collect_garbage)"""
+        directory = os.path.realpath(self.directory)
+        return os.path.realpath(path).startswith(directory + os.sep)
+
+    def _remove(self, path):
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        """(last used, size, path) for every script and artifact directory"""
+        entries = []
+        for name in os.listdir(self.scripts_dir):
+            path = os.path.join(self.scripts_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        for name in os.listdir(self.artifacts_dir):
+            path = os.path.join(self.artifacts_dir, name)
+            try:
+                used = os.stat(path).st_mtime
+                size = 0
+                for root, _, files in os.walk(path):
+                    for file_name in files:
+                        size += os.stat(os.path.join(root, file_name)).st_size
+            except OSError:
+                continue
+            entries.append((used, size, path))
+        return entries
+
+    def size(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def collect_garbage(self):
+        """Remove least-recently-used entries until the workspace fits max_bytes; returns the count"""
+        now = time.time()
+        entries = []
+        removed = 0
+        for used, size, path in self._entries():
+            if path.endswith('.tmp') and now - used >= self.min_age:
+                self._remove(path)  # left behind by an interrupted write
+                removed += 1
+            else:
+                entries.append((used, size, path))
+
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for used, size, path in entries:
+            if total <= self.max_bytes or now - used < self.min_age:
+                break
+            self._remove(path)
+            total -= size
+            removed += 1
+        with self._lock:
+            self.collected += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {'writes': self.writes, 'reuses': self.reuses, 'collected': self.collected}
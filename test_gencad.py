@@ -14,9 +14,8 @@ def test_script_validation():
     """Test the script validation function"""
     print("Testing script validation...")
     
-    # Import the validation function
-    from gencad_ai import GenCADApp
-    app = GenCADApp()
+    # Import the validation function (no Tk window needed)
+    from gencad_engine import validate_freecad_script
     
     # Test valid script
     valid_script = """
@@ -30,7 +29,7 @@ doc.recompute()
 FreeCAD.Gui.ActiveDocument.ActiveView.fitAll()
 """
     
-    is_valid, message = app.validate_freecad_script(valid_script)
+    is_valid, message = validate_freecad_script(valid_script)
     print(f"Valid script test: {'PASS' if is_valid else 'FAIL'} - {message}")
     
     # Test invalid script (missing imports)
@@ -39,7 +38,7 @@ doc = FreeCAD.newDocument("Test")
 box = Part.makeBox(10, 10, 10)
 """
     
-    is_valid, message = app.validate_freecad_script(invalid_script1)
+    is_valid, message = validate_freecad_script(invalid_script1)
     print(f"Invalid script test 1: {'PASS' if not is_valid else 'FAIL'} - {message}")
     
     # Test dangerous script
@@ -50,16 +49,47 @@ import os
 os.system("rm -rf /")
 """
     
-    is_valid, message = app.validate_freecad_script(dangerous_script)
+    is_valid, message = validate_freecad_script(dangerous_script)
     print(f"Dangerous script test: {'PASS' if not is_valid else 'FAIL'} - {message}")
     
     # Test empty script
     empty_script = ""
     
-    is_valid, message = app.validate_freecad_script(empty_script)
+    is_valid, message = validate_freecad_script(empty_script)
     print(f"Empty script test: {'PASS' if not is_valid else 'FAIL'} - {message}")
+
+def test_headless_engine():
+    """Test the generation engine without tkinter, network or FreeCAD"""
+    print("\nTesting headless engine...")
+    
+    import subprocess
     
-    app.destroy()  # Clean up the tkinter window
+    # The engine must not pull in tkinter
+    check = subprocess.run(
+        [sys.executable, "-c", "import sys, gencad_engine; sys.exit('tkinter' in sys.modules)"],
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    assert check.returncode == 0, "gencad_engine imported tkinter"
+    print("✓ gencad_engine does not import tkinter")
+    
+    from gencad_engine import GenerationEngine, extract_script_from_response
+    
+    script = 'import FreeCAD\nimport Part\ndoc = FreeCAD.newDocument()\ndoc.recompute()'
+    response = {'candidates': [{'content': {'parts': [{'text': f"```python\n{script}\n```"}]}}]}
+    assert extract_script_from_response(response) == script
+    print("✓ Code fences stripped from Gemini response")
+    
+    messages = []
+    engine = GenerationEngine(status_callback=messages.append)
+    engine.request_script = lambda prompt: script
+    result = engine.generate("Create a 50mm cube", save=False)
+    assert result.ok and result.script == script, result.error
+    assert "AI response received. Validating script..." in messages
+    
+    engine.request_script = lambda prompt: script.replace("import Part", "import os")
+    result = engine.generate("Create a 50mm cube", save=False)
+    assert not result.ok and "validation failed" in result.error
+    print("✓ Engine generates and validates scripts headlessly")
 
 def test_imports():
     """Test that all required modules can be imported"""
@@ -133,7 +163,7 @@ def main():
     print("===================")
     
     tests_passed = 0
-    total_tests = 3
+    total_tests = 4
     
     # Test imports
     if test_imports():
@@ -147,6 +177,13 @@ def main():
     except Exception as e:
         print(f"✗ Script validation tests failed: {e}")
     
+    # Test headless engine
+    try:
+        test_headless_engine()
+        tests_passed += 1
+    except Exception as e:
+        print(f"✗ Headless engine tests failed: {e}")
+    
     # Test FreeCAD availability
     if test_freecad_availability():
         tests_passed += 1
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI AST script analyzer
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.bench_validator import make_script
+from gencad_analyzer import LineScreen, analyze_script, compile_policy
+from gencad_engine import ScriptAssembler
+from gencad_validator import validate_freecad_script as regex_validate
+
+
+def test_false_positives():
+    """Test that comments and strings no longer trip the checks"""
+    print("Testing regex false positives...")
+    script = make_script(1) + "# hasattr( is mentioned in a comment\nlabel = 'open(the lid)'\n"
+    assert not regex_validate(script)[0]
+    analysis = analyze_script(script)
+    assert analysis.ok, analysis.message
+    print("✓ Comments and strings are ignored by the analyzer")
+
+
+def test_false_negatives():
+    """Test that aliased and indirect access is caught"""
+    print("\nTesting regex false negatives...")
+    cases = {
+        "import os as o\n": "Import of module 'os'",
+        "from os import system\n": "Import of module 'os'",
+        "import pathlib\n": "Import of module 'pathlib'",
+        "run = eval\n": "Use of 'eval'",
+        "x = ().__class__.__bases__\n": "dunder attribute",
+        "doc.saveAs('/tmp/x.FCStd')\n": "'.saveAs'",
+        "FreeCAD.Gui.doCommand('x')\n": "'.doCommand'",
+        "mystery(1)\n": "unknown function 'mystery'",
+        "Part.open('/etc/passwd')\n": "'.open'",
+        "FreeCAD.open('/tmp/x.FCStd')\n": "'.open'",
+        "import Mesh\nMesh.Mesh().write('/tmp/x.stl')\n": "'.write'",
+        "shape = Part.makeBox(1, 1, 1)\nshape.importBrep('/tmp/x.brep')\n": "'.importBrep'",
+        "import Draft\nDraft.importDXF('/tmp/x.dxf')\n": "'.importDXF'",
+        "FreeCAD.ParamGet('User parameter:BaseApp').SetString('k', 'v')\n": "'.ParamGet'",
+        "FreeCAD.Gui.SendMsgToActiveView('Save')\n": "'.SendMsgToActiveView'",
+        "from FreeCAD import ParamGet\n": "'FreeCAD.ParamGet'",
+        "Part.Mystery()\n": "'Part.Mystery'",
+        "import FreeCADGui as Gui\nGui.runMacro('x.FCMacro')\n": "'FreeCADGui.runMacro'",
+        "App = FreeCAD\nApp.Console.PrintMessage('x')\n": "'FreeCAD.Console'",
+        "App, Shapes = FreeCAD, Part\nShapes.read('/tmp/x.brep')\n": "'.read'",
+        "App, Shapes = FreeCAD, Part\nApp.Console.PrintMessage('x')\n": "'FreeCAD.Console'",
+        "modules = [FreeCAD]\n": "Module 'FreeCAD' may only be used",
+        "from FreeCAD import Gui\nGui.runMacro('x.FCMacro')\n": "'FreeCADGui.runMacro'",
+    }
+    for line, expected in cases.items():
+        script = make_script(1) + line
+        analysis = analyze_script(script)
+        assert not analysis.ok and expected in analysis.message, (line, analysis.message)
+        assert analysis.violations[0].line == script.count("\n")
+    late_alias = analyze_script(make_script(1) + "def log():\n    App.Console.PrintMessage('x')\nApp = FreeCAD\n")
+    assert not late_alias.ok and "'FreeCAD.Console'" in late_alias.message, "the alias is bound after its use"
+    print(f"✓ {len(cases) + 1} evasions rejected with line numbers")
+
+    aliased = make_script(1).replace("import FreeCAD", "import FreeCAD as App").replace("FreeCAD.", "App.")
+    assert analyze_script(aliased).ok
+    assigned = make_script(1) + "App = FreeCAD\nbase = App.Vector(1, 2, 3)\n"
+    assert analyze_script(assigned).ok, analyze_script(assigned).message
+    print("✓ Aliased FreeCAD imports accepted")
+
+
+def test_line_screen():
+    """Test that the streaming screen only stops on lines the analyzer will certainly reject"""
+    print("\nTesting the streaming line screen...")
+    accepted = make_script(1) + (
+        "def make_profile(w, h):\n"
+        "    return Part.makeBox(w, h, 1)\n"
+        "profile = make_profile(10, 5)\n"
+        "label = \"eval(x)\"\n"
+        "retrieval = max\n"
+        "count = retrieval(3, 4)  # reopen( later\n"
+        "note = \"\"\"\nopen(the lid)\nimport os\n\"\"\"\n"
+        "size = max(1,\n           2)\n"
+    )
+    assert analyze_script(accepted).ok, analyze_script(accepted).message
+    assembler = ScriptAssembler()
+    for line in accepted.splitlines(True):
+        assembler.feed(line)
+    assembler.finish()
+    assert assembler.violation is None, assembler.violation
+
+    rejected = {"import os": "'os'", "import FreeCAD, socket": "'socket'", "from subprocess import run": "'subprocess'",
+                "value = eval('1')": "'eval'", "doc.saveAs('/tmp/x')": "'.saveAs'", "Part.open(path)": "'.open'",
+                "shape.importBrep(path)": "'.importBrep'", "x = ().__class__": "'.__class__'"}
+    for line, expected in rejected.items():
+        violation = LineScreen().feed(line)
+        assert violation is not None and expected in violation.message, (line, violation)
+        assert not analyze_script(make_script(1) + line + "\n").ok, line
+
+    # Prose before a fence is dropped rather than holding back the code after it
+    assembler = ScriptAssembler()
+    for line in ("Here's the script:\n", "```python\n", "import os\n"):
+        assembler.feed(line)
+    assert assembler.violation and "'os'" in assembler.violation
+    print(f"✓ Valid helper names, strings and comments pass; {len(rejected)} certain violations stop the stream")
+
+
+def test_stats_and_caching():
+    """Test shape statistics, loop multipliers and memoization"""
+    print("\nTesting statistics and caching...")
+    script = make_script(2) + "for i in range(10):\n    doc.addObject('Part::Cut', 'Cut%d' % i)\n"
+    analysis = analyze_script(script)
+    assert analysis.ok, analysis.message
+    assert analysis.stats['objects'] == 12 and analysis.stats['booleans'] == 12, analysis.stats
+    assert analysis.stats['primitives'] == 4 and analysis.stats['loops'] == 1
+    assert analysis.stats['estimated_cost'] > analyze_script(make_script(2)).stats['estimated_cost']
+
+    assert analyze_script(script) is analysis
+    assert compile_policy() is compile_policy({})
+    strict = {'allowed_modules': ['FreeCAD', 'Part']}
+    assert compile_policy(strict) is compile_policy(dict(strict))
+    assert not analyze_script(make_script(1) + "import math\n", strict).ok
+    assert analyze_script(make_script(1) + "import math\n").ok
+    print(f"✓ Stats {analysis.stats}; repeat analyses served from cache")
+
+
+def main():
+    """Run all tests"""
+    test_false_positives()
+    test_false_negatives()
+    test_line_screen()
+    test_stats_and_caching()
+    print("\n✓ All analyzer tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Tests for GenCAD AI assembly planning
+Uses a fake Gemini client that answers the planning request with JSON and each part prompt with its own delay
+"""
+
+import ast
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_analyzer import analyze_script
+from gencad_assembly import combine_parts, parse_plan
+from gencad_engine import GenerationEngine
+from gencad_workers import WORKER_SCRIPT, WorkerPool
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+
+USAGE = {'promptTokenCount': 100, 'candidatesTokenCount': 50}
+PLAN = {"parts": [
+    {"name": "Base Plate", "prompt": "A 100x60x5mm plate", "position": [0, 0, 0]},
+    {"name": "Lid", "prompt": "A 100x60x3mm lid", "position": [0, 0, 40], "rotation": [1, 0, 0, 180]},
+    {"name": "standoff", "prompt": "A 6mm diameter standoff 35mm tall", "position": [10, 10, 5]},
+]}
+# Part prompt -> (delay, script)
+PART_SCRIPTS = {
+    "A 100x60x5mm plate": (0.3, """import FreeCAD
+import Part
+doc = FreeCAD.newDocument("Plate")
+doc.addObject("Part::Feature", "Plate").Shape = Part.makeBox(100, 60, 5)
+doc.recompute()
+"""),
+    "A 100x60x3mm lid": (0.6, """import FreeCAD
+import Part
+doc = FreeCAD.newDocument("Lid")
+outer = Part.makeBox(100, 60, 3)
+hole = Part.makeCylinder(4, 3)
+doc.addObject("Part::Feature", "Lid").Shape = outer.cut(hole)
+doc.recompute()
+"""),
+    "A 6mm diameter standoff 35mm tall": (0.3, """import FreeCAD
+import Part
+doc = FreeCAD.newDocument("Standoff")
+doc.addObject("Part::Feature", "Standoff").Shape = Part.makeCylinder(3, 35)
+doc.recompute()
+"""),
+}
+
+
+class AssemblyClient:
+    """Answers JSON requests with plan_text and FreeCAD requests from PART_SCRIPTS"""
+
+    def __init__(self, plan_text, scripts=PART_SCRIPTS):
+        self.plan_text = plan_text
+        self.scripts = scripts
+        self.prompts = []
+        self.lock = threading.Lock()
+
+    def generate_content(self, payload, on_retry=None):
+        prompt = payload['contents'][0]['parts'][0]['text']
+        with self.lock:
+            self.prompts.append(prompt)
+        if payload['generationConfig'].get('responseMimeType') == 'application/json':
+            text = self.plan_text
+        else:
+            delay, text = next(value for key, value in self.scripts.items() if key in prompt)
+            time.sleep(delay)
+        return {'candidates': [{'content': {'parts': [{'text': text}]}}], 'usageMetadata': USAGE}
+
+
+def test_parse_plan():
+    """Test that plans are validated and part names become unique identifiers"""
+    print("Testing plan parsing...")
+    parts = parse_plan(json.dumps({"parts": [
+        {"name": "Gear A", "prompt": "a gear"},
+        {"name": "gear-a", "prompt": "another gear", "position": [1, 2, 3]},
+        {"name": "2nd", "prompt": "a shaft", "rotation": [0, 1, 0, 90]},
+    ]}))
+    assert [part.name for part in parts] == ["gear_a", "gear_a_2", "part_2nd"]
+    assert parts[0].position == (0.0, 0.0, 0.0) and parts[0].rotation == (0.0, 0.0, 1.0, 0.0)
+    assert parts[1].position == (1.0, 2.0, 3.0) and parts[2].rotation == (0.0, 1.0, 0.0, 90.0)
+
+    bad_plans = ["not json", '{"parts": []}', '{"parts": [{"name": "x"}]}',
+                 '{"parts": [{"prompt": "p", "position": [1, 2]}]}',
+                 json.dumps({"parts": [{"prompt": "p"}] * 3})]
+    for text in bad_plans:
+        try:
+            parse_plan(text, max_parts=2)
+            raise AssertionError(f"expected a ValueError for {text}")
+        except ValueError:
+            pass
+    print("✓ Plans validated and names sanitized")
+
+
+def test_combine_parts():
+    """Test that part scripts keep their meaning inside the combining wrapper"""
+    print("\nTesting part combination...")
+    parts = parse_plan(json.dumps(PLAN))
+    labelled = """import FreeCAD
+import Part
+LABEL = \"\"\"Base plate
+    5mm thick,
+  no holes\"\"\"
+doc = FreeCAD.newDocument("Plate")
+doc.addObject("Part::Feature", "Plate").Shape = Part.makeBox(100, 60, 5)
+doc.Objects[0].Label2 = (f\"\"\"{LABEL}
+rev 2\"\"\")
+"""
+    scripts = [labelled] + [PART_SCRIPTS[part.prompt][1] for part in parts[1:]]
+    script = combine_parts("An enclosure", parts, scripts)
+    strings = {node.value for node in ast.walk(ast.parse(script)) if isinstance(node, ast.Constant)}
+    assert "Base plate\n    5mm thick,\n  no holes" in strings and "\nrev 2" in strings
+    assert "\n    doc = FreeCAD.newDocument(\"Plate\")" in script
+    assert analyze_script(script).ok
+
+    rejected = {
+        "a global statement": "total = 0\ndef count():\n    global total\n    total += 1\n",
+        "an import that is only allowed at module level": "from Part import *\n",
+    }
+    for reason, extra in rejected.items():
+        try:
+            combine_parts("An enclosure", parts, [PART_SCRIPTS[parts[0].prompt][1] + extra] + scripts[1:])
+            raise AssertionError(f"expected a ValueError for {reason}")
+        except ValueError as e:
+            assert str(e).startswith("Part 'base_plate'") and reason in str(e), e
+
+    # The engine reports a part it cannot combine instead of producing a broken script
+    bad = dict(PART_SCRIPTS, **{"A 100x60x3mm lid": (0.0, PART_SCRIPTS["A 100x60x3mm lid"][1] + rejected["a global statement"])})
+    client = AssemblyClient(json.dumps(PLAN), scripts=bad)
+    result = GenerationEngine(client=client, stream=False).generate("An enclosure", save=False, assembly=True)
+    assert not result.ok and result.error.startswith("Error: Part 'lid' uses a global statement"), result.error
+    print("✓ Multi-line strings kept verbatim; global and star imports rejected")
+
+
+def test_parallel_parts():
+    """Test that parts are generated concurrently and combined into one runnable document"""
+    print("\nTesting parallel part generation...")
+    client = AssemblyClient(json.dumps(PLAN))
+    engine = GenerationEngine(client=client, stream=False)
+
+    started = time.monotonic()
+    result = engine.generate("An enclosure: base plate, lid and a standoff", save=False, assembly=True)
+    elapsed = time.monotonic() - started
+
+    assert result.ok, result.error
+    assert len(result.parts) == 3 and all(part.ok for part in result.parts)
+    # The slowest part takes 0.6s; sequential generation would take 1.2s
+    assert elapsed < 0.95, f"parts should run concurrently ({elapsed:.2f}s)"
+    assert analyze_script(result.script).ok
+    assert 'place_part("lid", build_lid, FreeCAD.Vector(1, 0, 0), 180, FreeCAD.Vector(0, 0, 40))' in result.script
+    assert result.trace.attrs['parts'] == 3 and result.trace.attrs['prompt_tokens'] == 400
+    assert "assembly of 3 parts" in result.trace.breakdown()
+    assert 'gencad_assemblies_total 1' in engine.tracer.prometheus()
+    assert 'gencad_assembly_parts_total 3' in engine.tracer.prometheus()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "assembly.py")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(result.script)
+        pool = WorkerPool(FAKE_COMMAND, size=1)
+        try:
+            response = pool.run_script(path)
+        finally:
+            pool.close()
+    assert response['ok'], response
+    # One finished shape per part; the part documents are closed after copying
+    assert response['objects'] == 3, response
+    print(f"✓ 3 parts generated in {elapsed:.2f}s and combined into one document")
+
+
+def test_fallbacks_and_failures():
+    """Test single-part fallback for unusable plans and errors naming the failed part"""
+    print("\nTesting fallbacks and part failures...")
+    single = {"A 100x60x5mm plate": PART_SCRIPTS["A 100x60x5mm plate"]}
+    client = AssemblyClient("I cannot split this", scripts=single)
+    result = GenerationEngine(client=client, stream=False).generate("A 100x60x5mm plate", save=False, assembly=True)
+    assert result.ok and not result.parts, result.error
+    assert len(client.prompts) == 2, "one planning request, then the normal path"
+
+    # A one-part plan is generated directly, without the combining wrapper
+    client = AssemblyClient(json.dumps({"parts": [PLAN["parts"][0]]}), scripts=single)
+    result = GenerationEngine(client=client, stream=False).generate("A 100x60x5mm plate", save=False, assembly=True)
+    assert result.ok and not result.parts and "place_part" not in result.script
+
+    scripts = dict(PART_SCRIPTS, **{"A 100x60x3mm lid": (0.0, "import os\nos.system('ls')\n")})
+    client = AssemblyClient(json.dumps(PLAN), scripts=scripts)
+    engine = GenerationEngine(client=client, stream=False, repair_attempts=0)
+    result = engine.generate("An enclosure", save=False, assembly=True)
+    assert not result.ok and result.error.startswith("Error: Part 'lid' failed"), result.error
+    print("✓ Invalid plans fall back to one part; a failed part fails the assembly")
+
+
+def main():
+    """Run all tests"""
+    test_parse_plan()
+    test_combine_parts()
+    test_parallel_parts()
+    test_fallbacks_and_failures()
+    print("\n✓ All assembly tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
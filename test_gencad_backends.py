@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI local parametric backend
+Uses the fake freecadcmd in benchmarks/fakes to run the generated scripts
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_analyzer import analyze_script
+from gencad_backends import ParametricBackend, build_script, parse_prompt
+from gencad_engine import GenerationEngine
+from gencad_workers import WORKER_SCRIPT, WorkerPool
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+
+LOCAL_PROMPTS = {
+    "Create a 50mm cube": ('cube', {'side': 50.0}),
+    "Create a 50mm cube with a 10mm cylindrical hole through the center": ('cube', {'side': 50.0, 'hole': 10.0}),
+    "Make a hollow cylinder with outer diameter 40mm, inner diameter 20mm, and height 30mm":
+        ('hollow cylinder', {'outer': 40.0, 'inner': 20.0, 'height': 30.0}),
+    "Create a washer with outer diameter 20mm, inner diameter 8mm, and thickness 2mm":
+        ('washer', {'outer': 20.0, 'inner': 8.0, 'thickness': 2.0}),
+    "Generate a hexagonal nut with M8 thread, 13mm across flats, and 6.5mm height":
+        ('hex nut', {'metric': 8, 'across_flats': 13.0, 'height': 6.5}),
+    "M10 hex nut": ('hex nut', {'metric': 10}),
+    "a 2 inch cube.": ('cube', {'side': 50.8}),
+    "pipe with OD 2cm, 2mm wall, 100mm long": ('hollow cylinder', {'outer': 20.0, 'wall': 2.0, 'height': 100.0}),
+}
+
+GEMINI_PROMPTS = [
+    "Create a cylindrical pen holder with diameter 80mm, height 100mm, and wall thickness 3mm",
+    "Design a simple L-shaped bracket that is 60mm x 40mm x 5mm thick with two 6mm mounting holes",
+    "Create a 50mm cube with rounded edges",
+    "a red 50mm cube",
+    "Create a cube",                                             # no size
+    "washer with outer diameter 8mm, inner diameter 20mm, thickness 2mm",  # inconsistent
+    "Generate a gear with 20 teeth, module 2, and thickness 5mm",
+]
+
+# Understood in full but degenerate, so the parser itself must give up on them
+DEGENERATE_PROMPTS = [
+    "Create a 0mm cube",
+    "Create a 50mm cube with a 0mm hole",
+    "Create a 50mm cube with a 50mm hole",                       # hole as wide as the face
+    "hollow cylinder with outer diameter 40mm, inner diameter 0mm, height 30mm",
+    "pipe with OD 20mm, 10mm wall, 100mm long",                  # no bore left
+    "washer with outer diameter 20mm, inner diameter 8mm, thickness 0mm",
+    "M10 hex nut with 8mm across flats",                         # thread wider than the nut
+]
+
+
+def test_parser():
+    """Test that known families parse in full and everything else falls through"""
+    print("Testing the parametric parser...")
+    backend = ParametricBackend()
+    for prompt, expected in LOCAL_PROMPTS.items():
+        assert parse_prompt(prompt) == expected, f"{prompt!r} -> {parse_prompt(prompt)}"
+        script = backend.generate(prompt)
+        analysis = analyze_script(script)
+        assert analysis.ok, f"{prompt!r}: {analysis.message}"
+    for prompt in GEMINI_PROMPTS:
+        assert backend.generate(prompt) is None, f"{prompt!r} should fall through to Gemini"
+    for prompt in DEGENERATE_PROMPTS:
+        assert parse_prompt(prompt) is None, f"{prompt!r} -> {parse_prompt(prompt)}"
+        assert backend.generate(prompt) is None, f"{prompt!r} should fall through to Gemini"
+    assert build_script('cube', {'side': 0.0}) is None
+    assert "side = 50.8" in backend.generate("a 2 inch cube")
+    print(f"✓ {len(LOCAL_PROMPTS)} prompts answered locally, {len(GEMINI_PROMPTS) + len(DEGENERATE_PROMPTS)} passed on to Gemini")
+
+
+def test_scripts_run_headless():
+    """Test that every local script builds in the (fake) headless FreeCAD worker"""
+    print("\nTesting generated scripts in the worker...")
+    pool = WorkerPool(FAKE_COMMAND, size=1)
+    backend = ParametricBackend()
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for n, prompt in enumerate(LOCAL_PROMPTS):
+                path = os.path.join(directory, f"local_{n}.py")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(backend.generate(prompt))
+                response = pool.run_script(path)
+                assert response['ok'] and response['objects'] == 1, (prompt, response)
+    finally:
+        pool.close()
+    print("✓ All local scripts ran")
+
+
+def test_engine_fast_path():
+    """Test that hits skip Gemini, misses fall through, and savings are reported"""
+    print("\nTesting the engine fast path...")
+    calls = []
+
+    def fake_request(prompt):
+        calls.append(prompt)
+        return VALID_SCRIPT
+
+    engine = GenerationEngine(backends=[ParametricBackend()])
+    engine.request_script = fake_request
+    local = engine.generate("Create a 50mm cube", save=False)
+    remote = engine.generate("Create a 50mm cube with rounded edges", save=False)
+
+    assert local.ok and local.backend == 'parametric' and "makeBox(side, side, side)" in local.script
+    assert remote.ok and remote.backend is None
+    assert calls == ["Create a 50mm cube with rounded edges"]
+    assert "parametric backend" in local.trace.breakdown()
+
+    # The fake request records no 'request' span, so add one for the savings estimate
+    engine.tracer.job().record('request', 2.0)
+    fast_path = engine.tracer.summary()['fast_path']
+    assert fast_path['hits'] == 1 and fast_path['misses'] == 1 and fast_path['hit_rate'] == 0.5
+    assert 1.9 < fast_path['saved_seconds'] <= 2.0
+    assert "local 1/2" in engine.tracer.format_summary()
+    assert 'gencad_backend_jobs_total{result="hit"} 1' in engine.tracer.prometheus()
+    print(f"✓ Hit rate {fast_path['hit_rate']:.0%}, ~{fast_path['saved_seconds']:.2f}s saved")
+
+
+def main():
+    """Run all tests"""
+    test_parser()
+    test_scripts_run_headless()
+    test_engine_fast_path()
+    print("\n✓ All backend tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI batch runner
+Uses a fake Gemini call so no network access is needed
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_batch import BatchRunner, iter_prompts
+from gencad_engine import GenerationEngine
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+
+
+class SlowFakeEngine(GenerationEngine):
+    """Engine whose Gemini call sleeps and tracks the peak number of concurrent calls"""
+
+    def __init__(self, delay=0.05):
+        super().__init__()
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def request_script(self, prompt):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        return "import os" if "bad" in prompt else VALID_SCRIPT
+
+
+def test_iter_prompts():
+    """Test prompt parsing for plain files and Markdown catalogs"""
+    print("Testing prompt parsing...")
+    lines = ["Create a 50mm cube\n", "\n", "# comment\n", "  Make a washer  \n"]
+    assert list(iter_prompts(lines)) == ["Create a 50mm cube", "Make a washer"]
+
+    catalog = os.path.join(os.path.dirname(os.path.abspath(__file__)), "examples", "example_prompts.md")
+    with open(catalog, encoding='utf-8') as f:
+        prompts = list(iter_prompts(f, markdown=True))
+    assert "Create a 50mm cube" in prompts
+    assert not any(p.startswith("Example Prompts") for p in prompts)
+    print(f"✓ Parsed {len(prompts)} prompts from example catalog")
+
+
+def test_batch_runner_concurrency():
+    """Test that the pool runs prompts concurrently and writes per-prompt records"""
+    print("\nTesting batch runner...")
+    engine = SlowFakeEngine()
+    prompts = [f"Create a {n}mm cube" for n in range(10, 20)] + ["bad prompt"]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        summary = BatchRunner(engine, workers=4).run(iter(prompts), output_dir)
+
+        assert summary['total'] == 11
+        assert summary['succeeded'] == 10 and summary['failed'] == 1
+        assert engine.peak == 4, f"expected 4 concurrent requests, saw {engine.peak}"
+
+        with open(os.path.join(output_dir, "results.jsonl"), encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert sorted(r['index'] for r in records) == list(range(1, 12))
+        for record in records:
+            if record['ok']:
+                assert os.path.exists(os.path.join(output_dir, record['script_file']))
+            else:
+                assert record['prompt'] == "bad prompt" and record['script_file'] is None
+    print(f"✓ Batch of {summary['total']} prompts ran with peak concurrency {engine.peak}")
+
+
+def main():
+    """Run all tests"""
+    test_iter_prompts()
+    test_batch_runner_concurrency()
+    print("\n✓ All batch tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
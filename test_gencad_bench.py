@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI benchmark suite and its Gemini stub
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from benchmarks.bench_suite import bench_pipeline, compare, metric
+from benchmarks.stub_gemini import StubGemini
+from gencad_client import GeminiClient
+from gencad_engine import extract_script_from_response
+
+
+def test_stub():
+    """Test the stub's responses, streaming, usage metadata and error injection"""
+    print("Testing the Gemini stub...")
+    stub = StubGemini(latency=0, parts=3).start()
+    client = GeminiClient(stub.url, max_retries=0)
+    try:
+        result = client.generate_content({})
+        assert result['usageMetadata']['candidatesTokenCount'] > 0
+        script = extract_script_from_response(result)
+        assert script.count("Part::Feature") == 3
+
+        usage = []
+        streamed = "".join(client.stream_content({}, on_usage=usage.append))
+        assert streamed == stub.script_text() and usage
+
+        stub.error_rate = 1.0
+        try:
+            client.generate_content({})
+            assert False, "expected HTTPError"
+        except requests.exceptions.HTTPError as e:
+            assert e.response.status_code in (429, 503)
+        assert stub.errors == 1
+    finally:
+        client.close()
+        stub.stop()
+    print("✓ Stub serves scripts, streams with usageMetadata and injects errors")
+
+
+def test_pipeline_benchmark():
+    """Test a tiny pipeline run end to end, including retries and headless execution"""
+    print("\nTesting a pipeline benchmark run...")
+    stub = StubGemini(latency=0.01, error_rate=0.2).start()
+    try:
+        results = bench_pipeline(stub.url, concurrency=2, jobs=6)
+    finally:
+        stub.stop()
+    assert results['pipeline_c2_failures']['value'] == 0
+    assert results['pipeline_c2_throughput']['value'] > 0
+    assert results['pipeline_c2_p50']['value'] <= results['pipeline_c2_p99']['value']
+    print(f"✓ 6 jobs at {results['pipeline_c2_throughput']['value']:.1f} jobs/s with {stub.errors} injected errors")
+
+
+def test_compare():
+    """Test that regressions beyond tolerance fail and improvements do not"""
+    print("\nTesting baseline comparison...")
+    baseline = {'metrics': {
+        'throughput': metric(100, 'jobs/s', 'higher'),
+        'p50': metric(1.0, 's', 'lower'),
+        'p99': metric(1.0, 's', 'lower', tolerance=1.0),
+        'failures': metric(0, 'jobs', 'lower'),
+        'retired': metric(1, 's', 'lower'),
+    }}
+    current = {'metrics': {
+        'throughput': metric(60, 'jobs/s', 'higher'),
+        'p50': metric(0.5, 's', 'lower'),
+        'p99': metric(1.9, 's', 'lower', tolerance=1.0),
+        'failures': metric(1, 'jobs', 'lower', slack=1),
+    }}
+    regressions = compare(current, baseline, tolerance=0.3)
+    assert len(regressions) == 1 and regressions[0].startswith("throughput"), regressions
+
+    current['metrics']['failures'] = metric(3, 'jobs', 'lower', slack=1)
+    current['metrics']['p99'] = metric(2.5, 's', 'lower', tolerance=1.0)
+    assert len(compare(current, baseline, tolerance=0.3)) == 3
+
+    # One retry's worth of slack absorbs a noisy tail; calibration scales CPU-bound baselines
+    baseline = {'metrics': {'p95': metric(0.06, 's', 'lower'),
+                            'scripts': metric(600, 'scripts/s', 'higher', calibration_ms=10)}}
+    current = {'metrics': {'p95': metric(0.14, 's', 'lower', slack=0.11),
+                           'scripts': metric(350, 'scripts/s', 'higher', calibration_ms=15)}}
+    assert compare(current, baseline, tolerance=0.3) == []
+    current['metrics']['scripts'] = metric(350, 'scripts/s', 'higher', calibration_ms=10)
+    regressions = compare(current, baseline, tolerance=0.3)
+    assert len(regressions) == 1 and regressions[0].startswith("scripts"), regressions
+    print("✓ Regressions beyond tolerance reported; faster results and a slower machine pass")
+
+
+def main():
+    """Run all tests"""
+    test_stub()
+    test_pipeline_benchmark()
+    test_compare()
+    print("\n✓ All benchmark suite tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
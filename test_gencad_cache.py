@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI response cache
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_cache import ResponseCache, make_cache_key
+from gencad_engine import GENERATION_CONFIG, GenerationEngine
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+
+
+def test_cache_key():
+    """Test that the key covers every input except the API key"""
+    print("Testing cache keys...")
+    url = "https://example.com/v1beta/models/gemini:generateContent"
+    key = make_cache_key("template", "cube", url + "?key=one", GENERATION_CONFIG)
+    assert key == make_cache_key("template", "cube", url + "?key=two", GENERATION_CONFIG)
+    assert key != make_cache_key("template", "sphere", url, GENERATION_CONFIG)
+    assert key != make_cache_key("other template", "cube", url, GENERATION_CONFIG)
+    assert key != make_cache_key("template", "cube", url, dict(GENERATION_CONFIG, temperature=0.9))
+    print("✓ Cache keys depend on template, prompt, model URL and generationConfig")
+
+
+def test_engine_uses_cache():
+    """Test hits, misses and the bypass flag through the engine"""
+    print("\nTesting engine cache integration...")
+    calls = []
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        engine = GenerationEngine(cache=ResponseCache(cache_dir))
+        engine.request_script = lambda prompt: calls.append(prompt) or VALID_SCRIPT
+
+        first = engine.generate("Create a 50mm cube", save=False)
+        second = engine.generate("Create a 50mm cube", save=False)
+        assert first.ok and not first.cache_hit
+        assert second.ok and second.cache_hit and second.script == VALID_SCRIPT
+        assert len(calls) == 1
+
+        bypassed = engine.generate("Create a 50mm cube", save=False, use_cache=False)
+        assert bypassed.ok and not bypassed.cache_hit and len(calls) == 2
+
+        stats = engine.cache.stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1, stats
+
+        # Invalid scripts are never stored
+        engine.request_script = lambda prompt: "print('hello')"
+        engine.generate("Say hello", save=False)
+        assert engine.cache.get(engine.cache_key("Say hello")) is None
+    print("✓ Repeat prompts are served from the cache without an API call")
+
+
+def test_eviction():
+    """Test entry-count and age based eviction"""
+    print("\nTesting eviction...")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ResponseCache(cache_dir, max_entries=3, max_age=None)
+        for n in range(5):
+            cache.put(f"key{n}", VALID_SCRIPT)
+            os.utime(os.path.join(cache_dir, f"key{n}.json"), (n, n))
+        cache.evict()
+        assert sorted(os.listdir(cache_dir)) == ["key2.json", "key3.json", "key4.json"]
+        assert cache.stats()['evictions'] >= 2
+
+        cache = ResponseCache(cache_dir, max_age=60)
+        cache.put("fresh", VALID_SCRIPT)
+        assert cache.get("fresh") == VALID_SCRIPT
+        cache.max_age = -1
+        time.sleep(0.01)
+        assert cache.get("fresh") is None
+        assert not os.path.exists(os.path.join(cache_dir, "fresh.json"))
+    print("✓ Old and excess entries are evicted")
+
+
+def main():
+    """Run all tests"""
+    test_cache_key()
+    test_engine_uses_cache()
+    test_eviction()
+    print("\n✓ All cache tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
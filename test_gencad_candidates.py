@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for GenCAD AI multi-candidate generation
+Uses a fake Gemini client whose answer and delay depend on the requested temperature
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_engine import GenerationEngine
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+INVALID_SCRIPT = "import os\nos.system('rm -rf /')\n"
+USAGE = {'promptTokenCount': 100, 'candidatesTokenCount': 50}
+
+
+class TemperatureClient:
+    """Answers per temperature: plans maps temperature -> (delay, script)"""
+
+    def __init__(self, plans):
+        self.plans = plans
+        self.temperatures = []
+        self.streams_closed = []
+        self.lock = threading.Lock()
+
+    def _plan(self, payload):
+        temperature = payload['generationConfig']['temperature']
+        with self.lock:
+            self.temperatures.append(temperature)
+        return temperature, self.plans[temperature]
+
+    def generate_content(self, payload, on_retry=None):
+        _, (delay, script) = self._plan(payload)
+        time.sleep(delay)
+        return {'candidates': [{'content': {'parts': [{'text': script}]}}], 'usageMetadata': USAGE}
+
+    def stream_content(self, payload, on_retry=None, on_usage=None):
+        temperature, (delay, script) = self._plan(payload)
+        try:
+            for line in script.splitlines(True):
+                time.sleep(delay / 5)
+                yield line
+            if on_usage:
+                on_usage(USAGE)
+        finally:
+            with self.lock:
+                self.streams_closed.append(temperature)
+
+
+def test_first_valid_candidate_wins():
+    """Test that a slow first candidate loses to a faster valid one, and an invalid fast one is skipped"""
+    print("Testing first-valid-wins selection...")
+    client = TemperatureClient({0.3: (0.5, VALID_SCRIPT), 0.55: (0.0, INVALID_SCRIPT), 0.8: (0.05, VALID_SCRIPT)})
+    engine = GenerationEngine(client=client, candidates=3)
+
+    started = time.monotonic()
+    result = engine.generate("Create a 10mm cube", save=False)
+    elapsed = time.monotonic() - started
+
+    assert result.ok, result.error
+    assert sorted(client.temperatures) == [0.3, 0.55, 0.8]
+    assert result.trace.attrs['candidate_winner'] == 2 and result.trace.attrs['candidates'] == 3
+    assert elapsed < 0.4, f"should not wait for the slow candidate ({elapsed:.2f}s)"
+    # Usage of the candidates that finished before the winner is counted as cost
+    assert result.trace.attrs['response_tokens'] >= 100
+    assert "candidate 3/3 won" in result.trace.breakdown()
+    assert engine.tracer.summary()['counters']['candidate_wins_2'] == 1
+    assert 'gencad_candidate_wins_total{index="2"} 1' in engine.tracer.prometheus()
+    print(f"✓ Candidate 3 won after {elapsed:.2f}s")
+
+
+def test_losing_streams_are_cancelled():
+    """Test that streaming candidates still running are closed once one wins"""
+    print("\nTesting cancellation of losing streams...")
+    client = TemperatureClient({0.3: (0.0, VALID_SCRIPT), 0.55: (2.0, VALID_SCRIPT)})
+    tokens = []
+    engine = GenerationEngine(client=client, candidates=2, stream=True, token_callback=tokens.append)
+
+    result = engine.generate("Create a 10mm cube", save=False)
+    assert result.ok and result.trace.attrs['candidate_winner'] == 0
+
+    deadline = time.monotonic() + 2
+    while 0.55 not in client.streams_closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert 0.55 in client.streams_closed
+    assert time.monotonic() < deadline, "the slow stream should stop at its next chunk, not run to the end"
+    assert "".join(tokens).strip() == VALID_SCRIPT.strip(), "only the first candidate streams to the panel"
+    print("✓ Losing stream closed early; only one candidate streamed")
+
+
+def test_no_valid_candidate_and_ceiling():
+    """Test the fallback when every candidate is invalid, and the token ceiling"""
+    print("\nTesting no-winner fallback and cost ceiling...")
+    client = TemperatureClient({0.3: (0.0, INVALID_SCRIPT), 0.55: (0.0, INVALID_SCRIPT)})
+    engine = GenerationEngine(client=client, candidates=2)
+    result = engine.generate("Create a 10mm cube", save=False)
+    assert not result.ok and "validation failed" in result.error
+    assert result.trace.attrs['candidate_winner'] is None
+    assert engine.tracer.summary()['counters']['candidate_wins_none'] == 1
+
+    engine = GenerationEngine(candidates=4, candidate_token_ceiling=9000)
+    configs = engine.candidate_configs()
+    assert [config['temperature'] for config in configs] == [0.3, 0.55], "4096 tokens each, so only two fit"
+    assert len(GenerationEngine(candidates=4, candidate_token_ceiling=100).candidate_configs()) == 1
+    print("✓ Invalid candidates reported; ceiling trimmed 4 candidates to 2")
+
+
+def main():
+    """Run all tests"""
+    test_first_valid_candidate_wins()
+    test_losing_streams_are_cancelled()
+    test_no_valid_candidate_and_ceiling()
+    print("\n✓ All candidate tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
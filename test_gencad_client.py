@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI Gemini client
+Runs against a local stub HTTP server instead of the real API
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import requests
+
+from gencad_client import GeminiClient, TokenBucket, parse_retry_after, stream_url_for
+
+RESPONSE = {'candidates': [{'content': {'parts': [{'text': "import FreeCAD"}]}}]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Replies with the next queued status code, then 200 with a fixed response"""
+
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.server.requests.append(self.client_address)
+        if ':streamGenerateContent' in self.path:
+            return self.stream_chunks()
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = json.dumps(RESPONSE if status == 200 else {'error': 'busy'}).encode('utf-8')
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '0')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_chunks(self):
+        """Send server.chunks as chunked server-sent events, one every server.chunk_delay seconds"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        try:
+            for text in self.server.chunks:
+                event = {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+                data = f"data: {json.dumps(event)}\r\n\r\n".encode('utf-8')
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+                self.server.chunks_sent += 1
+                time.sleep(self.server.chunk_delay)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub(statuses=()):
+    """Start the stub server on a free port and return it"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    server.statuses = list(statuses)
+    server.requests = []
+    server.chunks = []
+    server.chunks_sent = 0
+    server.chunk_delay = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stub_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/v1beta/models/stub:generateContent"
+
+
+def test_retry_after():
+    """Test Retry-After parsing"""
+    print("Testing Retry-After parsing...")
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    print("✓ Retry-After parsed as seconds or HTTP date")
+
+
+def test_retries_and_keep_alive():
+    """Test retry on 429/503 and connection reuse across requests"""
+    print("\nTesting retries and keep-alive...")
+    server = start_stub([429, 503])
+    retries = []
+    client = GeminiClient(stub_url(server), backoff_base=0.01)
+    try:
+        result = client.generate_content({}, on_retry=lambda *args: retries.append(args))
+        assert result == RESPONSE
+        assert [reason for _, _, reason in retries] == ["429 Too Many Requests", "503 Service Unavailable"]
+
+        for _ in range(5):
+            client.generate_content({})
+        ports = {port for _, port in server.requests}
+        assert len(server.requests) == 8
+        assert len(ports) == 1, f"expected one pooled connection, saw {len(ports)}"
+        print(f"✓ Recovered after {len(retries)} retries; {len(server.requests)} requests over {len(ports)} connection")
+
+        server.statuses = [500] * 3
+        client.max_retries = 2
+        try:
+            client.generate_content({})
+            assert False, "expected HTTPError"
+        except requests.exceptions.HTTPError as e:
+            assert e.response.status_code == 500
+        print("✓ HTTPError raised once the retry budget is exhausted")
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_streaming():
+    """Test streamed generation, including early abort of an unsafe script"""
+    print("\nTesting streaming...")
+    from gencad_engine import GenerationEngine
+
+    assert stream_url_for("https://x/v1beta/models/m:generateContent?key=abc") == \
+        "https://x/v1beta/models/m:streamGenerateContent?key=abc&alt=sse"
+
+    server = start_stub()
+    tokens = []
+    engine = GenerationEngine(api_url=stub_url(server), stream=True, token_callback=tokens.append)
+    try:
+        server.chunks = ["```python\nimport FreeCAD\nimport Part\n", "doc = FreeCAD.newDocument()\n",
+                         "doc.recompute()\n```\n", "This script creates a document."]
+        result = engine.generate("Create a document", save=False)
+        assert result.ok, result.error
+        assert result.script == "import FreeCAD\nimport Part\ndoc = FreeCAD.newDocument()\ndoc.recompute()"
+        assert "".join(tokens).startswith("```python")
+        print("✓ Streamed chunks assembled into a fence-free script")
+
+        server.chunks = ["import FreeCAD\nimport Part\nimport os\n"] + ["x = 1\n"] * 20
+        server.chunks_sent = 0
+        server.chunk_delay = 0.05
+        started = time.monotonic()
+        result = engine.generate("Delete everything", save=False)
+        elapsed = time.monotonic() - started
+        assert not result.ok and "Import of module 'os'" in result.error
+        assert elapsed < 0.5, f"unsafe stream was read for {elapsed:.2f}s"
+        assert server.chunks_sent < 5, f"{server.chunks_sent} chunks sent before abort"
+        print(f"✓ Unsafe stream aborted after {elapsed:.2f}s instead of ~1s")
+    finally:
+        engine.client.close()
+        server.shutdown()
+
+
+def test_token_bucket():
+    """Test that the shared bucket limits request rate across threads"""
+    print("\nTesting token bucket...")
+    bucket = TokenBucket(rate=50, capacity=1)
+    started = time.monotonic()
+    threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    assert elapsed >= 0.09, f"6 tokens at 50/s took only {elapsed:.3f}s"
+
+    bucket.defer(0.1)
+    assert bucket.acquire() >= 0.05
+    print(f"✓ 6 acquisitions at 50/s took {elapsed:.2f}s; defer() holds callers back")
+
+
+def main():
+    """Run all tests"""
+    test_retry_after()
+    test_retries_and_keep_alive()
+    test_streaming()
+    test_token_bucket()
+    print("\n✓ All client tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI headless export pipeline
+Uses the fake freecadcmd in benchmarks/fakes, so FreeCAD does not need to be installed
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.bench_validator import make_script
+from gencad_engine import GenerationEngine
+from gencad_export import MeshCache, ModelExporter, parse_formats
+from gencad_workers import WORKER_SCRIPT, WorkerPool
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+
+
+def write_script(directory, name, source):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    return path
+
+
+def test_export_formats():
+    """Test that one worker job writes STEP, STL and FCStd files"""
+    print("Testing STEP/STL/FCStd export...")
+    with tempfile.TemporaryDirectory() as directory:
+        script = write_script(directory, "bracket.py", make_script(2))
+        output_dir = os.path.join(directory, "out")
+        pool = WorkerPool(FAKE_COMMAND, size=1)
+        messages = []
+        engine = GenerationEngine(status_callback=messages.append, worker_pool=pool)
+        try:
+            export = engine.export_model(script, output_dir, parse_formats("step, STL,fcstd"), tolerance=0.05)
+        finally:
+            pool.close()
+
+        assert export.ok and export.worker_ran, export.to_dict()
+        assert sorted(os.listdir(output_dir)) == ["bracket.FCStd", "bracket.step", "bracket.stl"]
+        with open(export.artifacts['stl'], encoding='utf-8') as f:
+            assert "deflection 0.05" in f.read()
+        with open(export.artifacts['step'], encoding='utf-8') as f:
+            assert f.read().startswith("ISO-10303-21;")
+        assert any("Wrote STEP" in m for m in messages), messages
+
+        try:
+            parse_formats("step,obj")
+            assert False, "expected ValueError"
+        except ValueError as e:
+            assert "obj" in str(e)
+    print("✓ STEP, STL and FCStd written from one headless job")
+
+
+def test_mesh_cache():
+    """Test that re-exporting at the same tolerance reuses the cached mesh without running FreeCAD"""
+    print("\nTesting the mesh cache...")
+    os.environ["FAKE_FREECAD_MESH_DELAY"] = "0.3"
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            script = write_script(directory, "bracket.py", make_script(1))
+            pool = WorkerPool(FAKE_COMMAND, size=1)
+            mesh_cache = MeshCache(os.path.join(directory, "meshes"))
+            exporter = ModelExporter(pool, mesh_cache)
+            try:
+                pool.warm_up()
+                first = exporter.export(script, os.path.join(directory, "a"), ["stl"], tolerance=0.1)
+                started = time.monotonic()
+                second = exporter.export(script, os.path.join(directory, "b"), ["stl"], tolerance=0.10)
+                cached_seconds = time.monotonic() - started
+                finer = exporter.export(script, os.path.join(directory, "c"), ["stl"], tolerance=0.01)
+                mixed = exporter.export(script, os.path.join(directory, "d"), ["step", "stl"], tolerance=0.1)
+            finally:
+                pool.close()
+
+            assert first.ok and first.worker_ran and not first.cached
+            assert second.ok and not second.worker_ran and second.cached == ['stl']
+            assert cached_seconds < 0.3, f"cached export took {cached_seconds:.3f}s"
+            assert finer.worker_ran and not finer.cached, "a different tolerance must tessellate again"
+            assert mixed.worker_ran and mixed.cached == ['stl'] and set(mixed.artifacts) == {'step', 'stl'}
+            stats = mesh_cache.stats()
+            assert stats['hits'] == 2 and stats['misses'] == 2, stats
+    finally:
+        del os.environ["FAKE_FREECAD_MESH_DELAY"]
+    print(f"✓ Cached re-export took {cached_seconds * 1000:.1f} ms instead of tessellating again")
+
+
+def test_export_errors():
+    """Test that scripts without shapes or that fail report an export error"""
+    print("\nTesting export errors...")
+    with tempfile.TemporaryDirectory() as directory:
+        empty = write_script(directory, "empty.py", "import FreeCAD\nFreeCAD.newDocument('Empty')\n")
+        broken = write_script(directory, "broken.py", make_script(1) + "undefined_name\n")
+        pool = WorkerPool(FAKE_COMMAND, size=1)
+        exporter = ModelExporter(pool)
+        try:
+            no_shapes = exporter.export(empty, os.path.join(directory, "out"), ["step"])
+            failed = exporter.export(broken, os.path.join(directory, "out"), ["stl"])
+            fcstd_only = exporter.export(empty, os.path.join(directory, "out"), ["fcstd"])
+        finally:
+            pool.close()
+        assert not no_shapes.ok and "no shapes" in no_shapes.error
+        assert not failed.ok and "NameError" in failed.error
+        assert fcstd_only.ok and os.path.exists(fcstd_only.artifacts['fcstd'])
+    print("✓ Export errors reported")
+
+
+def main():
+    """Run all tests"""
+    test_export_formats()
+    test_mesh_cache()
+    test_export_errors()
+    print("\n✓ All export tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
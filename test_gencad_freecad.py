@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for GenCAD AI FreeCAD discovery
+Uses the fake freecadcmd in benchmarks/fakes, so FreeCAD does not need to be installed
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_engine import GenerationEngine
+from gencad_freecad import FreeCADLocator
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+
+
+def make_locator(directory):
+    return FreeCADLocator(gui_command=FAKE_FREECADCMD, console_command=FAKE_FREECADCMD,
+                          cache_file=os.path.join(directory, "probe.json"))
+
+
+def test_probe_once():
+    """Test that repeated resolves and launches spawn a single version probe"""
+    print("Testing one probe per process...")
+    with tempfile.TemporaryDirectory() as directory:
+        locator = make_locator(directory)
+        installation = locator.resolve()
+        assert installation.found and installation.error is None
+        assert installation.version == "0.21.2"
+        assert installation.capabilities['gui'] and installation.capabilities['console']
+
+        messages = []
+        engine = GenerationEngine(freecad_locator=locator, status_callback=messages.append)
+        script = os.path.join(directory, "model.py")
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write("pass\n")
+        for _ in range(3):
+            assert engine.launch_freecad(script), messages
+            locator.resolve()
+        assert locator.probes == 1, f"expected one probe, saw {locator.probes}"
+    print("✓ 3 launches and 4 resolves spawned 1 version probe")
+
+
+def test_probe_cache():
+    """Test that the on-disk probe is reused and discarded when the executable changes"""
+    print("\nTesting the on-disk probe cache...")
+    with tempfile.TemporaryDirectory() as directory:
+        make_locator(directory).resolve()
+
+        fresh = make_locator(directory)
+        assert fresh.resolve().version == "0.21.2"
+        assert fresh.probes == 0, "a new process should reuse the cached probe"
+
+        stat = os.stat(FAKE_FREECADCMD)
+        try:
+            os.utime(FAKE_FREECADCMD, (stat.st_atime, stat.st_mtime + 10))
+            assert fresh.resolve().version == "0.21.2"
+            assert fresh.probes == 1, "an upgraded executable must be probed again"
+        finally:
+            os.utime(FAKE_FREECADCMD, (stat.st_atime, stat.st_mtime))
+    print("✓ Cached probe reused across locators; re-probed after the executable changed")
+
+
+def test_not_found():
+    """Test that a missing FreeCAD is reported without spawning anything"""
+    print("\nTesting a missing FreeCAD...")
+    with tempfile.TemporaryDirectory() as directory:
+        locator = FreeCADLocator(gui_command="no-such-freecad", console_command="no-such-freecadcmd",
+                                 cache_file=os.path.join(directory, "probe.json"))
+        messages = []
+        engine = GenerationEngine(freecad_locator=locator, status_callback=messages.append)
+        assert not engine.launch_freecad(os.path.join(directory, "model.py"))
+        assert any("not found" in m for m in messages), messages
+        assert locator.probes == 0
+    print("✓ Missing FreeCAD reported with install hints")
+
+
+def main():
+    """Run all tests"""
+    test_probe_once()
+    test_probe_cache()
+    test_not_found()
+    print("\n✓ All FreeCAD discovery tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI generation history
+Uses a fake Gemini client, a temporary SQLite file and the fake freecadcmd in benchmarks/fakes
+"""
+
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_engine import GenerationEngine, GenerationResult
+from gencad_history import History, main as history_main, match_expression
+from gencad_workers import WORKER_SCRIPT, WorkerPool
+from gencad_workspace import Workspace, text_digest
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Shaft").Shape = Part.makeCylinder(5, 40)
+doc.recompute()
+"""
+INVALID_SCRIPT = "import os\nos.system('ls')\n"
+
+
+class ScriptClient:
+    """Answers with the invalid script if the prompt mentions 'shell' (unless it asks for a repair), else the valid one"""
+
+    def __init__(self):
+        self.requests = 0
+
+    def generate_content(self, payload, on_retry=None):
+        self.requests += 1
+        prompt = payload['contents'][0]['parts'][0]['text']
+        text = INVALID_SCRIPT if "shell" in prompt and "It was rejected" not in prompt else VALID_SCRIPT
+        return {'candidates': [{'content': {'parts': [{'text': text}]}}]}
+
+
+def test_record_and_search():
+    """Test that generations are recorded with their outcome and found by prefix search"""
+    print("Testing recording and search...")
+    with tempfile.TemporaryDirectory() as directory:
+        history = History(os.path.join(directory, "history.sqlite3"))
+        engine = GenerationEngine(client=ScriptClient(), history=history)
+        assert engine.generate("A  40mm steel cylinder shaft", save=False).ok
+        assert not engine.generate("Run a shell command", save=False).ok
+        assert history.flush()
+
+        entries = history.search("cyl shaft")
+        assert len(entries) == 1 and entries[0].outcome == 'ok' and entries[0].source == 'gemini'
+        assert entries[0].total_seconds is not None and entries[0].total_seconds >= 0
+        assert history.script(entries[0].script_hash).strip() == VALID_SCRIPT.strip()
+        assert [entry.outcome for entry in history.search("")] == ['invalid', 'ok'], "newest first"
+        assert history.search("shell")[0].error.startswith("Error: Script validation failed")
+        assert history.search("nothing like this") == []
+        assert match_expression("'; DROP TABLE --") == '"DROP"* "TABLE"*'
+        assert history.search('"unbalanced quote') == []
+
+        with sqlite3.connect(history.path) as connection:
+            assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            normalized = connection.execute("SELECT normalized_prompt FROM generations WHERE id = 1").fetchone()[0]
+        assert normalized == "A 40mm steel cylinder shaft"
+        history.close()
+    print("✓ Two generations recorded; prefix search and outcomes correct")
+
+
+def test_batched_writes():
+    """Test that recording never waits for SQLite and writes share transactions"""
+    print("\nTesting batched background writes...")
+    with tempfile.TemporaryDirectory() as directory:
+        history = History(os.path.join(directory, "history.sqlite3"), batch_size=100, flush_interval=0.2)
+        results = []
+        for index in range(500):
+            result = GenerationResult(f"Bracket number {index}")
+            result.script, result.is_valid = VALID_SCRIPT, True
+            results.append(result)
+
+        started = time.monotonic()
+        for result in results:
+            history.record(result)
+        queued = time.monotonic() - started
+        assert queued < 0.5, f"record() should only queue ({queued:.3f}s for 500)"
+
+        assert history.flush()
+        stats = history.stats()
+        assert stats['records'] == 500 and stats['errors'] == 0 and stats['pending'] == 0
+        assert stats['batches'] <= 10, f"expected batched commits, saw {stats['batches']}"
+        assert len(history.search("bracket", limit=1000)) == 500
+        with sqlite3.connect(history.path) as connection:
+            assert connection.execute("SELECT count(*) FROM scripts").fetchone()[0] == 1, "scripts are stored once"
+        history.close()
+        history.record(results[0])  # ignored after close, never raises
+    print(f"✓ 500 records queued in {queued * 1000:.1f}ms and written in {stats['batches']} transactions")
+
+
+def test_artifacts_and_replay():
+    """Test that exports are recorded and a stored script is printed back without an API call"""
+    print("\nTesting artifacts and replay...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.sqlite3")
+        history = History(path)
+        client = ScriptClient()
+        engine = GenerationEngine(client=client, history=history, worker_pool=WorkerPool(FAKE_COMMAND, size=1),
+                                  workspace=Workspace(os.path.join(directory, "workspace")))
+        try:
+            result = engine.generate("A cylinder shaft for export")
+            export = engine.export_model(result.script_path, formats=("step", "stl"))
+            assert export is not None and export.ok
+        finally:
+            engine.worker_pool.close()
+        history.close()
+
+        reopened = History(path)
+        files = reopened.artifacts(text_digest(result.script))
+        assert set(files) == {'step', 'stl'} and all(os.path.isfile(p) for paths in files.values() for p in paths)
+        stdout = io.StringIO()
+        with redirect_stdout(stdout):
+            assert history_main(["--history-file", path, "export"]) == 0
+            assert history_main(["--history-file", path, "--show", "1"]) == 0
+            assert history_main(["--history-file", path, "--show", "99"]) == 1
+        assert "#1" in stdout.getvalue() and result.script in stdout.getvalue()
+        assert client.requests == 1
+    print("✓ Exported files recorded; the script replays from the history alone")
+
+
+def test_repair_replaces_row():
+    """Test that a repaired job keeps one history row, holding the final outcome"""
+    print("\nTesting repaired jobs...")
+    with tempfile.TemporaryDirectory() as directory:
+        history = History(os.path.join(directory, "history.sqlite3"))
+        engine = GenerationEngine(client=ScriptClient(), history=history)
+        result = engine.generate("A shaft from a shell command", save=False)
+        assert not result.ok and history.flush()
+        assert engine.repair_script(result, result.error.splitlines(), save=False)
+
+        # Recorded and repaired within one batch as well
+        quick = engine.generate("A second shaft from a shell command", save=False)
+        assert engine.repair_script(quick, quick.error.splitlines(), save=False)
+        assert history.flush()
+
+        entries = history.search("shaft shell")
+        assert [entry.outcome for entry in entries] == ['ok', 'ok'], entries
+        assert all(entry.error is None and entry.script_hash == text_digest(VALID_SCRIPT.strip()) for entry in entries)
+        assert history.stats()['records'] == 2
+        history.close()
+    print("✓ One row per repaired job, with the final outcome")
+
+
+def main():
+    """Run all tests"""
+    test_record_and_search()
+    test_batched_writes()
+    test_artifacts_and_replay()
+    test_repair_replaces_row()
+    print("\n✓ All history tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI job queue
+Uses a fake Gemini call so no network access is needed
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_engine import GenerationEngine
+from gencad_jobs import CANCELLED, DONE, FAILED, QUEUED, RUNNING, TIMED_OUT, JobQueue
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+
+
+class GatedEngine(GenerationEngine):
+    """Engine whose Gemini call waits until its prompt is released; records start order"""
+
+    def __init__(self):
+        super().__init__()
+        self.gates = {}
+        self.started = []
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def gate(self, prompt):
+        with self.lock:
+            return self.gates.setdefault(prompt, threading.Event())
+
+    def request_script(self, prompt):
+        with self.lock:
+            self.started.append(prompt)
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            self.gate(prompt).wait(5)
+        finally:
+            with self.lock:
+                self.active -= 1
+        return "import os" if "bad" in prompt else VALID_SCRIPT
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        time.sleep(0.005)
+
+
+def test_bounded_workers_and_priority():
+    """Test that at most `workers` jobs run at once and a bumped job runs next"""
+    print("Testing worker bound and priority bump...")
+    engine = GatedEngine()
+    queue = JobQueue(engine, workers=2, launch=False)
+    jobs = [queue.submit(f"part {n}") for n in range(5)]
+
+    wait_for(lambda: len(engine.started) == 2)
+    assert [job.state for job in jobs] == [RUNNING, RUNNING, QUEUED, QUEUED, QUEUED]
+    assert queue.bump(jobs[4].id)
+    assert not queue.bump(jobs[0].id), "running jobs cannot be bumped"
+
+    # Free one worker at a time so the start order is deterministic
+    engine.gate("part 0").set()
+    wait_for(lambda: len(engine.started) == 3)
+    assert engine.started[2] == "part 4", f"bumped job should run next, order was {engine.started}"
+    for n in range(5):
+        engine.gate(f"part {n}").set()
+    wait_for(lambda: all(job.done for job in jobs))
+
+    assert engine.peak == 2
+    assert all(job.state == DONE for job in jobs)
+    assert all(job.result.ok and job.elapsed() >= 0 for job in jobs)
+    assert "done" in jobs[0].describe()
+    queue.close()
+    print(f"✓ Peak concurrency {engine.peak}; run order {engine.started}")
+
+
+def test_cancel_queued_and_running():
+    """Test cancelling a queued job and a running job"""
+    print("\nTesting cancellation...")
+    engine = GatedEngine()
+    changes = []
+    queue = JobQueue(engine, workers=1, launch=False, on_change=lambda job: changes.append((job.id, job.state)))
+    running = queue.submit("slow part")
+    queued = queue.submit("queued part")
+    wait_for(lambda: running.state == RUNNING)
+
+    assert queue.cancel(queued.id)
+    assert queued.state == CANCELLED
+    assert queue.cancel(running.id)
+    wait_for(lambda: running.done)
+    assert running.state == CANCELLED and running.result.cancelled
+    assert not queue.cancel(running.id), "finished jobs cannot be cancelled again"
+
+    # The worker is free again; the cancelled queued job never started
+    follow_up = queue.submit("next part")
+    engine.gate("next part").set()
+    wait_for(lambda: follow_up.done)
+    assert follow_up.state == DONE
+    assert "queued part" not in engine.started
+    assert (running.id, CANCELLED) in changes
+    engine.gate("slow part").set()
+    queue.close()
+    print("✓ Queued and running jobs cancelled; the worker moved on")
+
+
+def test_deadline_and_failures():
+    """Test that the overall deadline stops a hung job and invalid scripts fail"""
+    print("\nTesting deadlines and failures...")
+    engine = GatedEngine()
+    queue = JobQueue(engine, workers=2, deadline=0.2, launch=False)
+    hung = queue.submit("hung part")
+    bad = queue.submit("bad part")
+    engine.gate("bad part").set()
+
+    wait_for(lambda: hung.done and bad.done)
+    assert hung.state == TIMED_OUT, hung.state
+    assert 0.2 <= hung.elapsed() < 2
+    assert bad.state == FAILED and "validation failed" in bad.error
+    assert queue.counts() == {TIMED_OUT: 1, FAILED: 1}
+    engine.gate("hung part").set()
+    queue.close()
+    print(f"✓ Hung job timed out after {hung.elapsed():.2f}s; invalid script failed")
+
+
+def test_finished_jobs_are_trimmed():
+    """Test that only the most recent finished jobs stay listed"""
+    print("\nTesting job list trimming...")
+    engine = GatedEngine()
+    queue = JobQueue(engine, workers=2, launch=False, max_finished=3)
+    jobs = [queue.submit(f"trim {n}") for n in range(6)]
+    for n in range(6):
+        engine.gate(f"trim {n}").set()
+    wait_for(lambda: all(job.done for job in jobs))
+    assert [job.id for job in queue.jobs()] == [job.id for job in jobs[3:]]
+    queue.close()
+    print("✓ Job list keeps the last 3 finished jobs")
+
+
+def main():
+    """Run all tests"""
+    test_bounded_workers_and_priority()
+    test_cancel_queued_and_running()
+    test_deadline_and_failures()
+    test_finished_jobs_are_trimmed()
+    print("\n✓ All job queue tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
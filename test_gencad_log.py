@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI status log and journal
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_log import Journal, StatusLog, level_for
+from gencad_status import StatusQueue
+
+
+def events(*items):
+    """Build status events from ('status', text) / ('tokens', text) pairs"""
+    queue = StatusQueue()
+    for kind, text in items:
+        queue.push(kind, text)
+    return queue.drain()
+
+
+def test_levels_and_filter():
+    """Test level inference, token line assembly and filtering"""
+    print("Testing levels and filtering...")
+    assert level_for("Error: FreeCAD command 'freecad' not found.") == 'ERROR'
+    assert level_for("Gemini API unavailable (HTTP 503), retrying in 1.0s (attempt 1)...") == 'WARNING'
+    assert level_for("Script validation passed. Creating temporary file...") == 'INFO'
+
+    log = StatusLog()
+    text = log.add(events(('status', "Connecting to Gemini AI..."), ('tokens', "import Free"),
+                          ('tokens', "CAD\nimport Pa"), ('status', "Error: Script validation failed")))
+    assert "import FreeCAD\nimport Pa\n[" in text, text
+    assert log.total_lines == 4
+
+    errors_only = log.set_level('ERROR')
+    assert errors_only.count("\n") == 1 and "validation failed" in errors_only
+    assert log.add(events(('status', "Script saved"), ('tokens', "x = 1\n"))) == ""
+    assert "import FreeCAD" in log.set_level('DEBUG')
+    try:
+        log.set_level('LOUD')
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+    print("✓ Levels inferred, streamed text split into lines, filter applied")
+
+
+def test_bounded_ring():
+    """Test that memory and per-batch time stay flat however many lines arrive"""
+    print("\nTesting the bounded ring buffer...")
+    log = StatusLog(max_lines=500)
+    batch_times = []
+    for batch in range(200):
+        batch_events = events(*[('status', f"line {batch}-{n}") for n in range(50)])
+        started = time.perf_counter()
+        log.add(batch_events)
+        batch_times.append(time.perf_counter() - started)
+
+    assert log.total_lines == 10000 and log.dropped_lines == 9500
+    view = log.view_text()
+    assert view.count("\n") == 500 and view.rstrip().endswith("line 199-49")
+    early = sorted(batch_times[10:30])[10]
+    late = sorted(batch_times[-20:])[10]
+    assert late < early * 3, f"batch time grew from {early * 1e6:.0f}us to {late * 1e6:.0f}us"
+    print(f"✓ 10000 lines kept at 500; median batch {early * 1e6:.0f}us early vs {late * 1e6:.0f}us late")
+
+
+def test_journal_rotation():
+    """Test that the journal keeps full history as JSON lines and rotates when full"""
+    print("\nTesting the journal...")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "logs", "status.jsonl")
+        journal = Journal(path, max_bytes=4096, backups=2)
+        log = StatusLog(max_lines=10, journal=journal)
+        log.add(events(('tokens', "a"), ('tokens', "b"), ('tokens', "c\n"), ('status', "done")))
+        for n in range(200):
+            log.add(events(('status', f"message {n}")))
+        journal.close()
+
+        files = sorted(os.listdir(os.path.dirname(path)))
+        assert files == ["status.jsonl", "status.jsonl.1", "status.jsonl.2"], files
+        assert journal.rotations > 2 and journal.records == 202
+        for name in files:
+            name = os.path.join(os.path.dirname(path), name)
+            assert os.path.getsize(name) < 4096 + 100, "a journal file overran max_bytes"
+            with open(name, encoding='utf-8') as f:
+                assert all(json.loads(line) for line in f)
+        with open(path, encoding='utf-8') as f:
+            last = [json.loads(line) for line in f][-1]
+        assert last['text'] == "message 199" and last['level'] == 'INFO'
+
+        first = Journal(os.path.join(directory, "t.jsonl"))
+        StatusLog(journal=first).add(events(('tokens', "a"), ('tokens', "b"), ('status', "done")))
+        first.close()
+        with open(os.path.join(directory, "t.jsonl"), encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        assert [(r['kind'], r['text']) for r in records] == [('tokens', "ab"), ('status', "done")]
+    print("✓ Journal rotated into 2 backups; streamed chunks written as one record")
+
+
+def main():
+    """Run all tests"""
+    test_levels_and_filter()
+    test_bounded_ring()
+    test_journal_rotation()
+    print("\n✓ All status log tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
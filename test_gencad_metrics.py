@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for GenCAD AI tracing and metrics
+A fake Gemini client stands in for the network
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.bench_validator import make_script
+from gencad_engine import GenerationEngine
+from gencad_metrics import Tracer, percentile
+
+SCRIPT = make_script(1)
+USAGE = {'promptTokenCount': 420, 'candidatesTokenCount': 180, 'totalTokenCount': 600}
+
+
+class FakeClient:
+    """Answers with SCRIPT and usageMetadata after one simulated retry"""
+
+    def generate_content(self, payload, on_retry=None):
+        if on_retry:
+            on_retry(1, 0.0, "503 Service Unavailable")
+        return {'candidates': [{'content': {'parts': [{'text': SCRIPT}]}}], 'usageMetadata': USAGE}
+
+    def stream_content(self, payload, on_retry=None, on_usage=None):
+        for line in SCRIPT.splitlines(True):
+            yield line
+        if on_usage:
+            on_usage(USAGE)
+
+
+def test_job_spans():
+    """Test that a job records every stage with tokens, retries and cache hits"""
+    print("Testing per-job spans...")
+    messages = []
+    tracer = Tracer()
+    engine = GenerationEngine(client=FakeClient(), tracer=tracer, status_callback=messages.append)
+    result = engine.generate("Create a 60mm bracket", save=True)
+    engine.cleanup_temp_file(result.script_path)
+
+    assert result.ok, result.error
+    record = result.to_dict()
+    assert list(record['timings']) == ['prompt', 'request', 'extract', 'validate', 'save', 'total'], record['timings']
+    attrs = result.trace.attrs
+    assert attrs['prompt_chars'] == len("Create a 60mm bracket")
+    assert attrs['prompt_tokens'] == 420 and attrs['response_tokens'] == 180
+    assert attrs['retries'] == 1 and attrs['outcome'] == 'ok'
+    timing = [m for m in messages if m.startswith("Timing: ")]
+    assert timing and "request" in timing[0] and "1 retries" in timing[0] and "420+180 tokens" in timing[0]
+
+    streaming = GenerationEngine(client=FakeClient(), tracer=tracer, stream=True)
+    streamed = streaming.generate("Create a 60mm bracket", save=False)
+    assert streamed.ok and 'extract' not in streamed.trace.timings
+    assert streamed.trace.attrs['response_tokens'] == 180
+    print(f"✓ Stages recorded: {result.trace.breakdown()}")
+
+
+def test_exports():
+    """Test the JSON summary and Prometheus text"""
+    print("\nTesting metric exports...")
+    tracer = Tracer()
+    for n in range(100):
+        trace = tracer.job(prompt_chars=10)
+        trace.record('request', (n + 1) / 100.0)
+        trace.set(cache_hit=n % 4 == 0)
+        trace.finish('ok' if n % 10 else 'error')
+
+    summary = tracer.summary()
+    json.dumps(summary)
+    request = summary['stages']['request']
+    assert request['count'] == 100
+    assert (request['p50'], request['p95'], request['p99'], request['max']) == (0.5, 0.95, 0.99, 1.0)
+    assert summary['counters']['jobs_ok'] == 90 and summary['counters']['cache_hits'] == 25
+
+    text = tracer.prometheus()
+    assert 'gencad_stage_duration_seconds_bucket{stage="request",le="0.1"} 10' in text
+    assert 'gencad_stage_duration_seconds_bucket{stage="request",le="+Inf"} 100' in text
+    assert 'gencad_stage_duration_seconds_count{stage="request"} 100' in text
+    assert 'gencad_jobs_total{outcome="error"} 10' in text
+    assert 'gencad_cache_lookups_total{result="miss"} 75' in text
+    assert percentile([], 0.5) == 0.0 and percentile([3.0], 0.99) == 3.0
+    assert tracer.format_summary().startswith("p50/p95: request 500ms/950ms")
+    print("✓ p50/p95/p99 and cumulative Prometheus buckets exported")
+
+
+def main():
+    """Run all tests"""
+    test_job_spans()
+    test_exports()
+    print("\n✓ All metrics tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
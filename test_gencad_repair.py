@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI validation-feedback repair loop
+Uses a scripted fake Gemini client and the fake freecadcmd in benchmarks/fakes
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_batch import RESULTS_FILE, BatchRunner
+from gencad_engine import PROMPT_TEMPLATE, GenerationEngine
+from gencad_workers import WORKER_SCRIPT, WorkerPool
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+BANNED_SCRIPT = VALID_SCRIPT.replace("Part.makeBox", "getattr(Part, 'makeBox')")
+RUNTIME_ERROR_SCRIPT = VALID_SCRIPT.replace("doc.recompute()", "size = 10 / 0\ndoc.recompute()")
+
+
+class ScriptedClient:
+    """Returns the given scripts in order and keeps every prompt it was sent"""
+
+    def __init__(self, *scripts):
+        self.scripts = list(scripts)
+        self.prompts = []
+
+    def generate_content(self, payload, on_retry=None):
+        self.prompts.append(payload['contents'][0]['parts'][0]['text'])
+        script = self.scripts.pop(0) if len(self.scripts) > 1 else self.scripts[0]
+        return {'candidates': [{'content': {'parts': [{'text': script}]}}]}
+
+
+class StreamingClient(ScriptedClient):
+    """Streams the given scripts in order, one fenced line per chunk"""
+
+    def stream_content(self, payload, on_retry=None, on_usage=None):
+        text = self.generate_content(payload)['candidates'][0]['content']['parts'][0]['text']
+        yield "```python\n"
+        for line in text.splitlines(keepends=True):
+            yield line
+        yield "```\n"
+
+
+def test_validation_repair():
+    """Test that a rejected script is sent back with its violations and the fix is used"""
+    print("Testing validation repair...")
+    client = ScriptedClient(BANNED_SCRIPT, VALID_SCRIPT)
+    messages = []
+    engine = GenerationEngine(client=client, repair_attempts=2, status_callback=messages.append)
+    result = engine.generate("Create a 10mm cube", save=False)
+
+    assert result.ok, result.error
+    assert result.script == VALID_SCRIPT.strip()
+    assert len(client.prompts) == 2
+    repair_prompt = client.prompts[1]
+    assert "getattr" in repair_prompt and "line 4" in repair_prompt
+    assert "getattr(Part, 'makeBox')" in repair_prompt, "the failing script is included"
+    assert "Create a 10mm cube" in repair_prompt
+    assert len(repair_prompt) < len(PROMPT_TEMPLATE) + len(BANNED_SCRIPT), "the follow-up is compact"
+    assert result.trace.attrs['repairs'] == 1 and 'repair' in result.trace.timings
+    assert any("asking Gemini to repair" in message for message in messages)
+    print("✓ Repaired in one follow-up request")
+
+
+def test_repair_budget():
+    """Test that repairs stop at the budget and the last error is reported"""
+    print("\nTesting the retry budget...")
+    client = ScriptedClient(BANNED_SCRIPT)
+    engine = GenerationEngine(client=client, repair_attempts=2)
+    result = engine.generate("Create a 10mm cube", save=False)
+    assert not result.ok and "getattr" in result.error
+    assert len(client.prompts) == 3 and result.trace.attrs['repairs'] == 2
+
+    client = ScriptedClient(BANNED_SCRIPT)
+    result = GenerationEngine(client=client).generate("Create a 10mm cube", save=False)
+    assert not result.ok and len(client.prompts) == 1, "no repairs by default"
+    assert engine.tracer.summary()['counters']['repairs'] == 2
+    print("✓ Stopped after 2 repairs")
+
+
+def test_streaming_repair():
+    """Test that a script rejected mid-stream is repaired from the part that arrived"""
+    print("\nTesting repair of a stopped stream...")
+    client = StreamingClient(BANNED_SCRIPT, VALID_SCRIPT)
+    engine = GenerationEngine(client=client, stream=True, repair_attempts=2)
+    result = engine.generate("Create a 10mm cube", save=False)
+    assert result.ok, result.error
+    assert result.script == VALID_SCRIPT.strip()
+    assert len(client.prompts) == 2 and result.trace.attrs['repairs'] == 1
+    assert "getattr(Part, 'makeBox')" in client.prompts[1] and "complete script" in client.prompts[1]
+
+    client = StreamingClient(BANNED_SCRIPT)
+    result = GenerationEngine(client=client, stream=True, repair_attempts=1).generate("Create a 10mm cube", save=False)
+    assert not result.ok and "getattr" in result.error and len(client.prompts) == 2
+    print("✓ Stopped stream repaired in one follow-up request")
+
+
+def test_freecad_traceback_repair():
+    """Test that a FreeCAD runtime error in a batch is sent back and the fixed script re-run"""
+    print("\nTesting FreeCAD traceback repair...")
+    client = ScriptedClient(RUNTIME_ERROR_SCRIPT, VALID_SCRIPT)
+    pool = WorkerPool(FAKE_COMMAND, size=1)
+    engine = GenerationEngine(client=client, worker_pool=pool, repair_attempts=1)
+    try:
+        with tempfile.TemporaryDirectory() as output_dir:
+            summary = BatchRunner(engine, workers=1).run(["Create a 10mm cube"], output_dir)
+            with open(os.path.join(output_dir, RESULTS_FILE), encoding='utf-8') as f:
+                record = json.loads(f.readline())
+            with open(os.path.join(output_dir, record['script_file']), encoding='utf-8') as f:
+                written = f.read()
+    finally:
+        pool.close()
+
+    assert summary['succeeded'] == 1, record
+    assert record['execution']['ok']
+    assert "ZeroDivisionError" in client.prompts[1]
+    assert "10 / 0" not in written
+    print("✓ Traceback sent back; the repaired script ran")
+
+
+def main():
+    """Run all tests"""
+    test_validation_repair()
+    test_repair_budget()
+    test_streaming_repair()
+    test_freecad_traceback_repair()
+    print("\n✓ All repair tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI local service and its clients
+Runs fully offline against the stub Gemini server and the fake freecadcmd in benchmarks/fakes
+"""
+
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.stub_gemini import StubGemini
+from gencad_cache import ResponseCache
+from gencad_cli import main as cli_main
+from gencad_client import GeminiClient
+from gencad_engine import GenerationEngine
+from gencad_history import History
+from gencad_jobs import CANCELLED, DONE
+from gencad_remote import RemoteJobQueue, ServiceClient, ServiceError
+from gencad_server import GenCADService, serve_in_background, server_url
+from gencad_workers import WORKER_SCRIPT, WorkerPool
+from gencad_workspace import Workspace
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+
+
+class Service:
+    """A service on a free port backed by the stub Gemini server and fake FreeCAD workers"""
+
+    def __init__(self, directory, latency=0.05):
+        self.stub = StubGemini(latency=latency, parts=2).start()
+        engine = GenerationEngine(api_url=self.stub.url, client=GeminiClient(self.stub.url),
+                                  cache=ResponseCache(os.path.join(directory, "responses")),
+                                  history=History(os.path.join(directory, "history.sqlite3")),
+                                  worker_pool=WorkerPool(FAKE_COMMAND, size=1),
+                                  workspace=Workspace(os.path.join(directory, "workspace")))
+        self.service = GenCADService(engine, workers=2)
+        self.server = serve_in_background(self.service)
+        self.url = server_url(self.server)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.service.close()
+        self.stub.stop()
+
+
+def test_jobs_and_downloads():
+    """Test generate, execute and export jobs, polling, and file downloads over HTTP"""
+    print("Testing jobs over HTTP...")
+    with tempfile.TemporaryDirectory() as directory:
+        service = Service(directory)
+        client = ServiceClient(service.url)
+        try:
+            assert client.health()['ok']
+            first = client.submit("Service bracket", execute=True)
+            second = client.submit("Service bracket", formats=["stl", "step"])
+            assert first['state'] in ('queued', 'running')
+
+            first = client.wait(first['id'], timeout=30)
+            second = client.wait(second['id'], timeout=30)
+            assert first['state'] == DONE, first
+            assert first['outputs']['execution']['ok']
+            assert second['state'] == DONE and second['outputs']['export']['error'] is None, second
+            assert service.stub.requests == 1, "both jobs share one Gemini request through the shared engine"
+
+            script = client.script(first['id'])
+            assert "import FreeCAD" in script
+            stl = client.download(second['outputs']['export']['files']['stl'], os.path.join(directory, "model.stl"))
+            with open(stl, encoding='utf-8') as f:
+                assert "solid" in f.read()
+
+            validation = client.validate("import os\nos.system('ls')\n")
+            assert not validation['ok'] and any(v['line'] for v in validation['violations'])
+            exported = client.export(script, formats=["step"])
+            assert set(exported['files']) == {'step'}
+            assert 'gencad_jobs_total{outcome="ok"} 2' in client.metrics()
+            service.service.engine.history.flush()
+            entries = client.history("service")
+            assert len(entries) == 2 and entries[0]['outcome'] == 'ok'
+            assert client.history_script(entries[0]['id']) == script
+
+            for bad in (lambda: client.submit(""), lambda: client.job(999), lambda: client.download("/files/../x", "x"),
+                        lambda: client.history_script(999)):
+                try:
+                    bad()
+                    raise AssertionError("expected a ServiceError")
+                except ServiceError as e:
+                    assert e.status in (400, 404)
+            for bad in (lambda: client.submit("Bracket", formats=["stl"], tolerance="fine"),
+                        lambda: client.export(script, tolerance=-1), lambda: client.export(script, tolerance=True)):
+                try:
+                    bad()
+                    raise AssertionError("expected a ServiceError")
+                except ServiceError as e:
+                    assert e.status == 400 and "'tolerance' must be a positive number" in str(e), e
+        finally:
+            service.close()
+    print("✓ Execute, export, validate and download all served")
+
+
+def test_cancel_and_remote_queue():
+    """Test cancelling over HTTP and the GUI's remote job queue"""
+    print("\nTesting cancellation and the remote job queue...")
+    with tempfile.TemporaryDirectory() as directory:
+        service = Service(directory, latency=0.5)
+        client = ServiceClient(service.url)
+        changes = []
+        done = threading.Event()
+
+        def on_change(job):
+            changes.append((job.id, job.state))
+            if job.done:
+                done.set()
+
+        try:
+            slow = client.submit("Slow part")
+            time.sleep(0.1)
+            assert client.cancel(slow['id'])
+            assert client.wait(slow['id'], timeout=10)['state'] == CANCELLED
+
+            queue = RemoteJobQueue(client, service.service.engine, launch=False, on_change=on_change, poll_interval=0.05)
+            job = queue.submit("Queued from the desktop app")
+            assert done.wait(10), changes
+            assert job.state == DONE and (job.id, 'running') in changes
+            assert "done" in job.describe()
+            queue.close()
+
+            # A rejected or unreachable submission is reported, never raised into the GUI
+            messages = []
+            engine = GenerationEngine(status_callback=messages.append)
+            for url in (service.url, "http://127.0.0.1:9"):
+                queue = RemoteJobQueue(ServiceClient(url, timeout=2), engine, launch=False)
+                assert queue.submit("") is None and queue.jobs() == []
+            assert len(messages) == 2 and all(m.startswith("Error: Could not queue the job") for m in messages)
+            assert "400" in messages[0] and "Cannot reach" in messages[1], messages
+        finally:
+            service.close()
+    print(f"✓ Cancelled one job; the remote queue saw {len(changes)} state changes")
+
+
+def test_cli_client():
+    """Test gencad_cli.py --server writes the script and downloads exports"""
+    print("\nTesting the command line as a client...")
+    with tempfile.TemporaryDirectory() as directory:
+        service = Service(directory)
+        try:
+            output = os.path.join(directory, "part.py")
+            export_dir = os.path.join(directory, "exports")
+            code = cli_main(["CLI part", "--server", service.url, "-q", "-o", output,
+                             "--export-dir", export_dir, "--formats", "stl"])
+            assert code == 0
+            with open(output, encoding='utf-8') as f:
+                assert "import FreeCAD" in f.read()
+            assert [os.path.splitext(name)[1] for name in os.listdir(export_dir)] == [".stl"]
+
+            stdout = io.StringIO()
+            with redirect_stdout(stdout):
+                assert cli_main(["CLI part", "--server", "http://127.0.0.1:9", "-q"]) == 1
+        finally:
+            service.close()
+    print("✓ Script and STL fetched from the service")
+
+
+def main():
+    """Run all tests"""
+    test_jobs_and_downloads()
+    test_cancel_and_remote_queue()
+    test_cli_client()
+    print("\n✓ All service tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for GenCAD AI single-flight coalescing
+Uses fake Gemini calls so no network access is needed
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_batch import BatchRunner
+from gencad_engine import GenerationEngine
+from gencad_singleflight import Cancelled, CancelToken, SingleFlight
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+
+
+class CountingEngine(GenerationEngine):
+    """Engine whose Gemini call blocks until released and counts how often it runs"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def request_script(self, prompt):
+        with self.lock:
+            self.calls += 1
+        self.release.wait(5)
+        return VALID_SCRIPT
+
+
+def run_in_threads(function, count):
+    """Start count threads running function(index); returns (threads, results)"""
+    results = [None] * count
+    threads = [threading.Thread(target=lambda i=i: results.__setitem__(i, function(i))) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for condition"
+        time.sleep(0.005)
+
+
+def test_concurrent_calls_share_one_run():
+    """Test that concurrent calls with one key run the function once and all get its result"""
+    print("Testing coalescing of concurrent calls...")
+    flights = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def work(cancel):
+        runs.append(1)
+        release.wait(5)
+        return "script"
+
+    threads, results = run_in_threads(lambda i: flights.do("key", work), 5)
+    wait_for(lambda: flights.stats()['coalesced'] == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert [result for result, _ in results] == ["script"] * 5
+    assert sum(1 for _, shared in results if shared) == 4
+    assert flights.in_flight() == 0
+
+    # Once the first run has finished, the next call starts a fresh one
+    assert flights.do("key", lambda cancel: "again") == ("again", False)
+    print("✓ Five concurrent callers shared one run")
+
+
+def test_errors_reach_every_caller():
+    """Test that an exception from the shared run is raised to every caller"""
+    print("\nTesting error propagation...")
+    flights = SingleFlight()
+    release = threading.Event()
+
+    def work(cancel):
+        release.wait(5)
+        raise ValueError("bad response")
+
+    def call(index):
+        try:
+            flights.do("key", work)
+        except ValueError as e:
+            return str(e)
+
+    threads, results = run_in_threads(call, 3)
+    wait_for(lambda: flights.stats()['coalesced'] == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results == ["bad response"] * 3
+    print("✓ Every caller saw the shared error")
+
+
+def test_cancellation_is_reference_counted():
+    """Test that one caller cancelling leaves the shared run alive until the last one cancels"""
+    print("\nTesting reference-counted cancellation...")
+    flights = SingleFlight()
+    started = threading.Event()
+    shared_cancel = []
+
+    def work(cancel):
+        shared_cancel.append(cancel)
+        started.set()
+        cancel.wait(5)
+        return "finished" if not cancel.cancelled else "aborted"
+
+    tokens = [CancelToken(), CancelToken()]
+
+    def call(index):
+        try:
+            return flights.do("key", work, tokens[index])[0]
+        except Cancelled:
+            return "cancelled"
+
+    threads, results = run_in_threads(call, 2)
+    started.wait(5)
+    wait_for(lambda: flights.stats()['coalesced'] == 1)
+
+    tokens[0].cancel()
+    threads[0].join(5)
+    assert results[0] == "cancelled"
+    assert not shared_cancel[0].cancelled, "one caller cancelling must not cancel the shared run"
+    assert flights.in_flight() == 1
+
+    tokens[1].cancel()
+    threads[1].join(5)
+    assert results[1] == "cancelled"
+    assert shared_cancel[0].cancelled, "the shared run is cancelled once every caller has left"
+    assert flights.in_flight() == 0
+    assert flights.stats()['cancelled'] == 1
+    print("✓ Shared run cancelled only after the last caller left")
+
+
+def test_engine_coalesces_duplicate_prompts():
+    """Test that duplicate prompts in a batch make a single Gemini call"""
+    print("\nTesting engine coalescing in a batch...")
+    engine = CountingEngine()
+    prompts = ["Create a 50mm cube", "Create a  50mm cube ", "Create a 50mm cube", "Make a washer"]
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        runner = BatchRunner(engine, workers=4)
+        thread = threading.Thread(target=lambda: setattr(runner, 'summary', runner.run(prompts, output_dir)))
+        thread.start()
+        wait_for(lambda: engine.flights.stats()['coalesced'] == 2)
+        engine.release.set()
+        thread.join(10)
+        summary = runner.summary
+
+    assert summary['succeeded'] == 4
+    assert engine.calls == 2, f"expected 2 Gemini calls, saw {engine.calls}"
+    assert summary['single_flight']['coalesced'] == 2
+    assert engine.tracer.summary()['counters']['coalesced'] == 2
+    print(f"✓ {len(prompts)} prompts made {engine.calls} Gemini calls")
+
+
+def test_engine_cancel_while_waiting():
+    """Test that cancelling one job leaves an identical job's shared request running"""
+    print("\nTesting engine cancellation...")
+    engine = CountingEngine()
+    tokens = [CancelToken(), CancelToken()]
+    threads, results = run_in_threads(
+        lambda i: engine.generate("Create a 50mm cube", save=False, cancel=tokens[i]), 2)
+    wait_for(lambda: engine.flights.stats()['coalesced'] == 1)
+
+    tokens[1].cancel()
+    threads[1].join(5)
+    engine.release.set()
+    threads[0].join(5)
+
+    assert results[1].cancelled and not results[1].ok
+    assert results[0].ok and results[0].script == VALID_SCRIPT
+    assert engine.calls == 1
+    print("✓ Cancelled job stopped; the other still got its script")
+
+
+def main():
+    """Run all tests"""
+    test_concurrent_calls_share_one_run()
+    test_errors_reach_every_caller()
+    test_cancellation_is_reference_counted()
+    test_engine_coalesces_duplicate_prompts()
+    test_engine_cancel_while_waiting()
+    print("\n✓ All single-flight tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Tests for GenCAD AI start-up: lazy imports and the import-time report
+"""
+
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_startup import StartupTimer, format_import_report, import_report, module_subtree, parse_importtime
+
+SAMPLE = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   encodings.utf_8
+import time:      1800 |       1920 | site
+import time:       300 |        300 |     _tkinter
+import time:      4100 |       4400 |   tkinter
+import time:       700 |        700 |   gencad_status
+import time:       690 |       5790 | gencad_ai
+"""
+
+
+def test_parse_report():
+    """Test parsing -X importtime output and isolating one module's imports"""
+    print("Testing the import-time parser...")
+    entries = parse_importtime(SAMPLE)
+    assert entries[0] == ('encodings.utf_8', 120, 120, 1)
+    subtree = module_subtree('gencad_ai', entries)
+    assert [name for name, _, _, _ in subtree] == ['_tkinter', 'tkinter', 'gencad_status', 'gencad_ai']
+    lines = format_import_report('gencad_ai', entries, top=2)
+    assert lines[0] == "gencad_ai: 5.8 ms to import; loads tkinter"
+    assert "tkinter" in lines[1] and "gencad_status" in lines[2] and len(lines) == 3
+    assert module_subtree('missing', entries) == []
+
+    timer = StartupTimer(started=0)
+    timer.marks = [("imports done", 40.0), ("first paint", 95.5)]
+    assert timer.elapsed_ms("first paint") == 95.5 and "(+55.5)" in timer.lines()[1]
+    print("✓ Import-time output parsed; site imports excluded")
+
+
+def test_headless_imports():
+    """Test that the CLI never imports tkinter and nothing imports requests until a request is made"""
+    print("\nTesting lazy imports...")
+    loaded = {name for name, _, _, _ in module_subtree('gencad_cli', import_report('gencad_cli'))}
+    assert 'tkinter' not in loaded and 'requests' not in loaded, sorted(loaded)
+    loaded = {name for name, _, _, _ in module_subtree('gencad_ai', import_report('gencad_ai'))}
+    assert 'sqlite3' not in loaded, "the app opens its history after the first paint"
+
+    check = subprocess.run([sys.executable, "-c", (
+        "import sys, gencad_engine\n"
+        "engine = gencad_engine.GenerationEngine()\n"
+        "assert 'requests' not in sys.modules, 'engine construction imported requests'\n"
+        "engine.client.warm_up()\n"
+        "assert 'requests' in sys.modules\n"
+    )], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    assert check.returncode == 0, check.stderr
+    print("✓ gencad_cli loads neither tkinter nor requests, gencad_ai not sqlite3; the HTTP session is built on first use")
+
+
+def main():
+    """Run all tests"""
+    test_parse_report()
+    test_headless_imports()
+    print("\n✓ All startup tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
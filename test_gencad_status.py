@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI status pipeline
+A fake root stands in for Tk, so no display is needed
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_status import STATUS, StatusPump, StatusQueue, render_batch
+
+
+class FakeRoot:
+    """Records after() callbacks so a test can run the ticks by hand"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+        return len(self.scheduled)
+
+    def after_cancel(self, after_id):
+        self.scheduled[after_id - 1] = None
+
+    def run_tick(self):
+        callback = self.scheduled.pop(0)
+        if callback:
+            callback()
+
+
+def test_concurrent_producers():
+    """Test that many threads can push while the consumer drains, losing and reordering nothing"""
+    print("Testing concurrent producers...")
+    queue = StatusQueue()
+    producers, messages = 16, 2000
+    drained = []
+    done = threading.Event()
+
+    def produce(job):
+        for n in range(messages):
+            queue.status(f"{n}", job_id=job)
+
+    def consume():
+        while not done.is_set() or len(queue):
+            drained.extend(queue.drain(500))
+            time.sleep(0.001)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    threads = [threading.Thread(target=produce, args=(job,)) for job in range(producers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done.set()
+    consumer.join()
+    elapsed = time.perf_counter() - started
+
+    assert len(drained) == producers * messages
+    for job in range(producers):
+        sequence = [int(e.text) for e in drained if e.job_id == job]
+        assert sequence == list(range(messages)), f"job {job} reordered"
+    print(f"✓ {len(drained)} events from {producers} threads in {elapsed:.2f}s, in per-thread order")
+
+
+def test_batched_ticks():
+    """Test that each tick applies its whole batch in one update, keeping text and calls in order"""
+    print("\nTesting batched ticks...")
+    root = FakeRoot()
+    queue = StatusQueue()
+    applied = []
+    pump = StatusPump(root, queue, lambda events: applied.append(render_batch(events)))
+    pump.start()
+
+    # The FreeCAD-not-found path: seven lines in a row
+    for n in range(7):
+        queue.status(f"line {n}")
+    for chunk in ("import Free", "CAD\n", "import Part\n"):
+        queue.tokens(chunk)
+    root.run_tick()
+    assert pump.updates == 1 and len(applied) == 1
+    assert applied[0].count("] line ") == 7 and applied[0].endswith("import FreeCAD\nimport Part\n")
+
+    order = []
+    queue.status("before")
+    queue.call(lambda: order.append(len(applied)))
+    queue.status("after")
+    root.run_tick()
+    assert order == [2], "text queued before a call must be shown before it runs"
+    assert applied[-1].endswith("after\n")
+
+    root.run_tick()  # an idle tick does not touch the widget
+    assert pump.updates == 3 and pump.ticks == 3
+    pump.stop()
+    assert root.scheduled == [None]
+    print("✓ 10 events applied in one update; calls keep their place in the queue")
+
+
+def test_render():
+    """Test that status lines carry the time they were pushed, not drained"""
+    print("\nTesting rendering...")
+    queue = StatusQueue()
+    queue.status("hello")
+    event = queue.drain()[0]
+    assert event.kind == STATUS
+    text = render_batch([event._replace(timestamp=0)])
+    assert text.endswith("] hello\n") and text.startswith("[")
+    print("✓ Status lines rendered with their own timestamps")
+
+
+def main():
+    """Run all tests"""
+    test_concurrent_producers()
+    test_batched_ticks()
+    test_render()
+    print("\n✓ All status pipeline tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for GenCAD AI script templates (reuse when only the dimensions differ)
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_cache import ResponseCache
+from gencad_engine import GenerationEngine
+from gencad_templates import TemplateStore, canonical_prompt, parameterize, substitute
+
+PLATE_PROMPT = "Design a 60mm x 40mm plate, 5mm thick, with a 8mm hole"
+PLATE_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument("Model")
+plate = Part.makeBox(60, 40, 5)
+hole = Part.makeCylinder(4.0, 5, FreeCAD.Vector(30, 20, 0))
+doc.addObject("Part::Feature", "Plate").Shape = plate.cut(hole)
+doc.recompute()
+"""
+
+
+def test_canonical_prompt():
+    """Test that units and numbers are normalised into a shared structure"""
+    print("Testing prompt normalisation...")
+    structure, values = canonical_prompt("Design a 60mm x 40mm plate, 5mm thick, with a 10mm hole.")
+    assert structure == "design a #mm x #mm plate, #mm thick, with a #mm hole"
+    assert values == [60.0, 40.0, 5.0, 10.0]
+    other, values = canonical_prompt("design a 8 cm  x 6cm plate, 0.25 inch thick, with a 12 millimeters hole")
+    assert other == structure and values == [80.0, 60.0, 6.35, 12.0]
+    assert canonical_prompt("M8 nut, 3D printed, 4 holes") == ("m8 nut, 3d printed, # holes", [4.0])
+    print(f"✓ Both prompts reduce to {structure!r}")
+
+
+def test_parameterize():
+    """Test that only scripts whose dimensions all trace back to the prompt become templates"""
+    print("\nTesting parameterization...")
+    _, values = canonical_prompt(PLATE_PROMPT)
+    slots = parameterize(PLATE_SCRIPT, values)
+    assert slots is not None and len(slots) == 7
+    rewritten = substitute(PLATE_SCRIPT, slots, [80.0, 50.0, 6.0, 12.0])
+    assert "makeBox(80, 50, 6)" in rewritten and "makeCylinder(6.0, 6, FreeCAD.Vector(40, 25, 0))" in rewritten
+    assert substitute(PLATE_SCRIPT, slots, [80.5, 50.0, 6.0, 12.0]) is None, "an integer literal cannot take 80.5"
+
+    unexplained = PLATE_SCRIPT.replace("makeCylinder(4.0, 5,", "makeCylinder(4.0, 7,")
+    assert parameterize(unexplained, values) is None, "7 comes from nowhere in the prompt"
+    assert parameterize(PLATE_SCRIPT, [60.0, 40.0, 5.0, 8.0, 25.0]) is None, "25 is never used"
+    ambiguous = PLATE_SCRIPT.replace("4.0", "5.0")
+    assert parameterize(ambiguous, [60.0, 40.0, 5.0, 10.0]) is None, "5 is both the thickness and the hole radius"
+
+    shaft = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument("Model")
+shaft = Part.makeCylinder(5, {length})
+shaft.rotate(FreeCAD.Vector(0, 0, 0), FreeCAD.Vector(0, 1, 0), {angle})
+for i in range(6):
+    doc.addObject("Part::Feature", f"Shaft{{i}}").Shape = shaft.copy()
+doc.recompute()
+"""
+    _, values = canonical_prompt("A 90mm shaft, 10mm across")
+    assert parameterize(shaft.format(length=90, angle=90), values) is None, "90 is an angle here as well"
+    slots = parameterize(shaft.format(length=90, angle=30), values)
+    assert slots is not None and len(slots) == 2, "the angle and the count stay constants"
+    rewritten = substitute(shaft.format(length=90, angle=30), slots, [120.0, 16.0])
+    assert "makeCylinder(8, 120)" in rewritten and ", 30)" in rewritten and "range(6)" in rewritten
+    print("✓ Unexplained, unused and ambiguous dimensions are rejected; angles and counts are kept")
+
+
+def test_engine_reuses_templates():
+    """Test that a second prompt with the same structure is answered without an API call"""
+    print("\nTesting engine reuse...")
+    calls = []
+
+    def fake_request(prompt):
+        calls.append(prompt)
+        return PLATE_SCRIPT
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = GenerationEngine(cache=ResponseCache(os.path.join(directory, "responses")),
+                                  templates=TemplateStore(os.path.join(directory, "templates")))
+        engine.request_script = fake_request
+
+        first = engine.generate(PLATE_PROMPT, save=False)
+        second = engine.generate("Design a 9cm x 50mm plate, 6mm thick, with a 12mm hole", save=False)
+        assert first.ok and second.ok and len(calls) == 1
+        assert second.template_hit and "makeBox(90, 50, 6)" in second.script
+        assert "template reuse" in second.trace.breakdown()
+
+        # The hole may not outgrow the plate: the order of the dimensions must match the stored prompt
+        third = engine.generate("Design a 60mm x 40mm plate, 5mm thick, with a 70mm hole", save=False)
+        assert not third.template_hit and len(calls) == 2
+
+        reuse = engine.tracer.summary()['effective_cache']
+        assert reuse == {'exact_hits': 0, 'template_hits': 1, 'lookups': 3, 'hit_rate': 0.333}
+        assert 'gencad_template_lookups_total{result="hit"} 1' in engine.tracer.prometheus()
+
+        # Templates persist on disk
+        fresh = TemplateStore(os.path.join(directory, "templates"))
+        assert fresh.lookup(engine.template_key(PLATE_PROMPT), "design a 10cm x 20mm plate, 3mm thick, with a 4mm hole")
+    print("✓ Reused the stored script for new dimensions")
+
+
+def main():
+    """Run all tests"""
+    test_canonical_prompt()
+    test_parameterize()
+    test_engine_reuses_templates()
+    print("\n✓ All template tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI script validator
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.bench_validator import legacy_validate, make_script
+from gencad_validator import DANGEROUS_PATTERNS, find_violations, validate_freecad_script
+
+
+def test_matches_legacy_verdicts():
+    """Test that the compiled validator agrees with the original regex loop"""
+    print("Testing agreement with the original validator...")
+    samples = [make_script(3), "", "   ", "print('hello')", "import FreeCAD\nimport Part\n"]
+    injections = ["import os", "import os.path", "os.system('x')", "exec('x')", "EVAL (x)", "__import__('os')",
+                  "open('f')", "reopen()", "raw_input()", "getattr(x, 'y')", "import SYS", "requests.get(u)",
+                  "x = sysfoo.bar", "osmosis.run()", "import system_tools"]
+    for line in injections:
+        samples.append(make_script(2) + line + "\n")
+
+    for script in samples:
+        assert validate_freecad_script(script)[0] == legacy_validate(script)[0], script
+    print(f"✓ Same verdict as the original validator on {len(samples)} scripts")
+
+
+def test_reports_all_violations():
+    """Test that every violation is reported with its position"""
+    print("\nTesting violation positions...")
+    script = make_script(1) + "import os\nx = getattr(doc, 'Name')\nos.remove('f')\n"
+    violations = find_violations(script)
+    found = {(v.rule, v.line, v.column) for v in violations}
+    last = script.count("\n")
+    assert (r'import\s+os(?!\w)', last - 2, 1) in found
+    assert (r'getattr\s*\(', last - 1, 5) in found
+    assert (r'\bos\.', last, 1) in found
+    is_valid, message = validate_freecad_script(script)
+    assert not is_valid and message.endswith(f"(line {last - 2}, column 1)")
+
+    missing = find_violations("x = 1")
+    assert len(missing) == 4 and all(v.line is None for v in missing)
+    print(f"✓ {len(violations)} violations reported in one call with line/column")
+
+
+def test_template_and_unicode():
+    """Test the prompt template's newDocument("Model") form and non-ASCII scripts"""
+    print("\nTesting edge cases...")
+    assert validate_freecad_script(make_script(1))[0]
+    # Python normalizes 'ſys' to 'sys'; the IGNORECASE fallback still catches it
+    assert not validate_freecad_script(make_script(1) + "ſys.exit()\n")[0]
+    assert validate_freecad_script(make_script(1) + "# Größe 10mm\n")[0]
+    assert len(DANGEROUS_PATTERNS) == 28
+    print("✓ newDocument(\"Model\") accepted; non-ASCII scripts still screened")
+
+
+def main():
+    """Run all tests"""
+    test_matches_legacy_verdicts()
+    test_reports_all_violations()
+    test_template_and_unicode()
+    print("\n✓ All validator tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
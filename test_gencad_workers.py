@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI FreeCAD worker pool
+Uses the fake freecadcmd in benchmarks/fakes, so FreeCAD does not need to be installed
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.bench_validator import make_script
+from gencad_workers import WORKER_ENV, WORKER_SCRIPT, WorkerError, WorkerPool
+
+FAKE_FREECADCMD = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fakes", "fake_freecadcmd.py")
+FAKE_COMMAND = [sys.executable, FAKE_FREECADCMD, WORKER_SCRIPT]
+
+
+def write_script(directory, name, source):
+    path = os.path.join(directory, name)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    return path
+
+
+def test_warm_workers():
+    """Test that jobs reuse warm workers, run in fresh documents, and recycle after N jobs"""
+    print("Testing warm worker reuse...")
+    with tempfile.TemporaryDirectory() as directory:
+        # The template's fitAll() call must work without a GUI; prints must not break the protocol
+        script = write_script(directory, "model.py", make_script(3) + "print('hello from the script')\n")
+        pool = WorkerPool(FAKE_COMMAND, size=1, max_jobs_per_worker=3)
+        try:
+            responses = [pool.run_script(script) for _ in range(5)]
+            assert all(r['ok'] for r in responses), responses
+            assert all(r['objects'] == 3 for r in responses), "documents leaked between jobs"
+            assert pool.workers_started == 2, f"expected one recycle, saw {pool.workers_started} starts"
+        finally:
+            pool.close()
+    print(f"✓ 5 jobs ran on {pool.workers_started} worker processes")
+
+
+def test_failures():
+    """Test script errors, crashes and timeouts"""
+    print("\nTesting failures...")
+    with tempfile.TemporaryDirectory() as directory:
+        good = write_script(directory, "good.py", make_script(1))
+        broken = write_script(directory, "broken.py", make_script(1) + "undefined_name\n")
+        crash = write_script(directory, "crash.py", "import os\nos._exit(3)\n")
+        hang = write_script(directory, "hang.py", "import time\ntime.sleep(30)\n")
+
+        pool = WorkerPool(FAKE_COMMAND, size=1)
+        try:
+            response = pool.run_script(broken)
+            assert not response['ok'] and "NameError" in response['error'] and response['traceback']
+
+            for script, expected in ((crash, "exited unexpectedly"), (hang, "timed out")):
+                try:
+                    pool.run_script(script, timeout=2)
+                    assert False, "expected WorkerError"
+                except WorkerError as e:
+                    assert expected in str(e), e
+
+            assert pool.run_script(good)['ok']
+            assert pool.workers_started == 3
+        finally:
+            pool.close()
+    print("✓ Errors reported with tracebacks; crashed and hung workers replaced")
+
+
+def test_concurrency():
+    """Test that the pool never runs more workers than its size"""
+    print("\nTesting concurrent jobs...")
+    with tempfile.TemporaryDirectory() as directory:
+        script = write_script(directory, "model.py", make_script(1))
+        pool = WorkerPool(FAKE_COMMAND, size=2)
+        results = []
+        try:
+            pool.warm_up()
+            threads = [threading.Thread(target=lambda: results.append(pool.run_script(script))) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            pool.close()
+        assert len(results) == 8 and all(r['ok'] for r in results)
+        assert pool.workers_started == 2
+    print("✓ 8 concurrent jobs shared 2 warm workers")
+
+
+def test_import_does_not_serve():
+    """Test that importing the worker script starts nothing unless the pool launched it"""
+    print("\nTesting worker start-up guard...")
+    for command in ([sys.executable, "-c", "import gencad_worker"], FAKE_COMMAND):
+        environment = {key: value for key, value in os.environ.items() if key != WORKER_ENV}
+        completed = subprocess.run(command, cwd=os.path.dirname(WORKER_SCRIPT), env=environment,
+                                   input="", capture_output=True, text=True, timeout=30)
+        assert completed.returncode == 0 and completed.stdout == "", completed
+    print("✓ A plain import (or a run outside the pool) does not start serving")
+
+
+def main():
+    """Run all tests"""
+    test_warm_workers()
+    test_failures()
+    test_concurrency()
+    test_import_does_not_serve()
+    print("\n✓ All worker pool tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
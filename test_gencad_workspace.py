@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the GenCAD AI script workspace
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gencad_engine import GenerationEngine
+from gencad_workspace import Workspace, text_digest
+
+VALID_SCRIPT = """import FreeCAD
+import Part
+doc = FreeCAD.newDocument()
+doc.addObject("Part::Feature", "Box").Shape = Part.makeBox(10, 10, 10)
+doc.recompute()
+"""
+
+
+def age(path, seconds):
+    """Pretend path was last used `seconds` ago"""
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_content_addressed_scripts():
+    """Test that identical scripts share one file and are not rewritten"""
+    print("Testing content-addressed storage...")
+    with tempfile.TemporaryDirectory() as directory:
+        workspace = Workspace(directory)
+        first = workspace.store_script(VALID_SCRIPT)
+        age(first, 100)
+        second = workspace.store_script(VALID_SCRIPT)
+        other = workspace.store_script(VALID_SCRIPT + "# variant\n")
+
+        assert first == second != other
+        assert os.path.basename(first) == f"{text_digest(VALID_SCRIPT)}.py"
+        with open(first, encoding='utf-8') as f:
+            assert f.read() == VALID_SCRIPT
+        assert time.time() - os.stat(first).st_mtime < 10, "a reuse marks the script recently used"
+        assert workspace.stats() == {'writes': 2, 'reuses': 1, 'collected': 0}
+        assert not [name for name in os.listdir(workspace.scripts_dir) if name.endswith('.tmp')]
+        assert workspace.contains(first) and not workspace.contains(__file__)
+    print("✓ Identical scripts stored once; no temp files left behind")
+
+
+def test_garbage_collection():
+    """Test that collection removes least-recently-used entries down to the size cap"""
+    print("\nTesting LRU garbage collection...")
+    with tempfile.TemporaryDirectory() as directory:
+        workspace = Workspace(directory, max_bytes=3 * len(VALID_SCRIPT) + 100, min_age=60)
+        paths = [workspace.store_script(VALID_SCRIPT + f"# {n}\n") for n in range(5)]
+        for n, path in enumerate(paths):
+            age(path, 1000 - n * 100)  # paths[0] is the least recently used
+
+        artifacts = workspace.artifact_dir(text_digest(VALID_SCRIPT + "# 4\n"))
+        with open(os.path.join(artifacts, "model.step"), 'w') as f:
+            f.write("x" * 50)
+        stale_tmp = os.path.join(workspace.scripts_dir, "partial.tmp")
+        with open(stale_tmp, 'w') as f:
+            f.write("half a scri")
+        age(stale_tmp, 1000)
+
+        removed = workspace.collect_garbage()
+        survivors = [path for path in paths if os.path.exists(path)]
+        assert not os.path.exists(stale_tmp)
+        assert survivors == paths[-(len(survivors)):], "the oldest scripts go first"
+        assert os.path.isdir(artifacts), "recently used artifacts survive"
+        assert workspace.size() <= workspace.max_bytes
+        assert removed == 1 + len(paths) - len(survivors)
+
+        # Entries younger than min_age are kept even over budget
+        workspace.max_bytes = 0
+        for path in survivors:
+            os.utime(path)
+        workspace.collect_garbage()
+        assert all(os.path.exists(path) for path in survivors)
+    print(f"✓ Collected {removed} entries; {len(survivors)} recent scripts kept")
+
+
+def test_engine_saves_into_workspace():
+    """Test that the engine hands out workspace paths and never deletes them per job"""
+    print("\nTesting engine integration...")
+    with tempfile.TemporaryDirectory() as directory:
+        engine = GenerationEngine(workspace=Workspace(directory))
+        engine.request_script = lambda prompt: VALID_SCRIPT
+        first = engine.generate("Create a 10mm cube")
+        second = engine.generate("A 10mm cube, please")
+        assert first.ok and second.ok
+        assert first.script_path == second.script_path
+        assert engine.workspace.contains(first.script_path)
+
+        engine.cleanup_temp_file(first.script_path)
+        assert os.path.exists(first.script_path), "shared workspace scripts are left to the collector"
+    print("✓ Both jobs launched the same stored script")
+
+
+def main():
+    """Run all tests"""
+    test_content_addressed_scripts()
+    test_garbage_collection()
+    test_engine_saves_into_workspace()
+    print("\n✓ All workspace tests passed!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())